@@ -0,0 +1,189 @@
+"""
+Execution Backends
+Lets the healthcare_analytics functions run on the pandas or Polars engine and
+accept and return pandas, Polars or PyArrow tables
+"""
+
+import functools
+import os
+import pandas as pd
+
+# Install polars for the multi-threaded engine: pip install polars
+try:
+    import polars as pl
+    POLARS_AVAILABLE = True
+except ImportError:
+    POLARS_AVAILABLE = False
+
+try:
+    import pyarrow as pa
+    PYARROW_AVAILABLE = True
+except ImportError:
+    PYARROW_AVAILABLE = False
+
+ENGINES = ('auto', 'pandas', 'polars')
+RETURN_TYPES = (None, 'pandas', 'polars', 'arrow')
+
+# e.g. HEALTHCARE_BACKEND=polars
+BACKEND_ENV_VAR = 'HEALTHCARE_BACKEND'
+
+_config = {'engine': os.environ.get(BACKEND_ENV_VAR, 'auto').strip().lower() or 'auto',
+           'return_type': None}
+
+def set_backend(engine='auto', return_type=None):
+    """
+    Choose the engine used by every dispatched function.
+
+    Parameters:
+    engine (str): 'pandas', 'polars', or 'auto' (Polars for Polars/Arrow
+                  inputs when it is installed, pandas otherwise)
+    return_type (str): Table type to return: 'pandas', 'polars', 'arrow',
+                       or None to return the type that was passed in
+                       (pandas when no table was passed, as for
+                       load_and_clean_data)
+    """
+    if engine not in ENGINES:
+        raise ValueError(f"engine must be one of {', '.join(ENGINES)}")
+    if return_type not in RETURN_TYPES:
+        raise ValueError("return_type must be None, 'pandas', 'polars' or 'arrow'")
+    if engine == 'polars' and not POLARS_AVAILABLE:
+        raise ImportError("polars is not installed: pip install polars")
+    _config['engine'] = engine
+    _config['return_type'] = return_type
+
+def get_backend():
+    """
+    Returns:
+    dict: The configured engine and return type
+    """
+    return dict(_config)
+
+def _kind(value):
+    """'pandas', 'polars' or 'arrow' for tables and columns, None for anything else"""
+    if isinstance(value, (pd.DataFrame, pd.Series)):
+        return 'pandas'
+    if POLARS_AVAILABLE and isinstance(value, (pl.DataFrame, pl.LazyFrame, pl.Series)):
+        return 'polars'
+    if PYARROW_AVAILABLE and isinstance(value, (pa.Table, pa.RecordBatch, pa.Array, pa.ChunkedArray)):
+        return 'arrow'
+    return None
+
+def _to_pandas(value):
+    kind = _kind(value)
+    if kind == 'polars':
+        if isinstance(value, pl.LazyFrame):
+            value = value.collect()
+        converted = value.to_pandas()
+        if isinstance(value, pl.Series) and value.name == '':
+            converted.name = None
+        return converted
+    if kind == 'arrow':
+        return value.to_pandas()
+    return value
+
+def _to_polars(value):
+    kind = _kind(value)
+    if kind == 'pandas':
+        return pl.from_pandas(value)
+    if kind == 'arrow':
+        return pl.from_arrow(value)
+    return value
+
+def _convert_args(args, kwargs, convert):
+    """Apply convert to table arguments, including tables inside lists (group_by)"""
+    def one(value):
+        if isinstance(value, (list, tuple)):
+            return type(value)(convert(item) for item in value)
+        return convert(value)
+    return [one(value) for value in args], {key: one(value) for key, value in kwargs.items()}
+
+def _convert_result(result, kind):
+    """Return tables and columns as the requested kind; other results pass through"""
+    current = _kind(result)
+    if current is None or current == kind:
+        return result
+
+    if kind == 'pandas':
+        return _to_pandas(result)
+
+    if current == 'pandas':
+        if isinstance(result, pd.DataFrame) and not isinstance(result.index, pd.RangeIndex):
+            # Labelled rows (dates, statistics) become a column
+            result = result.reset_index()
+        if kind == 'polars':
+            return pl.from_pandas(result)
+        if isinstance(result, pd.Series):
+            return pa.Array.from_pandas(result)
+        return pa.Table.from_pandas(result, preserve_index=False)
+
+    if current == 'polars':
+        if isinstance(result, pl.LazyFrame):
+            result = result.collect()
+        return result.to_arrow() if kind == 'arrow' else result
+    return _to_polars(result)
+
+def _polars_implementation(name):
+    import polars_backend
+    return getattr(polars_backend, name, None)
+
+def dispatch(func=None, aligned=False):
+    """
+    Decorator routing a pandas function to the configured engine.
+
+    The wrapped function takes two extra keyword arguments, backend= and
+    return_type=, that override set_backend for one call. On the Polars engine
+    the function of the same name in polars_backend runs when there is one
+    and it accepts the input; otherwise tables are converted to pandas and
+    the original function runs.
+
+    Parameters:
+    func (callable): pandas implementation
+    aligned (bool): The result has one row per input row; pandas results
+                    then get the index of the pandas input
+    """
+    if func is None:
+        return lambda f: dispatch(f, aligned=aligned)
+
+    @functools.wraps(func)
+    def wrapper(*args, backend=None, return_type=None, **kwargs):
+        kinds = [_kind(value) for value in list(args) + list(kwargs.values())]
+        tables = [kind for kind in kinds if kind is not None]
+        input_kind = next((kind for kind in tables if kind != 'pandas'), tables[0] if tables else None)
+
+        engine = backend or _config['engine']
+        if engine == 'auto':
+            engine = 'polars' if input_kind in ('polars', 'arrow') and POLARS_AVAILABLE else 'pandas'
+        elif engine not in ENGINES:
+            raise ValueError(f"backend must be one of {', '.join(ENGINES)}")
+        result_kind = return_type or _config['return_type'] or input_kind or 'pandas'
+
+        # Polars has no row labels, so frames indexed by a named label (a
+        # census by date) stay on pandas
+        labelled = any(isinstance(value, pd.DataFrame) and value.index.name is not None
+                       for value in list(args) + list(kwargs.values()))
+
+        result = NotImplemented
+        if engine == 'polars' and not labelled:
+            if not POLARS_AVAILABLE:
+                raise ImportError("polars is not installed: pip install polars")
+            implementation = _polars_implementation(func.__name__)
+            if implementation is not None:
+                polars_args, polars_kwargs = _convert_args(args, kwargs, _to_polars)
+                result = implementation(*polars_args, **polars_kwargs)
+
+        if result is NotImplemented:
+            pandas_args, pandas_kwargs = _convert_args(args, kwargs, _to_pandas)
+            result = func(*pandas_args, **pandas_kwargs)
+
+        result = _convert_result(result, result_kind)
+        if aligned and isinstance(result, pd.Series) and args and _kind(args[0]) == 'pandas' \
+                and len(result) == len(args[0]):
+            result.index = args[0].index
+        return result
+
+    return wrapper
+
+if __name__ == "__main__":
+    print("Execution Backends")
+    print(f"Polars available: {POLARS_AVAILABLE}")
+    print(f"Configured: {get_backend()} (set {BACKEND_ENV_VAR} or call set_backend())")
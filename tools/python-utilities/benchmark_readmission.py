@@ -0,0 +1,71 @@
+"""
+Readmission Engine Benchmark
+Compares the sort-once NumPy readmission engine with the previous
+groupby/shift implementation on synthetic admissions
+"""
+
+import sys
+import time
+import numpy as np
+import pandas as pd
+
+from healthcare_analytics import calculate_readmission_rate
+
+def legacy_readmission_rate(df, patient_id_col='patient_id',
+                            admission_date_col='admission_date',
+                            days_threshold=30):
+    """Previous groupby/shift implementation, kept as the reference result"""
+    df_sorted = df.sort_values([patient_id_col, admission_date_col])
+    df_sorted['next_admission'] = df_sorted.groupby(patient_id_col)[admission_date_col].shift(-1)
+    df_sorted['days_to_next'] = (df_sorted['next_admission'] - df_sorted[admission_date_col]).dt.days
+
+    readmissions = df_sorted[df_sorted['days_to_next'] <= days_threshold]
+    readmission_rate = (len(readmissions) / len(df_sorted)) * 100
+
+    return round(readmission_rate, 2)
+
+def make_admissions(n_rows, seed=42):
+    """Create random admissions for roughly n_rows / 4 patients"""
+    rng = np.random.default_rng(seed)
+    n_patients = max(n_rows // 4, 1)
+
+    return pd.DataFrame({
+        'patient_id': [f"P{i:08d}" for i in rng.integers(0, n_patients, n_rows)],
+        'admission_date': (pd.Timestamp('2023-01-01')
+                           + pd.to_timedelta(rng.integers(0, 730 * 24, n_rows), unit='h'))
+    })
+
+def time_call(func, df, repeats=3):
+    """Best wall time in seconds over several runs, plus the last result"""
+    best = float('inf')
+    for _ in range(repeats):
+        start = time.perf_counter()
+        result = func(df)
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+def run_benchmark(sizes=(10_000, 100_000, 1_000_000)):
+    """Time both engines at each size and check the results match"""
+    rows = []
+    for n_rows in sizes:
+        df = make_admissions(n_rows)
+        legacy_time, legacy_rate = time_call(legacy_readmission_rate, df)
+        engine_time, engine_rate = time_call(calculate_readmission_rate, df)
+
+        if legacy_rate != engine_rate:
+            raise AssertionError(f"Rate mismatch at {n_rows} rows: {legacy_rate} vs {engine_rate}")
+
+        rows.append({
+            'rows': n_rows,
+            'legacy_seconds': round(legacy_time, 4),
+            'engine_seconds': round(engine_time, 4),
+            'speedup': round(legacy_time / engine_time, 1),
+            'readmission_rate': engine_rate
+        })
+
+    return pd.DataFrame(rows)
+
+if __name__ == "__main__":
+    sizes = [int(arg) for arg in sys.argv[1:]] or (10_000, 100_000, 1_000_000)
+    print("⏱️ Readmission engine benchmark")
+    print(run_benchmark(sizes).to_string(index=False))
@@ -0,0 +1,286 @@
+"""
+Healthcare Analytics Benchmark Suite
+Measures the healthcare_analytics.py functions across data sizes, keeps a JSON
+history of runs and flags regressions between two runs
+"""
+
+import argparse
+import gc
+import io
+import json
+import multiprocessing
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+import pandas as pd
+
+import healthcare_analytics as ha
+from synthetic_ehr import synthetic_admissions
+
+DEFAULT_SIZES = (10_000, 100_000, 1_000_000, 10_000_000)
+# Kept in the user cache, outside the source tree, so runs never show up in git
+DEFAULT_HISTORY = os.path.join(os.environ.get('XDG_CACHE_HOME') or os.path.expanduser('~/.cache'),
+                               'python-utilities', 'benchmark_history.json')
+DEFAULT_THRESHOLD = 0.10
+
+DATE_COLUMNS = ['admission_date', 'discharge_date']
+
+# Each benchmark gets the admissions frame and the path of the same data as CSV
+BENCHMARKS = {
+    'load_and_clean_data': lambda df, csv_path: ha.load_and_clean_data(csv_path, DATE_COLUMNS),
+    'calculate_readmission_rate': lambda df, csv_path: ha.calculate_readmission_rate(df),
+    'create_age_groups': lambda df, csv_path: ha.create_age_groups(df['age']),
+    'generate_summary_stats': lambda df, csv_path: ha.generate_summary_stats(df),
+    'calculate_length_of_stay': lambda df, csv_path: ha.calculate_length_of_stay(df),
+    'plot_patient_flow': lambda df, csv_path: ha.plot_patient_flow(df, output=io.BytesIO())
+}
+
+METRICS = ('wall_seconds', 'peak_rss_mb', 'peak_alloc_mb')
+
+# Changes smaller than these are noise, whatever their percentage
+NOISE_FLOOR = {'wall_seconds': 0.05, 'peak_rss_mb': 1.0, 'peak_alloc_mb': 1.0}
+
+def _rss_kb(field):
+    """VmRSS or VmHWM of this process in kB (Linux only)"""
+    with open('/proc/self/status') as f:
+        for line in f:
+            if line.startswith(field + ':'):
+                return int(line.split()[1])
+    return None
+
+def _reset_peak_rss():
+    """Reset VmHWM to the current RSS; False where the kernel does not support it"""
+    try:
+        with open('/proc/self/clear_refs', 'w') as f:
+            f.write('5')
+        return True
+    except OSError:
+        return False
+
+def _measure(name, parquet_path, csv_path, repeats):
+    """
+    Run one benchmark in this (fresh) process.
+
+    Wall time is the best of `repeats` runs. Peak RSS is the high-water mark
+    above the RSS after loading the input. Peak allocations come from a
+    separate tracemalloc run, since tracing slows the code down.
+    """
+    func = BENCHMARKS[name]
+    df = pd.read_parquet(parquet_path)
+    func(df.head(1000), csv_path if name != 'load_and_clean_data' else _head_csv(csv_path))
+
+    gc.collect()
+    can_reset = _reset_peak_rss()
+    baseline_kb = _rss_kb('VmRSS') if can_reset else None
+
+    best = float('inf')
+    for _ in range(repeats):
+        start = time.perf_counter()
+        func(df, csv_path)
+        best = min(best, time.perf_counter() - start)
+        gc.collect()
+
+    peak_rss_mb = None
+    if can_reset:
+        peak_rss_mb = round(max(_rss_kb('VmHWM') - baseline_kb, 0) / 1024, 1)
+
+    tracemalloc.start()
+    func(df, csv_path)
+    _, peak_bytes = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {'wall_seconds': round(best, 4), 'peak_rss_mb': peak_rss_mb,
+            'peak_alloc_mb': round(peak_bytes / 1024 ** 2, 1)}
+
+def _head_csv(csv_path, n_rows=1000):
+    """Small copy of the CSV for warming up the reader"""
+    head_path = csv_path + '.head.csv'
+    if not os.path.exists(head_path):
+        pd.read_csv(csv_path, nrows=n_rows).to_csv(head_path, index=False)
+    return head_path
+
+def _git_commit():
+    try:
+        return subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'],
+                                       cwd=os.path.dirname(os.path.abspath(__file__)),
+                                       stderr=subprocess.DEVNULL, text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def run_suite(sizes=DEFAULT_SIZES, functions=None, repeats=3, history_path=DEFAULT_HISTORY):
+    """
+    Benchmark each function at each size and append the run to the history.
+
+    Every measurement runs in a new process, so peak RSS and allocations
+    are not polluted by earlier benchmarks or by generating the data.
+
+    Parameters:
+    sizes (iterable): Numbers of admissions
+    functions (list): Benchmark names (default: all of BENCHMARKS)
+    repeats (int): Timed runs per measurement; the best is kept
+    history_path (str): JSON history file (None to skip saving)
+
+    Returns:
+    dict: The recorded run
+    """
+    functions = list(functions or BENCHMARKS)
+    unknown = set(functions) - set(BENCHMARKS)
+    if unknown:
+        raise ValueError(f"Unknown benchmarks: {', '.join(sorted(unknown))}")
+
+    context = multiprocessing.get_context('spawn')
+    results = []
+    for n_rows in sizes:
+        with tempfile.TemporaryDirectory() as data_dir:
+            parquet_path = os.path.join(data_dir, 'admissions.parquet')
+            csv_path = os.path.join(data_dir, 'admissions.csv')
+            df = synthetic_admissions(n_rows)
+            df.to_parquet(parquet_path, index=False)
+            if 'load_and_clean_data' in functions:
+                df.to_csv(csv_path, index=False)
+            del df
+
+            for name in functions:
+                with ProcessPoolExecutor(max_workers=1, mp_context=context) as pool:
+                    metrics = pool.submit(_measure, name, parquet_path, csv_path, repeats).result()
+                results.append({'function': name, 'rows': n_rows, **metrics})
+                print(f"  {name} @ {n_rows:,}: {metrics['wall_seconds']}s")
+
+    run = {
+        'run_id': datetime.now().strftime('%Y%m%d-%H%M%S-%f'),
+        'commit': _git_commit(),
+        'python': platform.python_version(),
+        'pandas': pd.__version__,
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+        'results': results
+    }
+
+    if history_path:
+        _save_run(run, history_path)
+
+    return run
+
+def _save_run(run, history_path):
+    """Append a run to the history, suffixing its run_id if another run has it"""
+    history = load_history(history_path)
+    taken = {recorded['run_id'] for recorded in history}
+    run_id, suffix = run['run_id'], 2
+    while run['run_id'] in taken:
+        run['run_id'] = f"{run_id}-{suffix}"
+        suffix += 1
+    history.append(run)
+    os.makedirs(os.path.dirname(os.path.abspath(history_path)), exist_ok=True)
+    with open(history_path, 'w', encoding='utf-8') as f:
+        json.dump(history, f, indent=2)
+
+def load_history(history_path=DEFAULT_HISTORY):
+    """All recorded runs, oldest first"""
+    if not os.path.exists(history_path):
+        return []
+    with open(history_path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+def _find_run(history, run):
+    """Look a run up by run_id, or by list position (e.g. -1 for the latest)"""
+    if isinstance(run, int) or run.lstrip('-').isdigit():
+        try:
+            return history[int(run)]
+        except IndexError:
+            raise KeyError(f"The history has only {len(history)} run(s)") from None
+    for recorded in history:
+        if recorded['run_id'] == run:
+            return recorded
+    raise KeyError(f"No run {run} in the history")
+
+def compare_runs(baseline=-2, candidate=-1, threshold=DEFAULT_THRESHOLD,
+                 history_path=DEFAULT_HISTORY):
+    """
+    Compare every metric of two runs.
+
+    A regression is a metric that grew by more than `threshold` (a fraction)
+    and by more than its NOISE_FLOOR. Only function/size pairs present in
+    both runs are compared. Growth from a baseline of 0 is an infinite
+    change_pct.
+
+    Parameters:
+    baseline (str or int): run_id or history position of the reference run
+    candidate (str or int): run_id or history position of the run to check
+    threshold (float): Allowed relative growth, e.g. 0.10 for 10%
+
+    Returns:
+    pd.DataFrame: One row per function, size and metric
+    """
+    history = load_history(history_path)
+    baseline_run = _find_run(history, baseline)
+    candidate_run = _find_run(history, candidate)
+
+    before = {(r['function'], r['rows']): r for r in baseline_run['results']}
+    rows = []
+    for result in candidate_run['results']:
+        reference = before.get((result['function'], result['rows']))
+        if reference is None:
+            continue
+        for metric in METRICS:
+            old, new = reference.get(metric), result.get(metric)
+            if old is None or new is None:
+                continue
+            if old:
+                change = (new - old) / old
+            else:
+                change = float('inf') if new else 0.0
+            rows.append({
+                'function': result['function'],
+                'rows': result['rows'],
+                'metric': metric,
+                'baseline': old,
+                'candidate': new,
+                'change_pct': round(change * 100, 1),
+                'regression': change > threshold and new - old > NOISE_FLOOR[metric]
+            })
+
+    return pd.DataFrame(rows, columns=['function', 'rows', 'metric', 'baseline',
+                                       'candidate', 'change_pct', 'regression'])
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark healthcare_analytics.py")
+    parser.add_argument('--history', default=DEFAULT_HISTORY, help="JSON history file")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    run_parser = commands.add_parser('run', help="Benchmark and append to the history")
+    run_parser.add_argument('sizes', nargs='*', type=int, default=list(DEFAULT_SIZES))
+    run_parser.add_argument('--functions', nargs='+', choices=list(BENCHMARKS))
+    run_parser.add_argument('--repeats', type=int, default=3)
+
+    compare_parser = commands.add_parser('compare', help="Flag regressions between two runs")
+    compare_parser.add_argument('baseline', nargs='?', default='-2', help="run_id (default: previous run)")
+    compare_parser.add_argument('candidate', nargs='?', default='-1', help="run_id (default: latest run)")
+    compare_parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD,
+                                help="Allowed relative growth (default: 0.10)")
+
+    args = parser.parse_args(argv)
+
+    if args.command == 'run':
+        print("⏱️ Healthcare analytics benchmark suite")
+        run = run_suite(args.sizes, args.functions, args.repeats, args.history)
+        print(pd.DataFrame(run['results']).to_string(index=False))
+        print(f"\n📁 Saved run {run['run_id']} to {args.history}")
+        return 0
+
+    comparison = compare_runs(args.baseline, args.candidate, args.threshold, args.history)
+    print(comparison.to_string(index=False))
+    regressions = comparison[comparison['regression']]
+    if len(regressions):
+        print(f"\n❌ {len(regressions)} regression(s) beyond {args.threshold:.0%}")
+        return 1
+    print(f"\n✅ No regressions beyond {args.threshold:.0%}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,129 @@
+"""
+Binning Engine
+Precompiled numeric binning schemes (age groups and similar) for healthcare analysis
+"""
+
+import numpy as np
+import pandas as pd
+
+class BinScheme:
+    """
+    A set of left-closed bins [edges[i], edges[i + 1]) with one label each.
+
+    Values are binned with a single np.searchsorted into int8 codes; -1
+    marks missing or out-of-range values. The ordered categorical dtype is
+    built once, so turning codes into labels never rebuilds it.
+    """
+
+    def __init__(self, name, edges, labels):
+        self.name = name
+        self.edges = np.asarray(edges, dtype='float64')
+        self.labels = tuple(labels)
+        if len(self.edges) != len(self.labels) + 1:
+            raise ValueError("A scheme needs exactly one more edge than labels")
+        if np.any(np.diff(self.edges) <= 0):
+            raise ValueError("Bin edges must be strictly increasing")
+        self.dtype = pd.CategoricalDtype(self.labels, ordered=True)
+
+    def codes(self, values):
+        """
+        Bin numeric values.
+
+        Parameters:
+        values (array-like): Numeric values, missing as NaN
+
+        Returns:
+        np.ndarray: int8 bin codes, -1 for missing or out-of-range values
+        """
+        values = _as_float(values)
+        codes = np.searchsorted(self.edges, values, side='right') - 1
+        # Values at or above the last edge, and NaN, land past the last bin
+        codes[codes >= len(self.labels)] = -1
+        return codes.astype('int8')
+
+    def to_series(self, codes, index=None, name=None):
+        """Wrap codes as a labelled categorical Series without copying labels"""
+        return pd.Series(pd.Categorical.from_codes(codes, dtype=self.dtype),
+                         index=index, name=name)
+
+    def cut(self, series):
+        """pd.cut-style labelled result for a Series"""
+        return self.to_series(self.codes(series), index=series.index, name=series.name)
+
+class MultiBinner:
+    """
+    Bin values under several schemes in one pass.
+
+    The edges of every scheme are merged into one sorted array, so each
+    value needs a single searchsorted; small per-scheme lookup tables then
+    turn the merged bin into each scheme's code.
+    """
+
+    def __init__(self, schemes):
+        self.schemes = list(schemes)
+        self.edges = np.unique(np.concatenate([scheme.edges for scheme in self.schemes]))
+
+        # Slot 0 is "below every edge"; slot j + 1 is [edges[j], edges[j + 1])
+        self.tables = {scheme.name: np.concatenate([[-1], scheme.codes(self.edges)]).astype('int8')
+                       for scheme in self.schemes}
+
+    def codes(self, values):
+        """
+        Bin values under every scheme.
+
+        Returns:
+        dict: Scheme name -> int8 codes
+        """
+        values = _as_float(values)
+        slots = np.searchsorted(self.edges, values, side='right')
+        slots[np.isnan(values)] = 0
+        return {name: table[slots] for name, table in self.tables.items()}
+
+    def iter_codes(self, chunks, column):
+        """
+        Bin one column of a chunked stream under every scheme.
+
+        Parameters:
+        chunks (iterable): DataFrame chunks, e.g. from iter_clean_chunks
+        column (str): Numeric column to bin
+
+        Yields:
+        pd.DataFrame: int8 code columns named after the schemes, aligned with the chunk
+        """
+        for chunk in chunks:
+            yield pd.DataFrame(self.codes(chunk[column]), index=chunk.index)
+
+def _as_float(values):
+    """Numeric values as a float64 array with missing values as NaN"""
+    if isinstance(values, pd.Series):
+        return values.to_numpy(dtype='float64', na_value=np.nan)
+    return np.asarray(values, dtype='float64')
+
+# Scheme used by healthcare_analytics.create_age_groups
+PYTHON_AGE_GROUPS = BinScheme(
+    'python',
+    [0, 18, 35, 50, 65, np.inf],
+    ['<18', '18-34', '35-49', '50-64', '65+'])
+
+# Labels from the Patient Demographics Summary query in healthcare_analytics_queries.sql
+SQL_AGE_GROUPS = BinScheme(
+    'sql',
+    [-np.inf, 18, 35, 50, 65, np.inf],
+    ['Pediatric (0-17)', 'Young Adult (18-34)', 'Middle Age (35-49)',
+     'Older Adult (50-64)', 'Senior (65+)'])
+
+# CMS-HCC demographic age bands
+CMS_AGE_BANDS = BinScheme(
+    'cms',
+    [0, 35, 45, 55, 60, 65, 70, 75, 80, 85, 90, 95, np.inf],
+    ['0-34', '35-44', '45-54', '55-59', '60-64', '65-69', '70-74',
+     '75-79', '80-84', '85-89', '90-94', '95+'])
+
+AGE_SCHEMES = {scheme.name: scheme
+               for scheme in (PYTHON_AGE_GROUPS, SQL_AGE_GROUPS, CMS_AGE_BANDS)}
+
+if __name__ == "__main__":
+    print("Binning Engine")
+    print("Available schemes:")
+    for scheme in AGE_SCHEMES.values():
+        print(f"- {scheme.name}: {', '.join(scheme.labels)}")
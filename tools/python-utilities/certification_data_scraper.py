@@ -13,10 +13,13 @@ import os
 import time
 import logging
 
+from instrumentation import instrument_class
+
 # Set up logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
+@instrument_class
 class CertificationScraper:
     """Scraper for certification study guides and related data"""
     
@@ -8,6 +8,7 @@ import matplotlib.pyplot as plt
 import seaborn as sns
 import numpy as np
 from datetime import datetime, timedelta
+from instrumentation import instrument
 import warnings
 warnings.filterwarnings('ignore')
 
@@ -21,6 +22,7 @@ except ImportError:
     print("📦 Install plotly for interactive charts: pip install plotly")
     PLOTLY_AVAILABLE = False
 
+@instrument
 def load_data():
     """Load your certification data"""
     data = {
@@ -62,6 +64,7 @@ def load_data():
     
     return df
 
+@instrument
 def create_static_dashboard(df):
     """Create comprehensive static dashboard"""
     
@@ -134,6 +137,7 @@ def create_static_dashboard(df):
     plt.tight_layout()
     return fig
 
+@instrument
 def create_interactive_dashboard(df):
     """Create interactive dashboard with Plotly"""
     if not PLOTLY_AVAILABLE:
@@ -199,6 +203,7 @@ def create_interactive_dashboard(df):
     
     return fig
 
+@instrument
 def generate_summary_report(df):
     """Generate text summary report"""
     
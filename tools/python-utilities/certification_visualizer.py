@@ -9,10 +9,13 @@ import seaborn as sns
 from datetime import datetime, timedelta
 import numpy as np
 
+from instrumentation import instrument
+
 # Set up the visual style
 plt.style.use('seaborn-v0_8')
 sns.set_palette("husl")
 
+@instrument
 def create_certification_data():
     """Create the certification tracker dataset"""
     data = {
@@ -55,6 +58,7 @@ def create_certification_data():
     
     return df
 
+@instrument
 def create_progress_chart(df):
     """Create horizontal bar chart showing progress"""
     fig, ax = plt.subplots(figsize=(12, 8))
@@ -82,6 +86,7 @@ def create_progress_chart(df):
     plt.tight_layout()
     return fig
 
+@instrument
 def create_timeline_chart(df):
     """Create timeline chart showing target completion dates"""
     fig, ax = plt.subplots(figsize=(12, 6))
@@ -111,6 +116,7 @@ def create_timeline_chart(df):
     plt.tight_layout()
     return fig
 
+@instrument
 def create_status_distribution(df):
     """Create pie chart showing status distribution"""
     fig, ax = plt.subplots(figsize=(8, 8))
@@ -129,6 +135,7 @@ def create_status_distribution(df):
     
     return fig
 
+@instrument
 def create_platform_analysis(df):
     """Create analysis by platform"""
     fig, (ax1, ax2) = plt.subplots(1, 2, figsize=(15, 6))
@@ -148,6 +155,7 @@ def create_platform_analysis(df):
     plt.tight_layout()
     return fig
 
+@instrument
 def create_comprehensive_dashboard(df):
     """Create a comprehensive dashboard with multiple charts"""
     fig = plt.figure(figsize=(16, 12))
@@ -12,6 +12,7 @@ from plotly.subplots import make_subplots
 import plotly.figure_factory as ff
 from datetime import datetime, timedelta
 import numpy as np
+from instrumentation import instrument
 import warnings
 warnings.filterwarnings('ignore')
 
@@ -30,6 +31,7 @@ BRAND_COLORS = {
     'info': '#2196F3'
 }
 
+@instrument
 def load_certification_data():
     """Load certification data from your tracker"""
     # Read from your actual certifications-tracker.md or create DataFrame
@@ -89,6 +91,7 @@ def load_certification_data():
     
     return df
 
+@instrument
 def create_interactive_dashboard(df):
     """Create comprehensive interactive dashboard using Plotly"""
     
@@ -222,6 +225,7 @@ def create_interactive_dashboard(df):
     
     return fig
 
+@instrument
 def create_progress_tracker(df):
     """Create animated progress tracker"""
     
@@ -273,6 +277,7 @@ def create_progress_tracker(df):
     
     return fig
 
+@instrument
 def create_skills_analysis(df):
     """Create skills development analysis"""
     
@@ -319,6 +324,7 @@ def create_skills_analysis(df):
     
     return fig
 
+@instrument
 def generate_portfolio_report(df):
     """Generate comprehensive portfolio report"""
     
@@ -337,6 +343,7 @@ def generate_portfolio_report(df):
     
     return report
 
+@instrument
 def save_all_visualizations(df):
     """Save all visualizations for portfolio"""
     
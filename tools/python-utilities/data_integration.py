@@ -9,9 +9,12 @@ import os
 from datetime import datetime
 import logging
 
+from instrumentation import instrument_class
+
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
+@instrument_class
 class CertificationDataIntegrator:
     """Integrates scraped certification data with portfolio system"""
     
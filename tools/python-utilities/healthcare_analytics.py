@@ -6,25 +6,95 @@ A collection of reusable functions for healthcare analytics projects.
 import pandas as pd
 import numpy as np
 import matplotlib.pyplot as plt
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
 import seaborn as sns
 from datetime import datetime, timedelta
+import hashlib
+import json
+import os
+import pickle
+import tempfile
 import warnings
 warnings.filterwarnings('ignore')
 
-def load_and_clean_data(file_path, date_columns=None):
+from backends import dispatch, get_backend, set_backend
+from binning import AGE_SCHEMES
+from dedup import Deduplicator, value_hashes
+from instrumentation import instrument, instrument_class
+
+# Install pyarrow for the on-disk load cache: pip install pyarrow
+try:
+    import pyarrow as pa
+    import pyarrow.feather as feather
+    import pyarrow.parquet as pq
+    PYARROW_AVAILABLE = True
+except ImportError:
+    PYARROW_AVAILABLE = False
+
+DEFAULT_CACHE_BYTES = 2 * 1024 ** 3
+DEFAULT_SORT_BYTES = 256 * 1024 ** 2
+
+# Compact frames store dates as int32 days since this epoch
+DAY_EPOCH = pd.Timestamp('1970-01-01')
+
+@instrument
+@dispatch
+def load_and_clean_data(file_path, date_columns=None, cache_dir=None,
+                        max_cache_bytes=DEFAULT_CACHE_BYTES, compact=False,
+                        dedup_key=None, deduplicator=None):
     """
     Load healthcare data and perform basic cleaning.
     
+    When cache_dir is given the cleaned frame is stored there as an
+    uncompressed Arrow IPC file, keyed on the source path, size, mtime,
+    date_columns and dedup_key. Repeat loads of an unchanged file are
+    memory-mapped reads.
+    
+    Duplicates are dropped by a 64-bit hash of each row's key (dedup_key,
+    or the whole row like drop_duplicates), keeping the first occurrence.
+    Pass a shared dedup.Deduplicator to drop rows already loaded from other
+    files; its report() has the duplicates dropped per file. The cache is
+    skipped then, since the result depends on what was loaded before.
+    
+    With compact=True the file is read in chunks and each cleaned chunk is
+    converted by compact_frame before the next is read, so the full-width
+    frame never exists; peak memory is the compact frame plus one chunk.
+    
     Parameters:
     file_path (str): Path to the data file
     date_columns (list): List of column names to convert to datetime
+    cache_dir (str): Directory for the cleaned-frame cache (None disables it)
+    max_cache_bytes (int): Total cache size kept after evicting oldest entries
+    compact (bool): Return the compact representation from compact_frame
+    dedup_key (str or list): Natural key columns, e.g. 'admission_id' or
+                             ['patient_id', 'admission_date'] (None for whole rows)
+    deduplicator (dedup.Deduplicator): Seen-set shared across files
+                                       (overrides dedup_key)
     
     Returns:
     pd.DataFrame: Cleaned dataset
     """
+    cache_path = None
+    if cache_dir and PYARROW_AVAILABLE and deduplicator is None:
+        cache_path = _cache_path(cache_dir, file_path, date_columns, dedup_key, compact)
+        if os.path.exists(cache_path):
+            df = feather.read_table(cache_path, memory_map=True).to_pandas()
+            os.utime(cache_path)
+            print(f"Data loaded from cache: {df.shape[0]} rows, {df.shape[1]} columns")
+            return df
+    
+    if compact:
+        df = _load_compact(file_path, date_columns, deduplicator or Deduplicator(dedup_key))
+        if cache_path:
+            _write_cache(df, cache_path, max_cache_bytes)
+        return df
+    
     # Load data
     if file_path.endswith('.csv'):
         df = pd.read_csv(file_path)
+    elif file_path.endswith('.parquet'):
+        df = pd.read_parquet(file_path)
     elif file_path.endswith('.xlsx'):
         df = pd.read_excel(file_path)
     else:
@@ -36,85 +106,913 @@ def load_and_clean_data(file_path, date_columns=None):
             df[col] = pd.to_datetime(df[col])
     
     # Basic cleaning
-    df = df.drop_duplicates()
+    deduplicator = deduplicator or Deduplicator(dedup_key)
+    df = deduplicator.filter(df, file_path)
+    
+    if cache_path:
+        _write_cache(df, cache_path, max_cache_bytes)
+    
+    print(f"Data loaded successfully: {df.shape[0]} rows, {df.shape[1]} columns "
+          f"({deduplicator.dropped(file_path)} duplicates dropped)")
+    return df
+
+def _load_compact(file_path, date_columns, deduplicator):
+    """Stream cleaned chunks through compact_frame and combine the compact chunks"""
+    parts, original_bytes = [], 0
+    for chunk in iter_clean_chunks(file_path, date_columns, deduplicator=deduplicator):
+        original_bytes += int(chunk.memory_usage(index=False, deep=True).sum())
+        parts.append(_compact(chunk, date_columns))
     
-    print(f"Data loaded successfully: {df.shape[0]} rows, {df.shape[1]} columns")
+    df = _concat_compact(parts, date_columns)
+    if date_columns is not None and len(df.attrs['day_columns']) < len(date_columns):
+        timed = [col for col in date_columns if col not in df.attrs['day_columns']]
+        print(f"Compact mode kept {', '.join(timed)} as datetimes: they have times of day")
+    saved = original_bytes - int(df.memory_usage(index=False, deep=True).sum())
+    print(f"Compact mode saved {saved / 1024 ** 2:.1f} MB")
     return df
 
+def _concat_compact(parts, date_columns):
+    """
+    Stack compact chunks into one compact frame.
+    
+    A date column stays day numbers only if it did in every chunk. A
+    column that is categorical in any chunk is made categorical in all of
+    them (a text column read as float where a chunk has only blanks) with
+    the union of the chunks' categories, so concat keeps it categorical
+    instead of falling back to object.
+    """
+    if not parts:
+        return pd.DataFrame()
+    timed = set()
+    for compact, chunk_timed in parts:
+        timed.update(chunk_timed)
+    frames = [compact for compact, _ in parts]
+    
+    for col in timed:
+        for frame in frames:
+            if not pd.api.types.is_datetime64_any_dtype(frame[col]):
+                frame[col] = _as_datetimes(frame[col])
+    
+    for col in frames[0].columns:
+        if not any(isinstance(frame[col].dtype, pd.CategoricalDtype) for frame in frames):
+            continue
+        for frame in frames:
+            frame[col] = frame[col].astype('category')
+        # An all-blank chunk has empty float categories; leave it out of the union
+        filled = [frame[col] for frame in frames if len(frame[col].cat.categories)]
+        categories = pd.api.types.union_categoricals(filled).categories
+        for frame in frames:
+            frame[col] = frame[col].cat.set_categories(categories)
+    
+    # Chunks keep the row labels of the file, as a full load does
+    df = pd.concat(frames)
+    df.attrs['day_columns'] = [col for col in frames[0].attrs['day_columns'] if col not in timed]
+    return df
+
+def _cache_path(cache_dir, file_path, date_columns, dedup_key=None, compact=False):
+    """Build the cache file name from the source file fingerprint"""
+    stat = os.stat(file_path)
+    identity = [os.path.abspath(file_path), stat.st_size,
+                stat.st_mtime_ns, list(date_columns or [])]
+    if dedup_key is not None:
+        identity.append([dedup_key] if isinstance(dedup_key, str) else list(dedup_key))
+    if compact:
+        identity.append('compact')
+    fingerprint = json.dumps(identity)
+    digest = hashlib.sha1(fingerprint.encode('utf-8')).hexdigest()
+    return os.path.join(cache_dir, f"{digest}.arrow")
+
+def _write_cache(df, cache_path, max_cache_bytes):
+    """Write a cleaned frame to the cache and evict the oldest entries"""
+    # Object columns mixing str and int (e.g. from chunked CSV type
+    # inference) have no Arrow type; such frames are returned uncached
+    # rather than coerced, so cached and uncached loads stay identical
+    try:
+        table = pa.Table.from_pandas(df)
+    except pa.ArrowException as error:
+        print(f"Cache skipped: frame cannot be stored as Arrow ({error})")
+        return
+    
+    cache_dir = os.path.dirname(cache_path)
+    os.makedirs(cache_dir, exist_ok=True)
+    
+    # Write to a temp file first so readers never see a partial entry
+    tmp_path = f"{cache_path}.{os.getpid()}.tmp"
+    feather.write_feather(table, tmp_path, compression='uncompressed')
+    os.replace(tmp_path, cache_path)
+    
+    entries = []
+    for name in os.listdir(cache_dir):
+        if name.endswith('.arrow'):
+            stat = os.stat(os.path.join(cache_dir, name))
+            entries.append((stat.st_mtime, stat.st_size, name))
+    
+    total_bytes = sum(size for _, size, _ in entries)
+    for _, size, name in sorted(entries):
+        if total_bytes <= max_cache_bytes:
+            break
+        path = os.path.join(cache_dir, name)
+        if path != cache_path:
+            os.remove(path)
+            total_bytes -= size
+
+@instrument
+@dispatch
+def compact_frame(df, date_columns=None, category_columns=None):
+    """
+    Convert a healthcare frame to a compact in-memory representation.
+    
+    Text columns such as patient_id and department become categoricals,
+    numeric columns are downcast to the smallest type that holds them and
+    date columns become int32 days since 1970-01-01. The converted date
+    columns are listed in df.attrs['day_columns'] so the other functions in
+    this module can treat them as dates.
+    
+    Day numbers cannot hold a time of day, so only date columns whose values
+    are all at midnight are converted; the others stay datetimes, and
+    length of stay and readmission gaps give the same answers as on the
+    original frame.
+    
+    Parameters:
+    df (pd.DataFrame): Cleaned dataset
+    date_columns (list): Date columns to store as day numbers (default: all datetime columns)
+    category_columns (list): Columns to store as categoricals (default: all text columns)
+    
+    Returns:
+    pd.DataFrame: Compact dataset
+    """
+    compact, timed = _compact(df, date_columns, category_columns)
+    if date_columns is not None and timed:
+        print(f"Compact mode kept {', '.join(timed)} as datetimes: they have times of day")
+    return compact
+
+def _compact(df, date_columns=None, category_columns=None):
+    """compact_frame without the message; also returns the date columns kept as datetimes"""
+    if date_columns is None:
+        date_columns = list(df.select_dtypes(include=['datetime']).columns)
+    timed = [col for col in date_columns if _has_time_of_day(df[col])]
+    if category_columns is None:
+        category_columns = [col for col in df.columns
+                            if col not in date_columns
+                            and (pd.api.types.is_object_dtype(df[col])
+                                 or pd.api.types.is_string_dtype(df[col]))]
+    
+    compact = pd.DataFrame(index=df.index)
+    for col in df.columns:
+        series = df[col]
+        if col in timed:
+            compact[col] = series
+        elif col in date_columns:
+            days = _as_day_numbers(series)
+            compact[col] = days.astype('Int32' if days.isnull().any() else 'int32')
+        elif col in category_columns:
+            compact[col] = series.astype('category')
+        elif pd.api.types.is_integer_dtype(series) and not pd.api.types.is_bool_dtype(series):
+            compact[col] = pd.to_numeric(series, downcast='integer')
+        elif pd.api.types.is_float_dtype(series):
+            compact[col] = pd.to_numeric(series, downcast='float')
+        else:
+            compact[col] = series
+    
+    compact.attrs['day_columns'] = [col for col in date_columns if col not in timed]
+    return compact, timed
+
+def _has_time_of_day(series):
+    """Whether any value of a datetime column is not at midnight"""
+    if not pd.api.types.is_datetime64_any_dtype(series):
+        return False
+    return bool((series.dropna() != series.dropna().dt.normalize()).any())
+
+@instrument
+@dispatch
+def memory_savings_report(original_df, compact_df):
+    """
+    Compare per-column memory use of a frame and its compact version.
+    
+    Parameters:
+    original_df (pd.DataFrame): Dataset before compact_frame
+    compact_df (pd.DataFrame): Dataset after compact_frame
+    
+    Returns:
+    pd.DataFrame: Bytes before, after and saved for each column
+    """
+    report = pd.DataFrame({
+        'original_bytes': original_df.memory_usage(index=False, deep=True),
+        'compact_bytes': compact_df.memory_usage(index=False, deep=True)
+    })
+    report['bytes_saved'] = report['original_bytes'] - report['compact_bytes']
+    report['percent_saved'] = (report['bytes_saved'] / report['original_bytes'] * 100).round(2)
+    return report
+
+def _as_day_numbers(series):
+    """Return a date column as days since 1970-01-01"""
+    if pd.api.types.is_datetime64_any_dtype(series):
+        return (series - DAY_EPOCH).dt.days
+    return series
+
+def _as_datetimes(series):
+    """Return a date column as datetimes, expanding day numbers if needed"""
+    if pd.api.types.is_datetime64_any_dtype(series):
+        return series
+    return DAY_EPOCH + pd.to_timedelta(series.astype('float64'), unit='D')
+
+def _days_between(start, end):
+    """Whole days from start to end for datetime or day-number columns"""
+    if pd.api.types.is_datetime64_any_dtype(start) or pd.api.types.is_datetime64_any_dtype(end):
+        # compact_frame keeps columns with times of day as datetimes
+        return (_as_datetimes(end) - _as_datetimes(start)).dt.days
+    return end - start
+
+def iter_clean_chunks(file_path, date_columns=None, chunksize=100_000,
+                      dedup_key=None, deduplicator=None):
+    """
+    Stream healthcare data as cleaned chunks instead of one full frame.
+    
+    Each chunk gets the same cleaning as load_and_clean_data. Duplicates are
+    dropped across chunk boundaries by remembering a 64-bit hash of every
+    key already yielded in sorted NumPy runs (or a Bloom filter), so the
+    first occurrence wins just like drop_duplicates.
+    
+    Parameters:
+    file_path (str): Path to the data file
+    date_columns (list): List of column names to convert to datetime
+    chunksize (int): Number of source rows read per chunk
+    dedup_key (str or list): Natural key columns (None for whole rows)
+    deduplicator (dedup.Deduplicator): Seen-set shared across files
+                                       (overrides dedup_key)
+    
+    Yields:
+    pd.DataFrame: Cleaned chunk
+    """
+    if file_path.endswith('.csv'):
+        reader = pd.read_csv(file_path, chunksize=chunksize)
+    elif file_path.endswith('.parquet'):
+        if not PYARROW_AVAILABLE:
+            raise ImportError("pyarrow is not installed: pip install pyarrow")
+        reader = _parquet_chunks(file_path, chunksize)
+    elif file_path.endswith('.xlsx'):
+        # read_excel cannot stream, so slice the sheet after loading it
+        sheet = pd.read_excel(file_path)
+        reader = (sheet.iloc[start:start + chunksize]
+                  for start in range(0, len(sheet), chunksize))
+    else:
+        raise ValueError("Unsupported file format")
+    
+    deduplicator = deduplicator or Deduplicator(dedup_key)
+    total_rows = 0
+    
+    for chunk in reader:
+        if date_columns:
+            for col in date_columns:
+                chunk[col] = pd.to_datetime(chunk[col])
+        
+        chunk = deduplicator.filter(chunk, file_path)
+        total_rows += len(chunk)
+        if len(chunk):
+            yield chunk
+    
+    print(f"Data streamed successfully: {total_rows} rows "
+          f"({deduplicator.dropped(file_path)} duplicates dropped)")
+
+def _parquet_chunks(file_path, chunksize):
+    """Parquet record batches as frames labelled by row number, like read_csv chunks"""
+    start = 0
+    for batch in pq.ParquetFile(file_path).iter_batches(batch_size=chunksize):
+        chunk = batch.to_pandas()
+        chunk.index = pd.RangeIndex(start, start + len(chunk))
+        start += len(chunk)
+        yield chunk
+
+@instrument
+@dispatch
 def calculate_readmission_rate(df, patient_id_col='patient_id', 
                               admission_date_col='admission_date',
-                              days_threshold=30):
+                              days_threshold=30, sort_memory_bytes=DEFAULT_SORT_BYTES,
+                              temp_dir=None):
     """
     Calculate 30-day readmission rates.
     
+    Admissions are sorted once by integer patient code and date, then each
+    admission is compared with the next row of the same patient using
+    adjacent differences on NumPy arrays.
+    
+    Passing chunks (for example from iter_clean_chunks) switches to an
+    external sort: sorted runs are spilled to temp files, k-way merged from
+    memory maps and scanned as they stream out, so the sort never needs
+    more than sort_memory_bytes.
+    
     Parameters:
-    df (pd.DataFrame): Patient data
+    df (pd.DataFrame or iterable): Patient data, or chunks of it
     patient_id_col (str): Patient ID column name
     admission_date_col (str): Admission date column name
     days_threshold (int): Days for readmission calculation
+    sort_memory_bytes (int): Memory budget for the external sort
+    temp_dir (str): Directory for sorted runs (default: system temp)
     
     Returns:
     float: Readmission rate as percentage
     """
-    df_sorted = df.sort_values([patient_id_col, admission_date_col])
-    df_sorted['next_admission'] = df_sorted.groupby(patient_id_col)[admission_date_col].shift(-1)
-    df_sorted['days_to_next'] = (df_sorted['next_admission'] - df_sorted[admission_date_col]).dt.days
+    if not isinstance(df, pd.DataFrame):
+        return _external_readmission_rate(df, patient_id_col, admission_date_col,
+                                          days_threshold, sort_memory_bytes, temp_dir)
+    
+    codes, ticks, valid, ticks_per_day, _ = _sorted_admission_keys(
+        df, patient_id_col, admission_date_col)
+    gap_days, has_next = _next_admission_gaps(codes, ticks, valid, ticks_per_day)
     
-    readmissions = df_sorted[df_sorted['days_to_next'] <= days_threshold]
-    readmission_rate = (len(readmissions) / len(df_sorted)) * 100
+    readmissions = np.count_nonzero(has_next & (gap_days <= days_threshold))
+    readmission_rate = (readmissions / len(df)) * 100
     
     return round(readmission_rate, 2)
 
-def create_age_groups(age_series):
+def _external_readmission_rate(chunks, patient_id_col, admission_date_col,
+                               days_threshold, sort_memory_bytes, temp_dir):
+    """Readmission rate over chunks using spilled sorted runs and a k-way merge"""
+    # Each row costs 16 bytes (key + ticks); sorting needs about three copies
+    run_rows = max(sort_memory_bytes // 48, 1024)
+    total_rows = 0
+    ticks_per_day = None
+    
+    with tempfile.TemporaryDirectory(dir=temp_dir) as run_dir:
+        runs = []
+        pending_keys, pending_ticks, pending_rows = [], [], 0
+        
+        for chunk in chunks:
+            total_rows += len(chunk)
+            # Patients are keyed by a dtype-independent 64-bit hash so codes
+            # agree across chunks, even where a blank ID made a chunk float64
+            keys = value_hashes(chunk[patient_id_col])
+            ticks, chunk_ticks_per_day, valid = _date_ticks(chunk[admission_date_col])
+            ticks_per_day = ticks_per_day or chunk_ticks_per_day
+            
+            # Missing IDs and dates never count as readmissions
+            known = valid & chunk[patient_id_col].notna().to_numpy()
+            pending_keys.append(keys[known])
+            pending_ticks.append(ticks[known])
+            pending_rows += int(np.count_nonzero(known))
+            
+            if pending_rows >= run_rows:
+                runs.append(_spill_run(run_dir, len(runs), pending_keys, pending_ticks))
+                pending_keys, pending_ticks, pending_rows = [], [], 0
+        
+        if pending_rows:
+            runs.append(_spill_run(run_dir, len(runs), pending_keys, pending_ticks))
+        
+        readmissions = 0
+        carry_key, carry_tick = None, None
+        block_rows = max(sort_memory_bytes // (48 * max(len(runs), 1)), 1024)
+        
+        for keys, ticks in _merge_runs(runs, block_rows):
+            if carry_key is not None:
+                keys = np.concatenate([[carry_key], keys])
+                ticks = np.concatenate([[carry_tick], ticks])
+            same_patient = keys[1:] == keys[:-1]
+            gap_days = np.floor_divide(ticks[1:] - ticks[:-1], ticks_per_day)
+            readmissions += int(np.count_nonzero(same_patient & (gap_days <= days_threshold)))
+            carry_key, carry_tick = keys[-1], ticks[-1]
+    
+    readmission_rate = (readmissions / total_rows) * 100
+    return round(readmission_rate, 2)
+
+def _spill_run(run_dir, run_number, key_parts, tick_parts):
+    """Sort buffered rows by patient key and date and save them as one run"""
+    keys = np.concatenate(key_parts)
+    ticks = np.concatenate(tick_parts)
+    order = np.lexsort((ticks, keys))
+    
+    key_path = os.path.join(run_dir, f'run_{run_number}_keys.npy')
+    tick_path = os.path.join(run_dir, f'run_{run_number}_ticks.npy')
+    np.save(key_path, keys[order])
+    np.save(tick_path, ticks[order])
+    return key_path, tick_path
+
+def _merge_runs(runs, block_rows):
+    """
+    K-way merge of sorted runs, yielding sorted (keys, ticks) blocks.
+    
+    Every round reads the next block of each run from its memory map. All
+    rows up to the smallest block tail are safe to emit, because no unread
+    row of any run can sort before that tail.
+    """
+    sources = [(np.load(key_path, mmap_mode='r'), np.load(tick_path, mmap_mode='r'))
+               for key_path, tick_path in runs]
+    positions = [0] * len(sources)
+    
+    while True:
+        blocks = []
+        for run, (keys, ticks) in enumerate(sources):
+            start = positions[run]
+            if start < len(keys):
+                stop = min(start + block_rows, len(keys))
+                blocks.append((run, np.asarray(keys[start:stop]), np.asarray(ticks[start:stop]),
+                               stop == len(keys)))
+        if not blocks:
+            return
+        
+        # Smallest tail among runs that still have unread rows
+        tails = [(keys[-1], ticks[-1]) for _, keys, ticks, exhausted in blocks if not exhausted]
+        bound = min(tails) if tails else None
+        
+        merged_keys, merged_ticks = [], []
+        for run, keys, ticks, _ in blocks:
+            if bound is None:
+                take = len(keys)
+            else:
+                below = (keys < bound[0]) | ((keys == bound[0]) & (ticks <= bound[1]))
+                take = int(np.count_nonzero(below))
+            merged_keys.append(keys[:take])
+            merged_ticks.append(ticks[:take])
+            positions[run] += take
+        
+        keys = np.concatenate(merged_keys)
+        ticks = np.concatenate(merged_ticks)
+        order = np.lexsort((ticks, keys))
+        yield keys[order], ticks[order]
+
+@instrument
+@dispatch
+def calculate_readmission_rates(df, thresholds=(7, 30, 90), group_by=None,
+                                patient_id_col='patient_id',
+                                admission_date_col='admission_date'):
+    """
+    Calculate readmission rates for several thresholds and slices at once.
+    
+    The data is sorted once and every admission's gap to the next admission
+    of the same patient is computed once. Each admission is counted in the
+    slice of the index admission, wherever the readmission happened, and
+    all thresholds are tallied in a single bincount.
+    
+    Parameters:
+    df (pd.DataFrame): Patient data
+    thresholds (list): Day thresholds, e.g. [7, 30, 90]
+    group_by (list): Column names and/or Series aligned with df (such as
+                     the output of create_age_groups) to slice by
+    patient_id_col (str): Patient ID column name
+    admission_date_col (str): Admission date column name
+    
+    Returns:
+    pd.DataFrame: One row per slice and threshold with admissions,
+    readmissions and readmission_rate (percentage)
+    """
+    thresholds = sorted(set(thresholds))
+    codes, ticks, valid, ticks_per_day, order = _sorted_admission_keys(
+        df, patient_id_col, admission_date_col)
+    gap_days, has_next = _next_admission_gaps(codes, ticks, valid, ticks_per_day)
+    
+    group_codes, group_labels = _group_codes(df, group_by)
+    group_codes = group_codes[order]
+    n_groups = len(group_labels)
+    in_group = group_codes >= 0
+    
+    # Bucket k holds gaps that count for thresholds[k] and every larger one
+    buckets = np.searchsorted(thresholds, gap_days, side='left')
+    counted = in_group & has_next & (buckets < len(thresholds))
+    tally = np.bincount(group_codes[counted] * len(thresholds) + buckets[counted],
+                        minlength=n_groups * len(thresholds))
+    readmissions = tally.reshape(n_groups, len(thresholds)).cumsum(axis=1)
+    admissions = np.bincount(group_codes[in_group], minlength=n_groups)
+    
+    result = group_labels.loc[group_labels.index.repeat(len(thresholds))].reset_index(drop=True)
+    result['days_threshold'] = np.tile(thresholds, n_groups)
+    result['admissions'] = admissions.repeat(len(thresholds))
+    result['readmissions'] = readmissions.ravel()
+    with np.errstate(divide='ignore', invalid='ignore'):
+        rates = result['readmissions'] / result['admissions'] * 100
+    result['readmission_rate'] = rates.round(2)
+    
+    return result
+
+@instrument
+@dispatch
+def calculate_discharge_readmissions(df, patient_id_col='patient_id',
+                                     admission_date_col='admission_date',
+                                     discharge_date_col='discharge_date',
+                                     days_threshold=30):
+    """
+    Discharge-anchored readmission metrics matching the SQL script.
+    
+    Reproduces the "30-Day Readmission Analysis" query: every pair of a stay
+    and a later admission of the same patient that starts after the stay's
+    discharge and within days_threshold calendar days of it counts as a
+    readmission. Instead of the self-join, admissions are sorted once and
+    each stay's window is located with binary searches, with prefix sums
+    giving the total days between.
+    
+    Parameters:
+    df (pd.DataFrame): Patient data
+    patient_id_col (str): Patient ID column name
+    admission_date_col (str): Admission date column name
+    discharge_date_col (str): Discharge date column name
+    days_threshold (int): Days after discharge for readmission calculation
+    
+    Returns:
+    dict: readmitted_patients, total_readmissions, avg_days_to_readmission
+    (a true mean, where T-SQL AVG over integers truncates) and
+    readmission_rate, the percentage of stays followed by a readmission
+    """
+    codes = pd.factorize(df[patient_id_col])[0].astype('int64')
+    admit_ticks, discharge_ticks, ticks_per_day, admit_valid, discharge_valid = _paired_date_ticks(
+        df[admission_date_col], df[discharge_date_col])
+    
+    admits = (codes >= 0) & admit_valid
+    stays = (codes >= 0) & discharge_valid
+    
+    # DATEDIFF(day, ...) counts calendar days, so the window runs to the
+    # last tick of the day days_threshold days after discharge
+    discharge_days = np.floor_divide(discharge_ticks[stays], ticks_per_day)
+    window_start = discharge_ticks[stays]
+    window_end = (discharge_days + days_threshold + 1) * ticks_per_day - 1
+    
+    # Rank all instants so (patient, instant) packs into one int64 key
+    levels = np.unique(np.concatenate([admit_ticks[admits], window_start, window_end]))
+    n_levels = len(levels)
+    
+    admit_keys = codes[admits] * n_levels + np.searchsorted(levels, admit_ticks[admits])
+    order = np.argsort(admit_keys)
+    admit_keys = admit_keys[order]
+    admit_days = np.floor_divide(admit_ticks[admits][order], ticks_per_day)
+    day_prefix = np.concatenate([[0], np.cumsum(admit_days)])
+    
+    stay_base = codes[stays] * n_levels
+    lo = np.searchsorted(admit_keys, stay_base + np.searchsorted(levels, window_start), side='right')
+    hi = np.searchsorted(admit_keys, stay_base + np.searchsorted(levels, window_end), side='right')
+    
+    readmission_counts = hi - lo
+    total_readmissions = int(readmission_counts.sum())
+    total_days = int((day_prefix[hi] - day_prefix[lo]).sum()
+                     - (readmission_counts * discharge_days).sum())
+    readmitted = readmission_counts > 0
+    
+    return {
+        'readmitted_patients': int(np.unique(codes[stays][readmitted]).size),
+        'total_readmissions': total_readmissions,
+        'avg_days_to_readmission': (round(total_days / total_readmissions, 2)
+                                    if total_readmissions else None),
+        'readmission_rate': (round(int(np.count_nonzero(readmitted)) / len(df) * 100, 2)
+                             if len(df) else None)
+    }
+
+@instrument_class
+class ReadmissionState:
+    """
+    Running admission-to-admission readmission counts for daily batches.
+    
+    Keeps the last admission of every patient seen so far, so a new batch
+    only has to be compared with that state instead of the full history.
+    The counts match calculate_readmission_rate over all batches combined,
+    provided no batch contains an admission older than a patient's last
+    recorded one.
+    """
+    
+    def __init__(self, days_threshold=30, patient_id_col='patient_id',
+                 admission_date_col='admission_date'):
+        self.days_threshold = days_threshold
+        self.patient_id_col = patient_id_col
+        self.admission_date_col = admission_date_col
+        self.ticks_per_day = None
+        self.last_admission = {}
+        self.admissions = 0
+        self.readmissions = 0
+    
+    @property
+    def readmission_rate(self):
+        """Readmission rate as percentage over every absorbed batch"""
+        if not self.admissions:
+            return None
+        return round(self.readmissions / self.admissions * 100, 2)
+    
+    def update(self, batch):
+        """
+        Absorb a batch of new admissions.
+        
+        Parameters:
+        batch (pd.DataFrame): New admissions, dated on or after each
+                              patient's last recorded admission
+        
+        Returns:
+        ReadmissionState: self, for chaining
+        """
+        codes, ticks, valid, ticks_per_day, order = _sorted_admission_keys(
+            batch, self.patient_id_col, self.admission_date_col)
+        if self.ticks_per_day is None:
+            self.ticks_per_day = ticks_per_day
+        elif ticks_per_day != self.ticks_per_day:
+            raise ValueError("Batch date resolution does not match the stored state")
+        
+        gap_days, has_next = _next_admission_gaps(codes, ticks, valid, ticks_per_day)
+        batch_readmissions = int(np.count_nonzero(has_next & (gap_days <= self.days_threshold)))
+        
+        # Missing dates sort last, so a patient's first row is valid if any is
+        known = (codes >= 0) & valid
+        new_patient = np.ones(len(codes), dtype=bool)
+        new_patient[1:] = codes[1:] != codes[:-1]
+        ends_patient = np.ones(len(codes), dtype=bool)
+        ends_patient[:-1] = new_patient[1:] | ~valid[1:]
+        
+        patients = batch[self.patient_id_col].to_numpy()[order]
+        first_rows = np.flatnonzero(known & new_patient)
+        last_rows = np.flatnonzero(known & ends_patient)
+        
+        for row in first_rows:
+            previous = self.last_admission.get(patients[row])
+            if previous is None:
+                continue
+            if ticks[row] < previous:
+                raise ValueError(f"Admission for patient {patients[row]} predates the stored state")
+            if (ticks[row] - previous) // ticks_per_day <= self.days_threshold:
+                batch_readmissions += 1
+        
+        self.last_admission.update(zip(patients[last_rows].tolist(), ticks[last_rows].tolist()))
+        self.admissions += len(batch)
+        self.readmissions += batch_readmissions
+        return self
+    
+    def save(self, path):
+        """Write the state to a NumPy .npz file"""
+        np.savez(path,
+                 patient_ids=np.asarray(list(self.last_admission)),
+                 last_admission=np.fromiter(self.last_admission.values(), dtype='int64',
+                                            count=len(self.last_admission)),
+                 counters=np.array([self.days_threshold, self.ticks_per_day or 0,
+                                    self.admissions, self.readmissions], dtype='int64'),
+                 columns=np.array([self.patient_id_col, self.admission_date_col]))
+    
+    @classmethod
+    def load(cls, path):
+        """Read a state written by save()"""
+        with np.load(path) as data:
+            days_threshold, ticks_per_day, admissions, readmissions = data['counters'].tolist()
+            patient_id_col, admission_date_col = data['columns'].tolist()
+            state = cls(days_threshold, patient_id_col, admission_date_col)
+            state.ticks_per_day = ticks_per_day or None
+            state.admissions = admissions
+            state.readmissions = readmissions
+            state.last_admission = dict(zip(data['patient_ids'].tolist(),
+                                            data['last_admission'].tolist()))
+        return state
+
+def _group_codes(df, group_by):
+    """
+    Integer slice code per row (-1 where a key is missing) and a frame of
+    slice labels whose row position matches the code.
+    """
+    if not group_by:
+        return np.zeros(len(df), dtype='int64'), pd.DataFrame(index=[0])
+    
+    if isinstance(group_by, (str, pd.Series)):
+        group_by = [group_by]
+    
+    keys = {}
+    for position, key in enumerate(group_by):
+        if isinstance(key, str):
+            keys[key] = df[key].array
+        else:
+            keys[key.name if key.name is not None else f'group_{position}'] = key.array
+    
+    key_frame = pd.DataFrame(keys)
+    grouped = key_frame.groupby(list(keys), sort=True, observed=True)
+    codes = grouped.ngroup().fillna(-1).to_numpy(dtype='int64')
+    labels = grouped.size().index.to_frame(index=False)
+    
+    return codes, labels
+
+def _date_ticks(series):
+    """
+    Return a date column as int64 ticks, ticks per day and a non-null mask.
+    
+    Datetimes become nanoseconds so gaps floor to whole days exactly like
+    Timedelta.days; day-number columns of compact frames are used as is.
+    """
+    valid = series.notna().to_numpy()
+    if pd.api.types.is_datetime64_any_dtype(series):
+        ticks = series.to_numpy(dtype='datetime64[ns]').view('int64')
+        ticks = np.where(valid, ticks, 0)
+        return ticks, 86_400_000_000_000, valid
+    return series.to_numpy(dtype='int64', na_value=0), 1, valid
+
+def _paired_date_ticks(first, second):
+    """
+    _date_ticks of two date columns at one resolution.
+    
+    compact_frame converts only midnight-only columns to day numbers, so an
+    admission column can be day numbers while the discharge column is still
+    datetimes; the day numbers are then scaled to nanoseconds.
+    
+    Returns:
+    tuple: First ticks, second ticks, ticks per day, first and second masks
+    """
+    first_ticks, first_per_day, first_valid = _date_ticks(first)
+    second_ticks, second_per_day, second_valid = _date_ticks(second)
+    ticks_per_day = max(first_per_day, second_per_day)
+    return (first_ticks * (ticks_per_day // first_per_day),
+            second_ticks * (ticks_per_day // second_per_day),
+            ticks_per_day, first_valid, second_valid)
+
+def _sorted_admission_keys(df, patient_id_col, date_col):
+    """
+    Sort admissions by patient and date without touching the frame.
+    
+    Returns:
+    tuple: Sorted patient codes (-1 for missing IDs), date ticks and
+    non-null date mask, ticks per day and the sort order
+    """
+    codes = pd.factorize(df[patient_id_col])[0].astype('int64')
+    ticks, ticks_per_day, valid = _date_ticks(df[date_col])
+    order = _patient_date_order(codes, ticks, valid)
+    
+    return codes[order], ticks[order], valid[order], ticks_per_day, order
+
+def _patient_date_order(codes, ticks, valid):
+    """
+    Sort order by patient code, then date, with missing dates last.
+    
+    When the patient count times the number of distinct date steps fits in
+    int64 both keys are packed into one integer, which sorts about twice as
+    fast as a two-key lexsort. Otherwise it falls back to np.lexsort.
+    """
+    if len(codes) == 0:
+        return np.arange(0)
+    
+    base = ticks[valid].min() if valid.any() else 0
+    offsets = np.where(valid, ticks - base, 0)
+    step = int(np.gcd.reduce(offsets)) or 1
+    offsets //= step
+    null_slot = int(offsets.max()) + 1
+    offsets[~valid] = null_slot
+    
+    n_slots = null_slot + 1
+    if (int(codes.max()) + 2) * n_slots < 2 ** 63:
+        return np.argsort((codes + 1) * n_slots + offsets)
+    
+    sort_ticks = np.where(valid, ticks, np.iinfo(np.int64).max)
+    return np.lexsort((sort_ticks, codes))
+
+def _next_admission_gaps(codes, ticks, valid, ticks_per_day):
+    """
+    Whole days from each sorted admission to the next one of the same patient.
+    
+    Returns:
+    tuple: Gap in days and a mask of rows that have a next admission; the
+    last admission of every patient gets has_next False
+    """
+    gap_days = np.zeros(len(codes), dtype='int64')
+    has_next = np.zeros(len(codes), dtype=bool)
+    
+    has_next[:-1] = ((codes[1:] == codes[:-1]) & (codes[:-1] >= 0)
+                     & valid[1:] & valid[:-1])
+    gap_days[:-1] = np.floor_divide(ticks[1:] - ticks[:-1], ticks_per_day)
+    
+    return gap_days, has_next
+
+@instrument
+@dispatch(aligned=True)
+def create_age_groups(age_series, scheme='python'):
     """
     Create standard age groups for healthcare analysis.
     
+    Bins are left-closed, so '<18' covers ages 0-17 and '65+' has no upper
+    limit. See binning.py for the schemes and for int8 codes without labels.
+    
     Parameters:
     age_series (pd.Series): Series containing age values
+    scheme (str or binning.BinScheme): 'python', 'sql' or 'cms' (or a custom scheme)
     
     Returns:
     pd.Series: Age groups
     """
-    return pd.cut(age_series, 
-                  bins=[0, 18, 35, 50, 65, 100], 
-                  labels=['<18', '18-34', '35-49', '50-64', '65+'])
+    if isinstance(scheme, str):
+        scheme = AGE_SCHEMES[scheme]
+    return scheme.cut(age_series)
 
-def plot_patient_flow(df, date_col='admission_date', title='Patient Flow Over Time'):
+@instrument
+@dispatch
+def plot_patient_flow(df, date_col='admission_date', title='Patient Flow Over Time',
+                      group_col=None, output=None, max_points=None, dpi=100):
     """
     Create a patient flow visualization.
     
+    Daily admissions are counted with np.bincount over integer day numbers,
+    one line per group_col value. With output set, the chart is drawn on a
+    non-interactive Agg canvas and saved instead of shown, and each line is
+    min/max decimated to the figure's pixel width.
+    
     Parameters:
     df (pd.DataFrame): Patient data
     date_col (str): Date column name
     title (str): Plot title
+    group_col (str): Column to draw as separate lines, e.g. 'department'
+    output (str or file-like): Path or buffer to save the chart to
+    max_points (int): Points kept per line (default: all when shown,
+                      figure width in pixels when saved)
+    dpi (int): Resolution of the saved chart
+    
+    Returns:
+    matplotlib.figure.Figure: The saved figure when output is given
+    """
+    days, counts, names = _daily_counts(df, date_col, group_col)
+    return _draw_patient_flow(days, counts, names, title, group_col, output, max_points, dpi)
+
+def _draw_patient_flow(days, counts, names, title, group_col, output, max_points, dpi):
+    """Draw daily admission counts (one line per group) and show or save the chart"""
+    if output is None:
+        fig = plt.figure(figsize=(12, 6))
+    else:
+        fig = Figure(figsize=(12, 6), dpi=dpi)
+        FigureCanvasAgg(fig)
+        if max_points is None:
+            max_points = int(12 * dpi)
+    ax = fig.add_subplot()
+    
+    for name, daily_admissions in zip(names, counts):
+        x, y = days, daily_admissions
+        if max_points and len(x) > max_points:
+            x, y = _minmax_decimate(x, y, max_points)
+        ax.plot(DAY_EPOCH + pd.to_timedelta(x, unit='D'), y, linewidth=2, label=name)
+    
+    ax.set_title(title)
+    ax.set_xlabel('Date')
+    ax.set_ylabel('Number of Admissions')
+    ax.tick_params(axis='x', labelrotation=45)
+    ax.grid(True, alpha=0.3)
+    if group_col is not None:
+        ax.legend()
+    fig.tight_layout()
+    
+    if output is None:
+        plt.show()
+        return None
+    
+    fig.savefig(output)
+    return fig
+
+def _daily_counts(df, date_col, group_col=None):
     """
-    plt.figure(figsize=(12, 6))
+    Admissions per day (and group) from integer day bins.
+    
+    Returns:
+    tuple: Day numbers, counts array (groups x days) and group names
+    """
+    ticks, ticks_per_day, valid = _date_ticks(df[date_col])
+    days = np.floor_divide(ticks, ticks_per_day)
+    
+    if group_col is None:
+        group_codes, names = np.zeros(len(df), dtype='int64'), [None]
+    else:
+        group_codes, names = pd.factorize(df[group_col], sort=True)
+        names = list(names)
+    
+    keep = valid & (group_codes >= 0)
+    if not keep.any():
+        return np.arange(0), np.zeros((len(names), 0), dtype='int64'), names
+    
+    first_day = days[keep].min()
+    n_days = int(days[keep].max() - first_day) + 1
+    bins = group_codes[keep] * n_days + (days[keep] - first_day)
+    counts = np.bincount(bins, minlength=len(names) * n_days).reshape(len(names), n_days)
+    
+    return np.arange(first_day, first_day + n_days), counts, names
+
+def _minmax_decimate(x, y, max_points):
+    """Keep the min and max point of each bucket so spikes survive downsampling"""
+    n_buckets = max(max_points // 2, 1)
+    bucket_size = -(-len(y) // n_buckets)
+    padded = np.full(n_buckets * bucket_size, np.nan)
+    padded[:len(y)] = y
+    padded = padded.reshape(n_buckets, bucket_size)
     
-    # Daily admissions
-    daily_admissions = df.groupby(df[date_col].dt.date).size()
+    # Trailing buckets can be all padding when the split is uneven
+    filled = ~np.isnan(padded).all(axis=1)
+    starts = np.arange(n_buckets)[filled] * bucket_size
+    lows = starts + np.nanargmin(padded[filled], axis=1)
+    highs = starts + np.nanargmax(padded[filled], axis=1)
     
-    plt.plot(daily_admissions.index, daily_admissions.values, linewidth=2)
-    plt.title(title)
-    plt.xlabel('Date')
-    plt.ylabel('Number of Admissions')
-    plt.xticks(rotation=45)
-    plt.grid(True, alpha=0.3)
-    plt.tight_layout()
-    plt.show()
+    keep = np.unique(np.concatenate([lows, highs]))
+    return x[keep], y[keep]
 
+@instrument
+@dispatch
 def generate_summary_stats(df, numeric_columns=None):
     """
     Generate summary statistics for healthcare data.
     
+    Chunked input is folded into a SummaryAccumulator, so the quartile rows
+    are sketch estimates rather than exact values.
+    
     Parameters:
-    df (pd.DataFrame): Dataset
+    df (pd.DataFrame or iterable): Dataset, or chunks from iter_clean_chunks
     numeric_columns (list): Specific numeric columns to analyze
     
     Returns:
     pd.DataFrame: Summary statistics
     """
+    if not isinstance(df, pd.DataFrame):
+        accumulator = SummaryAccumulator(numeric_columns)
+        for chunk in df:
+            accumulator.update(chunk)
+        return accumulator.result()
+    
     if numeric_columns is None:
-        numeric_columns = df.select_dtypes(include=[np.number]).columns
+        numeric_columns = _numeric_columns(df)
     
     summary = df[numeric_columns].describe()
     
@@ -124,27 +1022,312 @@ def generate_summary_stats(df, numeric_columns=None):
     
     return summary.round(2)
 
+class QuantileSketch:
+    """
+    KLL quantile sketch that absorbs batches of values and merges with others.
+    
+    Level h holds items standing for 2**h values each. A level over its
+    capacity is sorted and every other item (random offset) moves up a
+    level, so memory stays around 3 * k items however many values arrive.
+    """
+    
+    def __init__(self, k=200, seed=0):
+        self.k = k
+        self.levels = [np.empty(0)]
+        self._rng = np.random.default_rng(seed)
+    
+    def _capacity(self, level):
+        """Lower levels get geometrically smaller capacities"""
+        depth = len(self.levels) - level - 1
+        return max(int(np.ceil(self.k * (2 / 3) ** depth)), 2)
+    
+    def _compress(self):
+        level = 0
+        while level < len(self.levels):
+            items = self.levels[level]
+            if len(items) > self._capacity(level):
+                if level + 1 == len(self.levels):
+                    self.levels.append(np.empty(0))
+                items = np.sort(items)
+                # An odd item out stays behind at this level
+                keep = len(items) % 2
+                promoted = items[keep:][self._rng.integers(2)::2]
+                self.levels[level] = items[:keep]
+                self.levels[level + 1] = np.concatenate([self.levels[level + 1], promoted])
+            level += 1
+    
+    def update(self, values):
+        """Add an array of non-missing values"""
+        self.levels[0] = np.concatenate([self.levels[0], np.asarray(values, dtype='float64')])
+        self._compress()
+    
+    def merge(self, other):
+        """Fold another sketch into this one"""
+        while len(self.levels) < len(other.levels):
+            self.levels.append(np.empty(0))
+        for level, items in enumerate(other.levels):
+            self.levels[level] = np.concatenate([self.levels[level], items])
+        self._compress()
+    
+    def quantiles(self, probabilities):
+        """Estimated quantiles with the same linear interpolation as describe()"""
+        items = np.concatenate(self.levels)
+        if not len(items):
+            return np.full(len(probabilities), np.nan)
+        weights = np.concatenate([np.full(len(level_items), 2.0 ** level)
+                                  for level, level_items in enumerate(self.levels)])
+        order = np.argsort(items)
+        items, weights = items[order], weights[order]
+        
+        # Centre rank of each item; exact data gives ranks 0..n-1
+        ranks = np.cumsum(weights) - weights / 2 - 0.5
+        targets = np.asarray(probabilities) * (weights.sum() - 1)
+        return np.interp(targets, ranks, items)
+
+@instrument_class
+class SummaryAccumulator:
+    """
+    Mergeable version of generate_summary_stats.
+    
+    Count, mean and standard deviation come from Welford moments merged per
+    batch, min and max are tracked exactly, and the quartiles come from a
+    QuantileSketch per column. Accumulators from different chunks, worker
+    processes or days can be merged, and save()/load() keep one on disk.
+    """
+    
+    def __init__(self, numeric_columns=None, sketch_size=200):
+        self.numeric_columns = list(numeric_columns) if numeric_columns is not None else None
+        self.sketch_size = sketch_size
+        self.rows = 0
+        self.moments = {}
+        self.sketches = {}
+    
+    def _start(self, columns):
+        self.numeric_columns = list(columns)
+        for col in self.numeric_columns:
+            self.moments.setdefault(col, (0, 0.0, 0.0, np.nan, np.nan))
+            self.sketches.setdefault(col, QuantileSketch(self.sketch_size))
+    
+    def update(self, df):
+        """
+        Add a chunk of rows.
+        
+        Returns:
+        SummaryAccumulator: self, for chaining
+        """
+        self._start(self.numeric_columns if self.numeric_columns is not None
+                    else _numeric_columns(df))
+        self.rows += len(df)
+        
+        for col in self.numeric_columns:
+            values = df[col].to_numpy(dtype='float64', na_value=np.nan)
+            values = values[~np.isnan(values)]
+            self.moments[col] = _merge_moments(self.moments[col], _moments(values))
+            self.sketches[col].update(values)
+        return self
+    
+    def merge(self, other):
+        """
+        Fold another accumulator over the same columns into this one.
+        
+        Returns:
+        SummaryAccumulator: self, for chaining
+        """
+        self._start(self.numeric_columns if self.numeric_columns is not None
+                    else other.numeric_columns or [])
+        self.rows += other.rows
+        for col in self.numeric_columns:
+            if col in other.moments:
+                self.moments[col] = _merge_moments(self.moments[col], other.moments[col])
+                self.sketches[col].merge(other.sketches[col])
+        return self
+    
+    def result(self):
+        """
+        Summary table in the same shape as generate_summary_stats.
+        
+        Returns:
+        pd.DataFrame: Summary statistics
+        """
+        stats = {col: (self.moments[col], self.sketches[col].quantiles([0.25, 0.5, 0.75]))
+                 for col in self.numeric_columns or []}
+        return _summary_table(stats, self.rows)
+    
+    def save(self, path):
+        """Write the accumulator to a pickle file"""
+        with open(path, 'wb') as f:
+            pickle.dump(self, f)
+    
+    @classmethod
+    def load(cls, path):
+        """Read an accumulator written by save()"""
+        with open(path, 'rb') as f:
+            return pickle.load(f)
+
+def _moments(values):
+    """Count, mean, sum of squared deviations, min and max of non-missing values"""
+    if not len(values):
+        return (0, 0.0, 0.0, np.nan, np.nan)
+    mean = values.mean()
+    return (len(values), float(mean), float(((values - mean) ** 2).sum()),
+            float(values.min()), float(values.max()))
+
+def _merge_moments(left, right):
+    """Combine two moment tuples exactly (Chan et al. parallel Welford)"""
+    count_a, mean_a, m2_a, min_a, max_a = left
+    count_b, mean_b, m2_b, min_b, max_b = right
+    if count_a == 0 or count_b == 0:
+        return left if count_b == 0 else right
+    
+    count = count_a + count_b
+    delta = mean_b - mean_a
+    return (count,
+            mean_a + delta * count_b / count,
+            m2_a + m2_b + delta ** 2 * count_a * count_b / count,
+            min(min_a, min_b),
+            max(max_a, max_b))
+
+def _summary_table(stats, n_rows):
+    """
+    Build the generate_summary_stats table from merged moments.
+    
+    Parameters:
+    stats (dict): Column name -> (moments tuple, [25%, 50%, 75%])
+    n_rows (int): Total rows seen, for the missing counts
+    """
+    summary = {}
+    for col, ((count, mean, m2, minimum, maximum), quartiles) in stats.items():
+        missing = n_rows - count
+        summary[col] = [count, mean if count else np.nan,
+                        np.sqrt(m2 / (count - 1)) if count > 1 else np.nan,
+                        minimum, *quartiles, maximum,
+                        missing, missing / n_rows * 100 if n_rows else np.nan]
+    
+    index = ['count', 'mean', 'std', 'min', '25%', '50%', '75%', 'max',
+             'missing_count', 'missing_percentage']
+    return pd.DataFrame(summary, index=index, columns=list(stats)).round(2)
+
+def _numeric_columns(df):
+    """Numeric columns, leaving out day-number date columns of compact frames"""
+    day_columns = df.attrs.get('day_columns', [])
+    return [col for col in df.select_dtypes(include=[np.number]).columns
+            if col not in day_columns]
+
+@instrument
+@dispatch(aligned=True)
 def calculate_length_of_stay(df, admit_col='admission_date', discharge_col='discharge_date'):
     """
     Calculate length of stay in days.
     
     Parameters:
-    df (pd.DataFrame): Patient data
+    df (pd.DataFrame or iterable): Patient data, or chunks from iter_clean_chunks
     admit_col (str): Admission date column
     discharge_col (str): Discharge date column
     
     Returns:
     pd.Series: Length of stay in days
     """
-    return (df[discharge_col] - df[admit_col]).dt.days
+    if not isinstance(df, pd.DataFrame):
+        parts = [_days_between(chunk[admit_col], chunk[discharge_col]) for chunk in df]
+        if not parts:
+            return pd.Series(dtype='int64')
+        return pd.concat(parts, ignore_index=True)
+    
+    return _days_between(df[admit_col], df[discharge_col])
+
+@instrument
+@dispatch
+def calculate_daily_census(df, admit_col='admission_date', discharge_col='discharge_date',
+                           department_col=None, as_of=None):
+    """
+    Calculate the midnight census for every day, optionally per department.
+    
+    A stay is counted at each midnight between its admission day and its
+    discharge day, so same-day stays never appear. Open stays (missing
+    discharge) run to as_of, like COALESCE(discharge_date, GETDATE()) in
+    the SQL script. Each stay adds +1 on its admission day and -1 on its
+    discharge day in a difference array, and a prefix sum turns that into
+    the census, so the cost is linear in stays plus days.
+    
+    Parameters:
+    df (pd.DataFrame): Patient data
+    admit_col (str): Admission date column
+    discharge_col (str): Discharge date column
+    department_col (str): Column to split the census by (None for hospital-wide)
+    as_of (str or datetime): End date for open stays (default: today)
+    
+    Returns:
+    pd.DataFrame: Census per date, one column per department (or 'census')
+    """
+    admit_ticks, discharge_ticks, ticks_per_day, admit_valid, discharge_valid = _paired_date_ticks(
+        df[admit_col], df[discharge_col])
+    admit_days = np.floor_divide(admit_ticks, ticks_per_day)
+    discharge_days = np.floor_divide(discharge_ticks, ticks_per_day)
+    
+    as_of_day = (pd.Timestamp(as_of) if as_of is not None
+                 else pd.Timestamp.today()).normalize()
+    discharge_days = np.where(discharge_valid, discharge_days, (as_of_day - DAY_EPOCH).days)
+    
+    if department_col is None:
+        group_codes, group_names = np.zeros(len(df), dtype='int64'), ['census']
+    else:
+        group_codes, group_names = pd.factorize(df[department_col], sort=True)
+        group_names = list(group_names)
+    
+    stays = admit_valid & (discharge_days > admit_days) & (group_codes >= 0)
+    if not stays.any():
+        return pd.DataFrame(columns=group_names, index=pd.DatetimeIndex([], name='date'))
+    
+    first_day = admit_days[stays].min()
+    n_days = int(discharge_days[stays].max() - first_day)
+    n_groups = len(group_names)
+    
+    # Flattened (group, day) difference array with one spare day per group
+    starts = group_codes[stays] * (n_days + 1) + (admit_days[stays] - first_day)
+    ends = group_codes[stays] * (n_days + 1) + (discharge_days[stays] - first_day)
+    deltas = (np.bincount(starts, minlength=n_groups * (n_days + 1))
+              - np.bincount(ends, minlength=n_groups * (n_days + 1)))
+    census = np.cumsum(deltas.reshape(n_groups, n_days + 1), axis=1)[:, :n_days]
+    
+    dates = pd.DatetimeIndex(DAY_EPOCH + pd.to_timedelta(np.arange(first_day, first_day + n_days), unit='D'),
+                             name='date')
+    return pd.DataFrame(census.T, index=dates, columns=group_names)
+
+@instrument
+@dispatch
+def calculate_bed_occupancy(census, bed_capacity):
+    """
+    Convert a daily census into bed occupancy percentages.
+    
+    Parameters:
+    census (pd.DataFrame): Output of calculate_daily_census
+    bed_capacity (int or dict): Beds overall, or beds per department column
+    
+    Returns:
+    pd.DataFrame: Occupancy as percentage of beds
+    """
+    if isinstance(bed_capacity, dict):
+        bed_capacity = pd.Series(bed_capacity).reindex(census.columns)
+    return (census / bed_capacity * 100).round(2)
 
 # Example usage and testing
 if __name__ == "__main__":
     print("Healthcare Analytics Utilities")
     print("Available functions:")
     print("- load_and_clean_data()")
+    print("- iter_clean_chunks()")
+    print("- Deduplicator (dedup.py)")
+    print("- compact_frame()")
+    print("- memory_savings_report()")
     print("- calculate_readmission_rate()")
+    print("- calculate_readmission_rates()")
+    print("- calculate_discharge_readmissions()")
+    print("- ReadmissionState")
     print("- create_age_groups()")
     print("- plot_patient_flow()")
     print("- generate_summary_stats()")
+    print("- SummaryAccumulator")
     print("- calculate_length_of_stay()")
+    print("- calculate_daily_census()")
+    print("- calculate_bed_occupancy()")
+    print("- set_backend() / get_backend()")
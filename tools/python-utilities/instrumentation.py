@@ -0,0 +1,272 @@
+"""
+Instrumentation
+Opt-in tracing for the python-utilities scripts: nested spans with wall time,
+CPU time, rows in/out and memory delta, exported as Chrome-trace JSON or a
+flat summary table
+"""
+
+import atexit
+import functools
+import inspect
+import json
+import os
+import threading
+import time
+import pandas as pd
+
+# Set to 1 to trace a whole run and write the trace on exit, or to a .json
+# path to choose where it goes
+TRACE_ENV_VAR = 'PYTHON_UTILITIES_TRACE'
+DEFAULT_TRACE_PATH = 'python_utilities_trace.json'
+
+try:
+    _PAGE_SIZE = os.sysconf('SC_PAGE_SIZE')
+except (AttributeError, ValueError, OSError):
+    _PAGE_SIZE = None
+
+class _Tracer:
+    """Global trace state: the on/off flag, finished spans and each thread's open spans"""
+
+    def __init__(self):
+        self.enabled = False
+        self.events = []
+        self.local = threading.local()
+        self.origin_ns = time.perf_counter_ns()
+
+    def stack(self):
+        stack = getattr(self.local, 'stack', None)
+        if stack is None:
+            stack = self.local.stack = []
+        return stack
+
+_tracer = _Tracer()
+
+def enable():
+    """Start recording spans"""
+    _tracer.enabled = True
+
+def disable():
+    """Stop recording spans; instrumented code then runs with one flag check of overhead"""
+    _tracer.enabled = False
+
+def is_enabled():
+    return _tracer.enabled
+
+def reset():
+    """Forget all recorded spans"""
+    _tracer.events = []
+    _tracer.origin_ns = time.perf_counter_ns()
+
+def _rss_bytes():
+    """Resident set size from /proc/self/statm, or None off Linux"""
+    if _PAGE_SIZE is None:
+        return None
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * _PAGE_SIZE
+    except (OSError, IndexError, ValueError):
+        return None
+
+def _row_count(value):
+    """Rows of a DataFrame, Series or array; None for anything else"""
+    shape = getattr(value, 'shape', None)
+    if isinstance(shape, tuple) and shape:
+        return int(shape[0])
+    return None
+
+class span:
+    """
+    Record one timed section; spans opened inside it become its children.
+
+    Usage:
+        with span('load extract', rows_in=len(df)) as current:
+            result = ...
+            current.rows_out = len(result)
+
+    Does nothing while tracing is disabled.
+    """
+
+    def __init__(self, name, category='python-utilities', rows_in=None):
+        self.name = name
+        self.category = category
+        self.rows_in = rows_in
+        self.rows_out = None
+        self._active = False
+
+    def __enter__(self):
+        if not _tracer.enabled:
+            return self
+        self._active = True
+        _tracer.stack().append(self)
+        self._child_ns = 0
+        self._rss_start = _rss_bytes()
+        self._cpu_start = time.process_time_ns()
+        self._start = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if not self._active:
+            return False
+        end = time.perf_counter_ns()
+        cpu_ns = time.process_time_ns() - self._cpu_start
+        rss_end = _rss_bytes()
+
+        stack = _tracer.stack()
+        stack.pop()
+        duration = end - self._start
+        if stack:
+            stack[-1]._child_ns += duration
+
+        args = {
+            'cpu_ms': round(cpu_ns / 1e6, 3),
+            'self_ms': round((duration - self._child_ns) / 1e6, 3),
+            'rows_in': self.rows_in,
+            'rows_out': self.rows_out,
+            'memory_delta_mb': (round((rss_end - self._rss_start) / 1024 ** 2, 3)
+                                if rss_end is not None and self._rss_start is not None else None)
+        }
+        if exc_type is not None:
+            args['error'] = exc_type.__name__
+
+        _tracer.events.append({
+            'name': self.name,
+            'cat': self.category,
+            'ph': 'X',
+            'ts': (self._start - _tracer.origin_ns) / 1000,
+            'dur': duration / 1000,
+            'pid': os.getpid(),
+            'tid': threading.get_ident(),
+            'args': args
+        })
+        self._active = False
+        return False
+
+def instrument(func=None, name=None, category=None):
+    """
+    Decorator recording a span for every call of func.
+
+    Rows in is the length of the first DataFrame, Series or array argument;
+    rows out the length of the result when it is one. Can be used bare
+    (@instrument) or with arguments (@instrument(name='...')).
+
+    Parameters:
+    func (callable): Function to wrap
+    name (str): Span name (default: the function's qualified name)
+    category (str): Span category (default: the function's module)
+
+    Returns:
+    callable: Wrapped function
+    """
+    if func is None:
+        return lambda f: instrument(f, name=name, category=category)
+
+    label = name or func.__qualname__
+    category = category or func.__module__
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        if not _tracer.enabled:
+            return func(*args, **kwargs)
+
+        rows_in = None
+        for value in args:
+            rows_in = _row_count(value)
+            if rows_in is not None:
+                break
+
+        with span(label, category, rows_in) as current:
+            result = func(*args, **kwargs)
+            current.rows_out = _row_count(result)
+            return result
+
+    return wrapper
+
+def instrument_class(cls):
+    """
+    Class decorator applying instrument to every public method.
+
+    Generator methods are left alone: a span around them would only time
+    creating the generator.
+    """
+    for attr_name, attr in list(vars(cls).items()):
+        if attr_name.startswith('_'):
+            continue
+        label = f'{cls.__name__}.{attr_name}'
+        if isinstance(attr, (staticmethod, classmethod)):
+            if not inspect.isgeneratorfunction(attr.__func__):
+                setattr(cls, attr_name, type(attr)(instrument(attr.__func__, name=label)))
+        elif inspect.isfunction(attr) and not inspect.isgeneratorfunction(attr):
+            setattr(cls, attr_name, instrument(attr, name=label))
+    return cls
+
+def summary():
+    """
+    Flat table of the recorded spans, one row per span name.
+
+    wall_ms includes time spent in child spans, self_ms does not; the table
+    is sorted by self_ms so the stage doing the work comes first.
+
+    Returns:
+    pd.DataFrame: calls, wall_ms, self_ms, cpu_ms, rows_in, rows_out and
+                  memory_delta_mb per span name
+    """
+    columns = ['calls', 'wall_ms', 'self_ms', 'cpu_ms', 'rows_in', 'rows_out', 'memory_delta_mb']
+    if not _tracer.events:
+        return pd.DataFrame(columns=columns)
+
+    spans = pd.DataFrame([{'name': event['name'], 'wall_ms': event['dur'] / 1000, **event['args']}
+                          for event in _tracer.events])
+    for column in ('rows_in', 'rows_out', 'memory_delta_mb'):
+        spans[column] = pd.to_numeric(spans[column])
+
+    table = spans.groupby('name').agg(
+        calls=('wall_ms', 'size'),
+        wall_ms=('wall_ms', 'sum'),
+        self_ms=('self_ms', 'sum'),
+        cpu_ms=('cpu_ms', 'sum'),
+        rows_in=('rows_in', lambda values: values.sum(min_count=1)),
+        rows_out=('rows_out', lambda values: values.sum(min_count=1)),
+        memory_delta_mb=('memory_delta_mb', lambda values: values.sum(min_count=1))
+    )
+    return table[columns].sort_values('self_ms', ascending=False).round(3)
+
+def write_chrome_trace(path=DEFAULT_TRACE_PATH):
+    """
+    Save the recorded spans in Chrome trace format.
+
+    Open the file in chrome://tracing or https://ui.perfetto.dev.
+
+    Parameters:
+    path (str): Output .json file
+
+    Returns:
+    str: The path written
+    """
+    events = list(_tracer.events)
+    events.append({'name': 'process_name', 'ph': 'M', 'pid': os.getpid(),
+                   'args': {'name': 'python-utilities'}})
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump({'traceEvents': events, 'displayTimeUnit': 'ms'}, f)
+    return path
+
+def _write_on_exit(path):
+    if not _tracer.events:
+        return
+    write_chrome_trace(path)
+    print(f"\n🔎 Trace written to {path}")
+    print(summary().to_string())
+
+_env_setting = os.environ.get(TRACE_ENV_VAR, '').strip()
+if _env_setting and _env_setting.lower() not in ('0', 'false', 'no', 'off'):
+    enable()
+    atexit.register(_write_on_exit,
+                    _env_setting if _env_setting.endswith('.json') else DEFAULT_TRACE_PATH)
+
+if __name__ == "__main__":
+    print("Instrumentation")
+    print(f"Set {TRACE_ENV_VAR}=1 (or a .json path) to trace a script run, or use the API:")
+    print("    import instrumentation")
+    print("    instrumentation.enable()")
+    print("    ...")
+    print("    instrumentation.write_chrome_trace('trace.json')")
+    print("    print(instrumentation.summary())")
@@ -0,0 +1,335 @@
+"""
+Local SQL Runner
+Runs the T-SQL queries in tools/sql-scripts against local Parquet/CSV extracts
+by translating them to DuckDB or SQLite
+"""
+
+import os
+import re
+import sqlite3
+import sys
+import time
+import pandas as pd
+
+# Install duckdb for the default engine: pip install duckdb
+try:
+    import duckdb
+    DUCKDB_AVAILABLE = True
+except ImportError:
+    DUCKDB_AVAILABLE = False
+
+DEFAULT_SCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                              '..', 'sql-scripts', 'healthcare_analytics_queries.sql')
+
+SCHEMA_TABLES = ['patients', 'admissions', 'diagnoses', 'departments',
+                 'service_lines', 'billing', 'patient_satisfaction']
+
+def split_script(sql_text):
+    """
+    Split a SQL script into named queries.
+
+    Each query's name is the first line of the comment block directly above
+    it, e.g. "-- 30-Day Readmission Analysis".
+
+    Returns:
+    dict: Query name -> SQL text (without the trailing semicolon)
+    """
+    queries = {}
+    for statement in _split_statements(sql_text):
+        lines = statement.strip('\n').split('\n')
+        comment_block = []
+        body_start = 0
+        for position, line in enumerate(lines):
+            stripped = line.strip()
+            if stripped.startswith('--'):
+                comment_block.append(stripped.lstrip('-').strip())
+            elif not stripped:
+                comment_block = []
+            else:
+                body_start = position
+                break
+        else:
+            continue
+
+        name = comment_block[0] if comment_block else f'Query {len(queries) + 1}'
+        queries[name] = '\n'.join(lines[body_start:]).strip()
+    return queries
+
+def _split_statements(sql_text):
+    """Split on semicolons outside quotes and -- comments"""
+    statements, current = [], []
+    in_quote = in_comment = False
+    for index, char in enumerate(sql_text):
+        if in_comment:
+            in_comment = char != '\n'
+        elif char == "'":
+            in_quote = not in_quote
+        elif not in_quote and sql_text.startswith('--', index):
+            in_comment = True
+        elif char == ';' and not in_quote:
+            statements.append(''.join(current))
+            current = []
+            continue
+        current.append(char)
+    statements.append(''.join(current))
+    return statements
+
+def _find_calls(sql, function_name):
+    """Yield (start, end, args) for each top-level call of function_name"""
+    pattern = re.compile(rf'\b{function_name}\s*\(', re.IGNORECASE)
+    position = 0
+    while True:
+        match = pattern.search(sql, position)
+        if not match:
+            return
+        end = _matching_paren(sql, match.end() - 1)
+        yield match.start(), end + 1, _split_args(sql[match.end():end])
+        position = end + 1
+
+def _matching_paren(sql, open_index):
+    """Index of the parenthesis closing the one at open_index"""
+    depth = 0
+    for index in range(open_index, len(sql)):
+        if sql[index] == '(':
+            depth += 1
+        elif sql[index] == ')':
+            depth -= 1
+            if depth == 0:
+                return index
+    raise ValueError(f"Unbalanced parentheses near: {sql[open_index:open_index + 40]}")
+
+def _split_args(text):
+    """Split a call's argument text on top-level commas"""
+    args, depth, current = [], 0, ''
+    for char in text:
+        if char == ',' and depth == 0:
+            args.append(current.strip())
+            current = ''
+            continue
+        depth += (char == '(') - (char == ')')
+        current += char
+    if current.strip():
+        args.append(current.strip())
+    return args
+
+def _rewrite_calls(sql, function_name, handler):
+    """Replace every call of function_name (innermost first) with handler(args)"""
+    pieces, last = [], 0
+    for start, end, args in list(_find_calls(sql, function_name)):
+        args = [_rewrite_calls(arg, function_name, handler) for arg in args]
+        pieces.append(sql[last:start])
+        pieces.append(handler(args))
+        last = end
+    pieces.append(sql[last:])
+    return ''.join(pieces)
+
+def _rewrite_percentile(sql):
+    """
+    PERCENTILE_CONT(p) WITHIN GROUP (ORDER BY expr) -> quantile_cont(expr, p)
+
+    quantile_cont is built into DuckDB and registered on SQLite connections
+    as _QuantileCont.
+    """
+    pattern = re.compile(r'\bPERCENTILE_CONT\s*\(', re.IGNORECASE)
+    while True:
+        match = pattern.search(sql)
+        if not match:
+            return sql
+        close = _matching_paren(sql, match.end() - 1)
+        fraction = sql[match.end():close].strip()
+        within = re.compile(r'\s*WITHIN\s+GROUP\s*\(\s*ORDER\s+BY\s+', re.IGNORECASE).match(sql, close + 1)
+        if within is None:
+            raise ValueError("PERCENTILE_CONT needs WITHIN GROUP (ORDER BY ...)")
+        group_close = _matching_paren(sql, sql.index('(', close + 1))
+        expression = sql[within.end():group_close].strip()
+        sql = f"{sql[:match.start()]}quantile_cont({expression}, {fraction}){sql[group_close + 1:]}"
+
+UNIT_NAMES = {'day': 'day', 'dd': 'day', 'd': 'day',
+              'month': 'month', 'mm': 'month', 'm': 'month',
+              'year': 'year', 'yy': 'year', 'yyyy': 'year'}
+
+def translate_tsql(sql, dialect='duckdb', as_of=None):
+    """
+    Translate the T-SQL used in healthcare_analytics_queries.sql.
+
+    Handles GETDATE(), DATEDIFF, DATEADD, CAST(... AS DATE), YEAR/MONTH and
+    PERCENTILE_CONT ... WITHIN GROUP. AVG over integers returns a decimal
+    in both engines, where T-SQL truncates it.
+
+    Parameters:
+    sql (str): T-SQL query
+    dialect (str): 'duckdb' or 'sqlite'
+    as_of (str): Fixed timestamp to use for GETDATE(), so old extracts keep
+                 their "last 12 months" windows
+
+    Returns:
+    str: Translated query
+    """
+    if dialect not in ('duckdb', 'sqlite'):
+        raise ValueError("Unsupported dialect")
+
+    if as_of is not None:
+        stamp = pd.Timestamp(as_of).strftime('%Y-%m-%d %H:%M:%S')
+        now = f"TIMESTAMP '{stamp}'" if dialect == 'duckdb' else f"'{stamp}'"
+    else:
+        now = 'current_timestamp' if dialect == 'duckdb' else "datetime('now')"
+    sql = _rewrite_calls(sql, 'GETDATE', lambda args: now)
+
+    def unit_of(arg):
+        unit = UNIT_NAMES.get(arg.lower())
+        if unit is None:
+            raise ValueError(f"Unsupported date part: {arg}")
+        return unit
+
+    if dialect == 'duckdb':
+        sql = _rewrite_calls(sql, 'DATEADD', lambda args:
+                             f"({args[2]} + INTERVAL ({args[1]}) {unit_of(args[0]).upper()})")
+        sql = _rewrite_calls(sql, 'DATEDIFF', lambda args:
+                             f"date_diff('{unit_of(args[0])}', {args[1]}, {args[2]})")
+    else:
+        sql = _rewrite_calls(sql, 'DATEADD', lambda args:
+                             f"datetime({args[2]}, printf('%+d {unit_of(args[0])}s', {args[1]}))")
+        sql = _rewrite_calls(sql, 'DATEDIFF', lambda args: _sqlite_datediff(unit_of(args[0]), args[1], args[2]))
+        sql = _rewrite_calls(sql, 'CAST', _sqlite_cast)
+        sql = _rewrite_calls(sql, 'YEAR', lambda args: f"CAST(strftime('%Y', {args[0]}) AS INTEGER)")
+        sql = _rewrite_calls(sql, 'MONTH', lambda args: f"CAST(strftime('%m', {args[0]}) AS INTEGER)")
+
+    return _rewrite_percentile(sql)
+
+def _sqlite_cast(args):
+    """SQLite has no DATE type, so CAST(x AS DATE) becomes date(x)"""
+    match = re.fullmatch(r'(.*)\s+AS\s+DATE', args[0], re.IGNORECASE | re.DOTALL)
+    if match:
+        return f"date({match.group(1).strip()})"
+    return f"CAST({args[0]})"
+
+def _sqlite_datediff(unit, start, end):
+    """DATEDIFF counts calendar boundaries, so compare dates, not instants"""
+    if unit == 'day':
+        return f"CAST(julianday(date({end})) - julianday(date({start})) AS INTEGER)"
+    years = f"(CAST(strftime('%Y', {end}) AS INTEGER) - CAST(strftime('%Y', {start}) AS INTEGER))"
+    if unit == 'year':
+        return years
+    return (f"({years} * 12 + CAST(strftime('%m', {end}) AS INTEGER)"
+            f" - CAST(strftime('%m', {start}) AS INTEGER))")
+
+class _QuantileCont:
+    """SQLite aggregate for PERCENTILE_CONT: linear interpolation, NULLs ignored"""
+
+    def __init__(self):
+        self.values = []
+        self.fraction = None
+
+    def step(self, value, fraction):
+        self.fraction = fraction
+        if value is not None:
+            self.values.append(value)
+
+    def finalize(self):
+        if not self.values:
+            return None
+        values = sorted(self.values)
+        position = self.fraction * (len(values) - 1)
+        lower = int(position)
+        upper = min(lower + 1, len(values) - 1)
+        return values[lower] + (values[upper] - values[lower]) * (position - lower)
+
+class LocalSQLRunner:
+    """
+    Execute the warehouse SQL script against local admission extracts.
+
+    DuckDB reads the Parquet/CSV files in place through views. SQLite gets
+    an in-memory copy of each table, so use it only for small extracts.
+    """
+
+    def __init__(self, tables, dialect='duckdb', as_of=None):
+        """
+        Parameters:
+        tables (dict): Table name -> path of a .parquet or .csv file
+        dialect (str): 'duckdb' or 'sqlite'
+        as_of (str): Timestamp to substitute for GETDATE()
+        """
+        if dialect == 'duckdb' and not DUCKDB_AVAILABLE:
+            raise ImportError("duckdb is not installed: pip install duckdb")
+        self.tables = tables
+        self.dialect = dialect
+        self.as_of = as_of
+        self.connection = self._connect()
+
+    @classmethod
+    def from_directory(cls, data_dir, **kwargs):
+        """Use every <table>.parquet or <table>.csv of the SQL schema found in data_dir"""
+        tables = {}
+        for table in SCHEMA_TABLES:
+            for extension in ('.parquet', '.csv'):
+                path = os.path.join(data_dir, table + extension)
+                if os.path.exists(path):
+                    tables[table] = path
+                    break
+        return cls(tables, **kwargs)
+
+    def _connect(self):
+        if self.dialect == 'duckdb':
+            connection = duckdb.connect()
+            for table, path in self.tables.items():
+                reader = 'read_parquet' if path.endswith('.parquet') else 'read_csv_auto'
+                escaped = path.replace("'", "''")
+                connection.execute(f"CREATE VIEW {table} AS SELECT * FROM {reader}('{escaped}')")
+            return connection
+
+        connection = sqlite3.connect(':memory:')
+        connection.create_aggregate('quantile_cont', 2, _QuantileCont)
+        for table, path in self.tables.items():
+            frame = pd.read_parquet(path) if path.endswith('.parquet') else pd.read_csv(path)
+            frame.to_sql(table, connection, index=False)
+        return connection
+
+    def query(self, sql):
+        """Translate and run one T-SQL query, returning a DataFrame"""
+        translated = translate_tsql(sql, self.dialect, self.as_of)
+        if self.dialect == 'duckdb':
+            return self.connection.execute(translated).df()
+        return pd.read_sql_query(translated, self.connection)
+
+    def run_script(self, script_path=DEFAULT_SCRIPT, names=None):
+        """
+        Run the named queries of a script and time each one.
+
+        Parameters:
+        script_path (str): SQL script to split into queries
+        names (list): Query names to run (default: all)
+
+        Returns:
+        tuple: Dict of query name -> result DataFrame, and a timing table
+        """
+        with open(script_path, 'r', encoding='utf-8') as f:
+            queries = split_script(f.read())
+
+        results, timings = {}, []
+        for name, sql in queries.items():
+            if names is not None and name not in names:
+                continue
+            start = time.perf_counter()
+            try:
+                results[name] = self.query(sql)
+                status, rows = 'ok', len(results[name])
+            except Exception as e:
+                status, rows = f"error: {e}", None
+            timings.append({'query': name, 'rows': rows,
+                            'seconds': round(time.perf_counter() - start, 4),
+                            'status': status})
+
+        return results, pd.DataFrame(timings)
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        print("Usage: python local_sql_runner.py <data_dir> [duckdb|sqlite] [as_of]")
+        sys.exit(1)
+
+    runner = LocalSQLRunner.from_directory(
+        sys.argv[1],
+        dialect=sys.argv[2] if len(sys.argv) > 2 else 'duckdb',
+        as_of=sys.argv[3] if len(sys.argv) > 3 else None)
+    print(f"🦆 Running {os.path.basename(DEFAULT_SCRIPT)} with {runner.dialect}")
+    results, timings = runner.run_script()
+    print(timings.to_string(index=False))
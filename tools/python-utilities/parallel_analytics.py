@@ -0,0 +1,216 @@
+"""
+Parallel Healthcare Analytics
+Runs healthcare_analytics metrics on patient-hash partitions in a process pool
+"""
+
+import os
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+import numpy as np
+import pandas as pd
+
+import healthcare_analytics as ha
+
+class SharedArrays:
+    """NumPy arrays copied into named shared-memory blocks for worker processes"""
+
+    def __init__(self, arrays):
+        self.blocks = []
+        self.specs = {}
+
+        for name, array in arrays.items():
+            array = np.ascontiguousarray(array)
+            block = shared_memory.SharedMemory(create=True, size=max(array.nbytes, 1))
+            np.ndarray(array.shape, array.dtype, buffer=block.buf)[...] = array
+            self.blocks.append(block)
+            self.specs[name] = (block.name, array.shape, array.dtype.str)
+
+    def close(self):
+        """Release and remove every block"""
+        for block in self.blocks:
+            block.close()
+            block.unlink()
+        self.blocks = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+def _run_partition(task, specs, start, stop, *args):
+    """Attach to the shared arrays, run task on rows start:stop and detach"""
+    blocks = []
+    arrays = {}
+    try:
+        for name, (block_name, shape, dtype) in specs.items():
+            # Workers share the parent's resource tracker, so attaching here
+            # does not cause a second unlink
+            block = shared_memory.SharedMemory(name=block_name)
+            blocks.append(block)
+            arrays[name] = np.ndarray(shape, dtype, buffer=block.buf)[start:stop]
+        return task(arrays, *args)
+    finally:
+        # Views must go before the blocks can close
+        arrays.clear()
+        for block in blocks:
+            block.close()
+
+def _readmission_task(arrays, days_threshold, ticks_per_day):
+    """Readmissions among the patients of one partition"""
+    codes, ticks, valid = arrays['codes'], arrays['ticks'], arrays['valid']
+    order = ha._patient_date_order(codes, ticks, valid)
+    gap_days, has_next = ha._next_admission_gaps(codes[order], ticks[order],
+                                                 valid[order], ticks_per_day)
+    return int(np.count_nonzero(has_next & (gap_days <= days_threshold)))
+
+def _moments_task(arrays, n_columns, sketch_size):
+    """
+    Count, mean, sum of squared deviations, min and max for each column,
+    and a QuantileSketch of it when sketch_size is set (None otherwise)
+    """
+    partials = []
+    for position in range(n_columns):
+        values = arrays[f'column_{position}']
+        values = values[~np.isnan(values)]
+        sketch = None
+        if sketch_size:
+            sketch = ha.QuantileSketch(sketch_size)
+            sketch.update(values)
+        partials.append((ha._moments(values), sketch))
+    return partials
+
+class PartitionedAnalytics:
+    """
+    Execution layer that runs healthcare metrics on patient partitions.
+
+    Rows are hash-partitioned by patient ID, so every admission of a patient
+    lands in the same partition and patient-local metrics such as readmission
+    stay correct. The needed columns are copied once into shared memory and
+    each worker process reads its slice from there. Partial results are
+    merged exactly, so the outputs equal the single-process functions
+    (generate_summary_stats quartiles aside, see there).
+
+    Length of stay is one vectorized subtraction that is cheaper than
+    copying its columns to shared memory, so there is no parallel version;
+    call healthcare_analytics.calculate_length_of_stay.
+
+    Use as a context manager to keep one process pool across calls.
+    """
+
+    def __init__(self, n_workers=None, n_partitions=None):
+        self.n_workers = n_workers or os.cpu_count() or 1
+        self.n_partitions = n_partitions or self.n_workers
+        self._pool = None
+
+    def __enter__(self):
+        self._pool = ProcessPoolExecutor(max_workers=self.n_workers)
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self._pool.shutdown()
+        self._pool = None
+
+    def _map(self, task, shared, offsets, *args):
+        """Run task on every partition slice and return the results in order"""
+        bounds = [(offsets[k], offsets[k + 1]) for k in range(len(offsets) - 1)]
+
+        if self._pool is not None:
+            futures = [self._pool.submit(_run_partition, task, shared.specs, start, stop, *args)
+                       for start, stop in bounds]
+            return [future.result() for future in futures]
+
+        with ProcessPoolExecutor(max_workers=self.n_workers) as pool:
+            futures = [pool.submit(_run_partition, task, shared.specs, start, stop, *args)
+                       for start, stop in bounds]
+            return [future.result() for future in futures]
+
+    def _partition_order(self, df, patient_id_col):
+        """Row order grouping each partition together, plus slice offsets"""
+        partitions = (pd.util.hash_pandas_object(df[patient_id_col], index=False).to_numpy()
+                      % np.uint64(self.n_partitions)).astype('int64')
+        order = np.argsort(partitions, kind='stable')
+        offsets = np.searchsorted(partitions[order], np.arange(self.n_partitions + 1))
+        return order, offsets
+
+    def calculate_readmission_rate(self, df, patient_id_col='patient_id',
+                                   admission_date_col='admission_date',
+                                   days_threshold=30):
+        """
+        Parallel version of healthcare_analytics.calculate_readmission_rate.
+
+        Returns:
+        float: Readmission rate as percentage
+        """
+        order, offsets = self._partition_order(df, patient_id_col)
+        codes = pd.factorize(df[patient_id_col])[0].astype('int64')
+        ticks, ticks_per_day, valid = ha._date_ticks(df[admission_date_col])
+
+        with SharedArrays({'codes': codes[order], 'ticks': ticks[order],
+                           'valid': valid[order]}) as shared:
+            readmissions = sum(self._map(_readmission_task, shared, offsets,
+                                         days_threshold, ticks_per_day))
+
+        return round((readmissions / len(df)) * 100, 2)
+
+    def generate_summary_stats(self, df, numeric_columns=None, exact_quartiles=True,
+                               sketch_size=200):
+        """
+        Parallel version of healthcare_analytics.generate_summary_stats.
+
+        Count, mean, std, min and max are merged from per-partition moments.
+        Exact quartiles need every value of a column in one place, so by
+        default they are computed serially in the parent with
+        np.nanpercentile, which is the slowest part of the summary. With
+        exact_quartiles=False each worker also builds a QuantileSketch of
+        its partition and the merged sketches give the quartiles, as
+        SummaryAccumulator does: the whole summary runs in parallel, but
+        the quartiles are estimates.
+
+        Parameters:
+        df (pd.DataFrame): Dataset
+        numeric_columns (list): Specific numeric columns to analyze
+        exact_quartiles (bool): Exact serial quartiles, or parallel sketch estimates
+        sketch_size (int): QuantileSketch k when exact_quartiles is False
+
+        Returns:
+        pd.DataFrame: Summary statistics
+        """
+        if numeric_columns is None:
+            numeric_columns = ha._numeric_columns(df)
+        numeric_columns = list(numeric_columns)
+
+        offsets = np.linspace(0, len(df), self.n_partitions + 1).astype('int64')
+        columns = {f'column_{position}': df[col].to_numpy(dtype='float64', na_value=np.nan)
+                   for position, col in enumerate(numeric_columns)}
+
+        with SharedArrays(columns) as shared:
+            partials = self._map(_moments_task, shared, offsets, len(numeric_columns),
+                                 None if exact_quartiles else sketch_size)
+
+        stats = {}
+        for position, col in enumerate(numeric_columns):
+            merged = (0, 0.0, 0.0, np.nan, np.nan)
+            sketch = None if exact_quartiles else ha.QuantileSketch(sketch_size)
+            for partial in partials:
+                moments, partition_sketch = partial[position]
+                merged = ha._merge_moments(merged, moments)
+                if sketch is not None:
+                    sketch.merge(partition_sketch)
+
+            if not merged[0]:
+                quartiles = [np.nan] * 3
+            elif exact_quartiles:
+                quartiles = np.nanpercentile(columns[f'column_{position}'], [25, 50, 75])
+            else:
+                quartiles = sketch.quantiles([0.25, 0.5, 0.75])
+            stats[col] = (merged, quartiles)
+
+        return ha._summary_table(stats, len(df))
+
+if __name__ == "__main__":
+    print("Parallel Healthcare Analytics")
+    print("Usage:")
+    print("    with PartitionedAnalytics(n_workers=8) as engine:")
+    print("        rate = engine.calculate_readmission_rate(df)")
+    print("        summary = engine.generate_summary_stats(df, exact_quartiles=False)")
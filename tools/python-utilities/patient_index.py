@@ -0,0 +1,309 @@
+"""
+Patient Index
+Persistent per-patient index over admissions: rows sorted by patient and
+admission date are stored as memory-mapped NumPy columns next to a sorted
+array of patient IDs, so one patient's history, length of stay and
+readmission chain are read without loading the extract
+"""
+
+import json
+import os
+import shutil
+import sys
+import numpy as np
+import pandas as pd
+
+import healthcare_analytics as ha
+from instrumentation import instrument_class
+
+META_FILE = 'meta.json'
+NS_PER_DAY = 86_400_000_000_000
+
+@instrument_class
+class PatientIndex:
+    """
+    Admissions grouped by patient on disk.
+
+    The directory holds one .npy file per column with the rows sorted by
+    patient and admission date, keys.npy with the distinct patient IDs in
+    order and offsets.npy with the first row of each patient. The files are
+    opened with mmap_mode='r', so a lookup is a binary search over keys.npy
+    (O(log n) pages) plus a read of the patient's own rows; nothing else is
+    loaded.
+
+    update() merges a new extract into the sorted rows without re-sorting
+    them: only the extract is sorted, and its rows are inserted at positions
+    found by binary search. The merged files go to a new version directory
+    and meta.json is switched to it in one os.replace, so readers never see
+    a half-written index.
+    """
+
+    def __init__(self, index_dir):
+        self.index_dir = index_dir
+        with open(os.path.join(index_dir, META_FILE), 'r', encoding='utf-8') as f:
+            self.meta = json.load(f)
+        self.patient_id_col = self.meta['patient_id_col']
+        self.admission_date_col = self.meta['admission_date_col']
+
+        version_dir = os.path.join(index_dir, self.meta['version'])
+        self.keys = np.load(os.path.join(version_dir, 'keys.npy'), mmap_mode='r')
+        self.offsets = np.load(os.path.join(version_dir, 'offsets.npy'), mmap_mode='r')
+        self.columns = {col: np.load(os.path.join(version_dir, f'{position}.npy'), mmap_mode='r')
+                        for position, col in enumerate(self.meta['columns'])}
+
+    def __len__(self):
+        return int(self.offsets[-1]) if len(self.offsets) else 0
+
+    @property
+    def n_patients(self):
+        return len(self.keys)
+
+    @classmethod
+    def build(cls, index_dir, extract, patient_id_col='patient_id',
+              admission_date_col='admission_date', columns=None):
+        """
+        Create an index from a first extract.
+
+        Parameters:
+        index_dir (str): Directory for the index (created if missing)
+        extract (str or pd.DataFrame): Admissions frame, or .csv/.parquet file
+        patient_id_col (str): Patient ID column
+        admission_date_col (str): Admission date column
+        columns (list): Columns to store (default: every column of the extract)
+
+        Returns:
+        PatientIndex: The opened index
+        """
+        frame = _read_extract(extract, columns, admission_date_col)
+        os.makedirs(index_dir, exist_ok=True)
+        meta = {
+            'version': 'v0',
+            'patient_id_col': patient_id_col,
+            'admission_date_col': admission_date_col,
+            'columns': list(frame.columns),
+            'extracts': []
+        }
+        rows = {col: np.zeros(0, dtype=_column_array(frame[col]).dtype) for col in frame.columns}
+        _write_version(index_dir, meta, rows, frame, extract)
+        return cls(index_dir)
+
+    def update(self, extract):
+        """
+        Merge a new extract into the index.
+
+        Admissions already in the index (same admission_id, when the column
+        is stored) are replaced by the extract's version, so re-sent rows,
+        such as stays discharged since the last extract, do not duplicate.
+
+        Parameters:
+        extract (str or pd.DataFrame): New admissions with the indexed columns
+
+        Returns:
+        PatientIndex: The reopened index
+        """
+        frame = _read_extract(extract, self.meta['columns'], self.admission_date_col)
+        _write_version(self.index_dir, dict(self.meta), self.columns, frame, extract)
+        old_version = os.path.join(self.index_dir, self.meta['version'])
+        self.__init__(self.index_dir)
+        # Another process may still map the old files; then they stay until the next update
+        shutil.rmtree(old_version, ignore_errors=True)
+        return self
+
+    def _bounds(self, patient_id):
+        position = np.searchsorted(self.keys, patient_id)
+        if position >= len(self.keys) or self.keys[position] != patient_id:
+            return 0, 0
+        return int(self.offsets[position]), int(self.offsets[position + 1])
+
+    def rows(self, patient_id):
+        """
+        One patient's stored columns as NumPy arrays, oldest admission first.
+
+        This is the lookup without building a DataFrame, for callers that
+        look up many patients one at a time.
+
+        Returns:
+        dict: Column name -> array (empty arrays if the patient is unknown)
+        """
+        start, stop = self._bounds(patient_id)
+        return {col: np.asarray(values[start:stop]) for col, values in self.columns.items()}
+
+    def history(self, patient_id):
+        """
+        One patient's admissions, oldest first, with length of stay.
+
+        Parameters:
+        patient_id: Patient to look up
+
+        Returns:
+        pd.DataFrame: The patient's rows (empty if the patient is unknown)
+        """
+        return self._frame(self.rows(patient_id))
+
+    def _frame(self, columns):
+        if 'discharge_date' in columns:
+            columns['length_of_stay'] = _length_of_stay(columns[self.admission_date_col],
+                                                        columns['discharge_date'])
+        return pd.DataFrame(columns)
+
+    def histories(self, patient_ids):
+        """
+        Histories of several patients in one frame, in the order given.
+
+        Returns:
+        pd.DataFrame: Rows of every known patient
+        """
+        patient_ids = np.asarray(patient_ids)
+        if not len(self.keys) or not len(patient_ids):
+            return self._frame({col: np.asarray(values[:0]) for col, values in self.columns.items()})
+        positions = np.minimum(np.searchsorted(self.keys, patient_ids), len(self.keys) - 1)
+        positions = positions[np.asarray(self.keys[positions]) == patient_ids]
+        starts = np.asarray(self.offsets[positions])
+        lengths = np.asarray(self.offsets[positions + 1]) - starts
+
+        # Row numbers of every selected patient, patient by patient
+        before = np.cumsum(lengths) - lengths
+        rows = np.repeat(starts - before, lengths) + np.arange(lengths.sum())
+        return self._frame({col: values[rows] for col, values in self.columns.items()})
+
+    def readmission_chain(self, patient_id, days_threshold=30):
+        """
+        A patient's admissions with their readmission links.
+
+        Admissions are linked when the next one starts within days_threshold
+        days, as in calculate_readmission_rate; linked admissions share a
+        chain number.
+
+        Returns:
+        pd.DataFrame: history() plus days_to_next, readmitted and chain
+        """
+        columns = self.rows(patient_id)
+        admissions = columns[self.admission_date_col]
+        valid = ~np.isnat(admissions)
+        ticks = np.where(valid, admissions.astype('datetime64[ns]').view('int64'), 0)
+        gap_days, has_next = ha._next_admission_gaps(np.zeros(len(ticks), dtype='int64'), ticks,
+                                                     valid, NS_PER_DAY)
+
+        readmitted = has_next & (gap_days <= days_threshold)
+        columns['days_to_next'] = pd.arrays.IntegerArray(gap_days, ~has_next)
+        columns['readmitted'] = readmitted
+        columns['chain'] = np.cumsum(np.r_[True, ~readmitted[:-1]])[:len(ticks)]
+        return self._frame(columns)
+
+def _length_of_stay(admissions, discharges):
+    """Whole days between two datetime64 arrays, floored like Timedelta.days; NaN if missing"""
+    with np.errstate(invalid='ignore'):
+        days = np.floor_divide(discharges - admissions, np.timedelta64(1, 'D'))
+    return np.where(np.isnat(admissions) | np.isnat(discharges), np.nan, days)
+
+def _read_extract(extract, columns, admission_date_col):
+    """Extract rows as a frame with parsed admission dates"""
+    if isinstance(extract, pd.DataFrame):
+        frame = extract if columns is None else extract[columns]
+    elif extract.endswith('.parquet'):
+        frame = pd.read_parquet(extract, columns=columns)
+    elif extract.endswith('.csv'):
+        frame = pd.read_csv(extract, usecols=columns)
+    else:
+        raise ValueError("Unsupported file format")
+    frame = frame.copy()
+    frame[admission_date_col] = pd.to_datetime(frame[admission_date_col])
+    if 'discharge_date' in frame:
+        frame['discharge_date'] = pd.to_datetime(frame['discharge_date'])
+    return frame
+
+def _column_array(series):
+    """A column as a fixed-width NumPy array that np.load can memory-map"""
+    if pd.api.types.is_datetime64_any_dtype(series):
+        return series.to_numpy(dtype='datetime64[ns]')
+    if pd.api.types.is_bool_dtype(series) or pd.api.types.is_numeric_dtype(series):
+        if series.isna().any():
+            return series.to_numpy(dtype='float64', na_value=np.nan)
+        return series.to_numpy()
+    return np.asarray(series.fillna('').astype(str).to_numpy(dtype=object), dtype=str)
+
+def _sort_ticks(values):
+    """int64 date keys with missing dates sorting last"""
+    ticks = values.astype('datetime64[ns]').view('int64')
+    return np.where(np.isnat(values), np.iinfo(np.int64).max, ticks)
+
+def _merge_positions(old_patients, old_ticks, new_patients, new_ticks):
+    """
+    Insertion points of sorted new rows into sorted old rows.
+
+    Each new row's patient range comes from two binary searches over the
+    old patient column; the row then steps past the patient's older
+    admissions, one vectorized step per admission of the largest range.
+    """
+    positions = np.searchsorted(old_patients, new_patients, side='left')
+    stops = np.searchsorted(old_patients, new_patients, side='right')
+    active = np.flatnonzero(positions < stops)
+    while len(active):
+        later = old_ticks[positions[active]] <= new_ticks[active]
+        active = active[later]
+        positions[active] += 1
+        active = active[positions[active] < stops[active]]
+    return positions
+
+def _write_version(index_dir, meta, old_columns, frame, extract):
+    """Merge frame into the old columns, write them as the next version and switch to it"""
+    patient_id_col, date_col = meta['patient_id_col'], meta['admission_date_col']
+    frame = frame[frame[patient_id_col].notna()]
+    frame = frame.sort_values([patient_id_col, date_col], kind='stable', na_position='last')
+    new = {col: _column_array(frame[col]) for col in meta['columns']}
+    # Keys stay int64 (or strings) even when the source column had missing IDs
+    if new[patient_id_col].dtype.kind == 'f':
+        new[patient_id_col] = new[patient_id_col].astype('int64')
+
+    keep = np.ones(len(old_columns[patient_id_col]), dtype=bool)
+    if 'admission_id' in old_columns and len(keep) and len(frame):
+        keep = ~np.isin(old_columns['admission_id'], new['admission_id'])
+
+    old_patients = np.asarray(old_columns[patient_id_col])[keep]
+    positions = _merge_positions(old_patients, _sort_ticks(np.asarray(old_columns[date_col])[keep]),
+                                 new[patient_id_col], _sort_ticks(new[date_col]))
+
+    number = int(meta['version'][1:]) + 1 if meta['extracts'] else 0
+    meta['version'] = f'v{number}'
+    version_dir = os.path.join(index_dir, meta['version'])
+    os.makedirs(version_dir, exist_ok=True)
+
+    # One column at a time, so only one merged column is in memory
+    for position, col in enumerate(meta['columns']):
+        old = np.asarray(old_columns[col])[keep]
+        dtype = np.promote_types(old.dtype, new[col].dtype)
+        merged = np.insert(old.astype(dtype, copy=False), positions, new[col].astype(dtype, copy=False))
+        np.save(os.path.join(version_dir, f'{position}.npy'), merged)
+        if col == patient_id_col:
+            patients = merged
+
+    starts = np.flatnonzero(np.r_[True, patients[1:] != patients[:-1]]) if len(patients) else np.zeros(0, dtype='int64')
+    np.save(os.path.join(version_dir, 'keys.npy'), patients[starts])
+    np.save(os.path.join(version_dir, 'offsets.npy'), np.r_[starts, len(patients)].astype('int64'))
+
+    meta['rows'] = len(patients)
+    meta['patients'] = len(starts)
+    meta['extracts'] = meta['extracts'] + [extract if isinstance(extract, str) else f'frame of {len(frame)} rows']
+    temp_path = os.path.join(index_dir, META_FILE + '.tmp')
+    with open(temp_path, 'w', encoding='utf-8') as f:
+        json.dump(meta, f, indent=2)
+    os.replace(temp_path, os.path.join(index_dir, META_FILE))
+
+if __name__ == "__main__":
+    if len(sys.argv) < 3:
+        print("Patient Index")
+        print("Usage: python patient_index.py <index_dir> <extract.csv|.parquet> [patient_id]")
+        print("    index = PatientIndex.build('patient_index', 'admissions.parquet')")
+        print("    index.update('new_admissions.parquet')")
+        print("    index.readmission_chain(12345)")
+        sys.exit(1)
+
+    index_dir, extract = sys.argv[1], sys.argv[2]
+    if os.path.exists(os.path.join(index_dir, META_FILE)):
+        index = PatientIndex(index_dir).update(extract)
+    else:
+        index = PatientIndex.build(index_dir, extract)
+    print(f"🗂️ Indexed {len(index):,} admissions of {index.n_patients:,} patients in {index_dir}")
+    if len(sys.argv) > 3:
+        patient_id = int(sys.argv[3]) if sys.argv[3].isdigit() else sys.argv[3]
+        print(index.readmission_chain(patient_id).to_string(index=False))
@@ -0,0 +1,274 @@
+"""
+Lazy Healthcare Pipeline
+Records load and derive steps over an admissions extract and runs them as one
+planned job: only the needed columns are kept, per-row derivations are fused
+per batch and every readmission step shares a single sort
+"""
+
+import copy
+import numpy as np
+import pandas as pd
+
+import healthcare_analytics as ha
+from dedup import value_hashes
+from instrumentation import instrument
+
+def scan(source, date_columns=None, chunksize=100_000):
+    """
+    Start a lazy pipeline over a CSV/Excel extract or an in-memory frame.
+
+    Nothing is read until collect() or iter_batches() is called. Files get
+    the same cleaning as load_and_clean_data (date parsing, duplicate rows
+    dropped) through iter_clean_chunks.
+
+    Parameters:
+    source (str or pd.DataFrame): Path to the data file, or a cleaned frame
+    date_columns (list): Columns to convert to datetime
+    chunksize (int): Rows per batch while reading
+
+    Returns:
+    AdmissionsPipeline: Empty pipeline over the source
+    """
+    return AdmissionsPipeline(source, date_columns, chunksize)
+
+class AdmissionsPipeline:
+    """
+    Lazy chain of the healthcare_analytics steps.
+
+    Each with_* method returns a new pipeline with one more step, so partial
+    pipelines can be reused. The plan is made when the pipeline runs:
+
+    - With select(), only the source columns that the output or a step
+      needs are kept from each batch; the rest are dropped as soon as the
+      batch is cleaned, so the full extract is never materialized.
+    - Length of stay and age groups are derived batch by batch in one pass.
+    - All readmission flags on the same patient/date columns share one sort,
+      whatever their thresholds.
+    """
+
+    def __init__(self, source, date_columns=None, chunksize=100_000):
+        self.source = source
+        self.date_columns = list(date_columns or [])
+        self.chunksize = chunksize
+        self.steps = []
+        self.columns = None
+
+    def _with_step(self, kind, inputs, output, **options):
+        pipeline = copy.copy(self)
+        pipeline.steps = self.steps + [{'kind': kind, 'inputs': inputs,
+                                        'output': output, **options}]
+        return pipeline
+
+    def with_length_of_stay(self, admit_col='admission_date', discharge_col='discharge_date',
+                            output='length_of_stay'):
+        """Add calculate_length_of_stay as a column"""
+        return self._with_step('length_of_stay', [admit_col, discharge_col], output)
+
+    def with_age_groups(self, age_col='age', scheme='python', output='age_group'):
+        """Add create_age_groups as a column"""
+        return self._with_step('age_groups', [age_col], output, scheme=scheme)
+
+    def with_readmission_flag(self, days_threshold=30, patient_id_col='patient_id',
+                              admission_date_col='admission_date', output=None):
+        """
+        Flag admissions followed by the patient's next admission within
+        days_threshold days.
+
+        The mean of the flag times 100 is calculate_readmission_rate over
+        the same rows.
+        """
+        return self._with_step('readmission', [patient_id_col, admission_date_col],
+                               output or f'readmitted_{days_threshold}d',
+                               days_threshold=days_threshold)
+
+    def select(self, columns):
+        """Keep only these source and derived columns in the output"""
+        pipeline = copy.copy(self)
+        pipeline.columns = list(columns)
+        return pipeline
+
+    def _plan(self):
+        """Columns to read and dates to parse, per-batch steps and sort groups"""
+        derived = [step['output'] for step in self.steps]
+        read_columns = None
+        if self.columns is not None:
+            needed = [col for col in self.columns if col not in derived]
+            for step in self.steps:
+                needed += [col for col in step['inputs'] if col not in derived]
+            read_columns = list(dict.fromkeys(needed))
+
+        date_columns = [col for col in self.date_columns
+                        if read_columns is None or col in read_columns]
+
+        sort_groups = {}
+        for step in self.steps:
+            if step['kind'] == 'readmission':
+                sort_groups.setdefault(tuple(step['inputs']), []).append(step)
+
+        return {
+            'read_columns': read_columns,
+            'date_columns': date_columns,
+            'row_steps': [step for step in self.steps if step['kind'] != 'readmission'],
+            'sort_groups': sort_groups
+        }
+
+    def explain(self):
+        """
+        Describe how the pipeline will run.
+
+        Returns:
+        str: The execution plan
+        """
+        plan = self._plan()
+        source = ('in-memory frame' if isinstance(self.source, pd.DataFrame)
+                  else f'{self.source} (duplicates dropped)')
+        lines = [
+            'AdmissionsPipeline plan',
+            f'  source: {source}, batches of {self.chunksize:,} rows',
+            f"  keep columns: {', '.join(plan['read_columns']) if plan['read_columns'] else 'all'}",
+            f"  parse dates: {', '.join(plan['date_columns']) or 'none'}"
+        ]
+        if plan['row_steps']:
+            lines.append('  per-batch derivations: '
+                         + ', '.join(step['output'] for step in plan['row_steps']))
+        for (patient_col, date_col), steps in plan['sort_groups'].items():
+            lines.append(f'  one sort on ({patient_col}, {date_col}): '
+                         + ', '.join(step['output'] for step in steps))
+        lines.append(f"  output: {', '.join(self.columns) if self.columns else 'all columns'}")
+        return '\n'.join(lines)
+
+    def _iter_source(self, plan, chunksize):
+        """Cleaned source batches trimmed to the planned columns"""
+        read_columns = plan['read_columns']
+        if isinstance(self.source, pd.DataFrame):
+            frame = self.source if read_columns is None else self.source[read_columns]
+            for start in range(0, len(frame), chunksize):
+                yield frame.iloc[start:start + chunksize]
+            return
+
+        for chunk in ha.iter_clean_chunks(self.source, plan['date_columns'], chunksize):
+            yield chunk if read_columns is None else chunk[read_columns]
+
+    def _derive(self, batch, row_steps):
+        """Apply every per-row step to one batch"""
+        derived = {}
+        for step in row_steps:
+            if step['kind'] == 'length_of_stay':
+                admit_col, discharge_col = step['inputs']
+                derived[step['output']] = ha.calculate_length_of_stay(batch, admit_col, discharge_col)
+            else:
+                derived[step['output']] = ha.create_age_groups(batch[step['inputs'][0]],
+                                                               step['scheme'])
+        return batch.assign(**derived) if derived else batch
+
+    def _output(self, frame):
+        return frame if self.columns is None else frame[self.columns]
+
+    @instrument(name='AdmissionsPipeline.collect')
+    def collect(self):
+        """
+        Run the pipeline and return the full result.
+
+        Returns:
+        pd.DataFrame: Source rows with the derived columns
+        """
+        plan = self._plan()
+        batches = [self._derive(batch, plan['row_steps'])
+                   for batch in self._iter_source(plan, self.chunksize)]
+        if batches:
+            frame = pd.concat(batches, ignore_index=True)
+        else:
+            frame = self._derive(self._empty_source(plan), plan['row_steps'])
+
+        for (patient_col, date_col), steps in plan['sort_groups'].items():
+            codes, ticks, valid, ticks_per_day, order = ha._sorted_admission_keys(
+                frame, patient_col, date_col)
+            flags = _readmission_flags(codes, ticks, valid, ticks_per_day, order, steps)
+            frame = frame.assign(**flags)
+
+        return self._output(frame)
+
+    def _empty_source(self, plan):
+        if isinstance(self.source, pd.DataFrame):
+            return self.source.iloc[:0] if plan['read_columns'] is None \
+                else self.source[plan['read_columns']].iloc[:0]
+        return pd.DataFrame(columns=plan['read_columns'] or [])
+
+    def iter_batches(self, batch_size=None):
+        """
+        Run the pipeline and stream the result in batches.
+
+        Per-row steps run batch by batch. Readmission flags need each
+        patient's next admission, so a first pass keeps just a 64-bit hash
+        of the patient ID and the admission date per row (about 17 bytes),
+        sorts those once and the second pass streams the batches with their
+        flags attached.
+
+        Parameters:
+        batch_size (int): Rows per batch (default: the pipeline's chunksize)
+
+        Yields:
+        pd.DataFrame: Result batches, in source order
+        """
+        batch_size = batch_size or self.chunksize
+        plan = self._plan()
+
+        flags = {}
+        for (patient_col, date_col), steps in plan['sort_groups'].items():
+            flags.update(self._streamed_flags(plan, batch_size, patient_col, date_col, steps))
+
+        offset = 0
+        for batch in self._iter_source(plan, batch_size):
+            batch = self._derive(batch, plan['row_steps'])
+            if flags:
+                stop = offset + len(batch)
+                batch = batch.assign(**{output: values[offset:stop]
+                                        for output, values in flags.items()})
+                offset = stop
+            yield self._output(batch)
+
+    def _streamed_flags(self, plan, batch_size, patient_col, date_col, steps):
+        """Readmission flags for every source row from a keys-only pass"""
+        key_parts, tick_parts, valid_parts = [], [], []
+        ticks_per_day = None
+        for batch in self._iter_source(plan, batch_size):
+            ids = batch[patient_col]
+            # Same hash for an ID in an int64 batch and a float64 one with blanks
+            keys = value_hashes(ids)
+            ticks, batch_ticks_per_day, valid = ha._date_ticks(batch[date_col])
+            ticks_per_day = ticks_per_day or batch_ticks_per_day
+            key_parts.append(np.where(ids.notna().to_numpy(), keys, 0))
+            tick_parts.append(ticks)
+            valid_parts.append(valid & ids.notna().to_numpy())
+
+        if not key_parts:
+            return {step['output']: np.zeros(0, dtype=bool) for step in steps}
+
+        keys = np.concatenate(key_parts)
+        valid = np.concatenate(valid_parts)
+        codes = pd.factorize(keys)[0].astype('int64')
+        codes[~valid] = -1
+        ticks = np.concatenate(tick_parts)
+        order = ha._patient_date_order(codes, ticks, valid)
+        return _readmission_flags(codes[order], ticks[order], valid[order],
+                                  ticks_per_day, order, steps)
+
+def _readmission_flags(codes, ticks, valid, ticks_per_day, order, steps):
+    """Per-row flags, in source order, for several thresholds over one sort"""
+    gap_days, has_next = ha._next_admission_gaps(codes, ticks, valid, ticks_per_day)
+    flags = {}
+    for step in steps:
+        flag = np.zeros(len(order), dtype=bool)
+        flag[order] = has_next & (gap_days <= step['days_threshold'])
+        flags[step['output']] = flag
+    return flags
+
+if __name__ == "__main__":
+    print("Lazy Healthcare Pipeline")
+    print("Usage:")
+    print("    result = (scan('admissions.csv', date_columns=['admission_date', 'discharge_date'])")
+    print("              .with_length_of_stay()")
+    print("              .with_age_groups()")
+    print("              .with_readmission_flag(30)")
+    print("              .select(['patient_id', 'length_of_stay', 'age_group', 'readmitted_30d'])")
+    print("              .collect())")
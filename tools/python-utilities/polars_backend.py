@@ -0,0 +1,180 @@
+"""
+Polars Backend
+Native Polars versions of the healthcare_analytics functions, used by
+backends.dispatch when the 'polars' engine is selected. Frames may be eager or
+lazy (pl.scan_parquet), and lazy inputs only read the columns a function uses.
+A function returns NotImplemented for inputs it does not handle, and the
+pandas version runs instead
+"""
+
+import numpy as np
+import pandas as pd
+import polars as pl
+
+import healthcare_analytics as ha
+from binning import AGE_SCHEMES
+
+NS_PER_DAY = 86_400_000_000_000
+
+def _is_frame(df):
+    return isinstance(df, (pl.DataFrame, pl.LazyFrame))
+
+def _day_numbers(col, dtype):
+    """Whole days since 1970-01-01 for a Datetime, Date or day-number column"""
+    if dtype == pl.Datetime:
+        return pl.col(col).dt.date().cast(pl.Int32)
+    if dtype == pl.Date:
+        return pl.col(col).cast(pl.Int32)
+    return pl.col(col)
+
+def _days_between(start, end, dtype):
+    """Whole days from start to end, floored like Timedelta.days"""
+    if dtype == pl.Datetime:
+        return (end - start).dt.total_nanoseconds() // NS_PER_DAY
+    if dtype == pl.Date:
+        return (end - start).dt.total_days()
+    return end - start
+
+def load_and_clean_data(file_path, date_columns=None, cache_dir=None,
+                        max_cache_bytes=None, compact=False, dedup_key=None, deduplicator=None):
+    """Lazy scan of a CSV or Parquet file, date parsing and duplicate removal in one plan"""
+    if compact or cache_dir or deduplicator is not None:
+        return NotImplemented
+    if file_path.endswith('.csv'):
+        frame = pl.scan_csv(file_path)
+    elif file_path.endswith('.parquet'):
+        frame = pl.scan_parquet(file_path)
+    else:
+        return NotImplemented
+
+    if date_columns:
+        schema = frame.collect_schema()
+        frame = frame.with_columns([
+            pl.col(col).str.to_datetime() if schema[col] == pl.String else pl.col(col).cast(pl.Datetime)
+            for col in date_columns])
+
+    if isinstance(dedup_key, str):
+        dedup_key = [dedup_key]
+    df = frame.unique(subset=dedup_key, keep='first', maintain_order=True).collect()
+    print(f"Data loaded successfully: {df.height} rows, {df.width} columns")
+    return df
+
+def calculate_readmission_rate(df, patient_id_col='patient_id',
+                               admission_date_col='admission_date',
+                               days_threshold=30, sort_memory_bytes=None, temp_dir=None):
+    """Sort by patient and date (multi-threaded) and compare each row with the next"""
+    if not _is_frame(df):
+        return NotImplemented
+    frame = df.lazy().select(pl.col(patient_id_col).alias('patient'),
+                             pl.col(admission_date_col).alias('date'))
+    dtype = frame.collect_schema()['date']
+
+    gap = _days_between(pl.col('date'), pl.col('date').shift(-1), dtype)
+    same_patient = pl.col('patient') == pl.col('patient').shift(-1)
+    counts = (frame.sort(['patient', 'date'], nulls_last=True)
+              .select(readmissions=(same_patient & (gap <= days_threshold)).sum(),
+                      admissions=pl.len())
+              .collect())
+
+    readmission_rate = (counts['readmissions'][0] / counts['admissions'][0]) * 100
+    return round(readmission_rate, 2)
+
+def create_age_groups(age_series, scheme='python'):
+    """Bin with the scheme's searchsorted codes into an ordered Enum column"""
+    if not isinstance(age_series, pl.Series):
+        return NotImplemented
+    if isinstance(scheme, str):
+        scheme = AGE_SCHEMES[scheme]
+
+    codes = scheme.codes(age_series.cast(pl.Float64).fill_null(np.nan).to_numpy())
+    return pl.Series(age_series.name, codes).replace_strict(
+        dict(enumerate(scheme.labels)), default=None, return_dtype=pl.Enum(scheme.labels))
+
+def plot_patient_flow(df, date_col='admission_date', title='Patient Flow Over Time',
+                      group_col=None, output=None, max_points=None, dpi=100):
+    """Daily counts from a Polars group-by, drawn by the shared matplotlib code"""
+    if not _is_frame(df):
+        return NotImplemented
+    frame = df.lazy()
+    dtype = frame.collect_schema()[date_col]
+    group = pl.col(group_col) if group_col is not None else pl.lit(0)
+
+    counts = (frame.select(day=_day_numbers(date_col, dtype), group=group)
+              .drop_nulls()
+              .group_by(['group', 'day']).len()
+              .collect())
+
+    if group_col is None:
+        names = [None]
+    else:
+        names = counts['group'].unique().sort().to_list()
+    if not counts.height:
+        days, daily = np.arange(0), np.zeros((len(names), 0), dtype='int64')
+    else:
+        first_day = int(counts['day'].min())
+        n_days = int(counts['day'].max()) - first_day + 1
+        group_codes = (np.zeros(counts.height, dtype='int64') if group_col is None
+                       else np.searchsorted(np.array(names), counts['group'].to_numpy()))
+        daily = np.zeros((len(names), n_days), dtype='int64')
+        daily[group_codes, counts['day'].to_numpy() - first_day] = counts['len'].to_numpy()
+        days = np.arange(first_day, first_day + n_days)
+
+    return ha._draw_patient_flow(days, daily, names, title, group_col, output, max_points, dpi)
+
+def generate_summary_stats(df, numeric_columns=None):
+    """describe()-style statistics from a single multi-threaded aggregation"""
+    if not _is_frame(df):
+        return NotImplemented
+    frame = df.lazy()
+    if numeric_columns is None:
+        numeric_columns = [name for name, dtype in frame.collect_schema().items()
+                           if dtype.is_numeric()]
+
+    aggregations = [pl.len().alias('rows')]
+    for position, col in enumerate(numeric_columns):
+        values = pl.col(col).cast(pl.Float64).fill_nan(None)
+        aggregations += [
+            values.count().alias(f'{position}_count'),
+            values.mean().alias(f'{position}_mean'),
+            values.std().alias(f'{position}_std'),
+            values.min().alias(f'{position}_min'),
+            values.quantile(0.25, 'linear').alias(f'{position}_25'),
+            values.quantile(0.5, 'linear').alias(f'{position}_50'),
+            values.quantile(0.75, 'linear').alias(f'{position}_75'),
+            values.max().alias(f'{position}_max')
+        ]
+    row = frame.select(aggregations).collect().row(0, named=True)
+
+    n_rows = row['rows']
+    summary = {}
+    for position, col in enumerate(numeric_columns):
+        count = row[f'{position}_count']
+        missing = n_rows - count
+        summary[col] = [count] + [row[f'{position}_{stat}']
+                                  for stat in ('mean', 'std', 'min', '25', '50', '75', 'max')] \
+                       + [missing, missing / n_rows * 100 if n_rows else np.nan]
+
+    index = ['count', 'mean', 'std', 'min', '25%', '50%', '75%', 'max',
+             'missing_count', 'missing_percentage']
+    return pd.DataFrame(summary, index=index, columns=numeric_columns).astype('float64').round(2)
+
+def calculate_length_of_stay(df, admit_col='admission_date', discharge_col='discharge_date'):
+    """Day difference as one expression over the two columns"""
+    if not _is_frame(df):
+        return NotImplemented
+    frame = df.lazy()
+    dtype = frame.collect_schema()[admit_col]
+    return (frame.select(_days_between(pl.col(admit_col), pl.col(discharge_col), dtype).alias(''))
+            .collect().to_series())
+
+def calculate_bed_occupancy(census, bed_capacity):
+    """Occupancy for a census frame whose date labels are a column"""
+    if not isinstance(census, pl.DataFrame):
+        return NotImplemented
+    columns = [name for name, dtype in census.schema.items() if dtype.is_numeric()]
+    if not isinstance(bed_capacity, dict):
+        bed_capacity = dict.fromkeys(columns, bed_capacity)
+    return census.with_columns([
+        (pl.col(col) / bed_capacity[col] * 100).round(2) if col in bed_capacity
+        else pl.lit(None, dtype=pl.Float64).alias(col)
+        for col in columns])
@@ -9,6 +9,9 @@ import seaborn as sns
 import json
 from datetime import datetime
 
+from instrumentation import instrument
+
+@instrument
 # Load real data
 def load_real_data():
     """Load the real certification data"""
@@ -18,6 +21,7 @@ def load_real_data():
     df = pd.DataFrame(data['certifications'])
     return df, data
 
+@instrument
 def create_real_dashboard():
     """Create dashboard with real data"""
     df, data = load_real_data()
@@ -0,0 +1,269 @@
+"""
+Patient Risk Scoring
+Python port of the High-Risk Patient Identification query: admission counts,
+distinct diagnoses and last admission per patient over a rolling window, with
+the same High/Medium/Low rules, computed on integer-coded arrays
+"""
+
+import sys
+import numpy as np
+import pandas as pd
+
+import healthcare_analytics as ha
+from instrumentation import instrument, instrument_class
+
+# CASE rules of the SQL query
+HIGH_RISK_ADMISSIONS = 4
+HIGH_RISK_DIAGNOSES = 3
+MEDIUM_RISK_ADMISSIONS = 2
+MEDIUM_RISK_DIAGNOSES = 2
+RISK_CATEGORIES = ['High Risk', 'Medium Risk', 'Low Risk']
+
+DEFAULT_WINDOW_MONTHS = 12
+
+@instrument_class
+class RiskState:
+    """
+    Admissions and diagnoses absorbed so far, held as integer codes.
+
+    Patient IDs, admission IDs and diagnosis codes are each mapped to dense
+    integers once, when they are first seen. Every admission keeps its
+    patient code and date, and every diagnosis row keeps its admission and
+    code number, so scoring a window is a filter, a bincount and one sort
+    of packed (patient, diagnosis) keys for the distinct count; nothing is
+    joined or grouped by value.
+
+    update() takes new admissions and new diagnosis batches as they arrive.
+    Because the rows keep their dates, scores() can be asked for any window
+    end, and prune() drops rows that have left every window still needed.
+    """
+
+    def __init__(self, window_months=DEFAULT_WINDOW_MONTHS, patient_id_col='patient_id',
+                 admission_id_col='admission_id', admission_date_col='admission_date',
+                 diagnosis_col='diagnosis_code'):
+        self.window_months = window_months
+        self.patient_id_col = patient_id_col
+        self.admission_id_col = admission_id_col
+        self.admission_date_col = admission_date_col
+        self.diagnosis_col = diagnosis_col
+        self.ticks_per_day = None
+        self._patients = pd.Index([])
+        self._admissions = pd.Index([])
+        self._codes = pd.Index([])
+        self.admission_patient = np.zeros(0, dtype='int64')
+        self.admission_ticks = np.zeros(0, dtype='int64')
+        self.diagnosis_admission = np.zeros(0, dtype='int64')
+        self.diagnosis_code = np.zeros(0, dtype='int64')
+        self.unmatched_diagnoses = 0
+
+    def update(self, admissions=None, diagnoses=None):
+        """
+        Absorb new admissions and/or diagnosis rows.
+
+        Admission IDs already absorbed are ignored, so overlapping extracts
+        can be passed as they are. Diagnoses are matched to admissions by
+        admission ID, like the join in the SQL; add the admissions before or
+        together with their diagnoses. Diagnoses of unknown admissions are
+        dropped and counted in unmatched_diagnoses.
+
+        Parameters:
+        admissions (pd.DataFrame): Admission ID, patient ID and admission date
+        diagnoses (pd.DataFrame): Admission ID and diagnosis code
+
+        Returns:
+        RiskState: self, for chaining
+        """
+        if admissions is not None and len(admissions):
+            self._add_admissions(admissions)
+        if diagnoses is not None and len(diagnoses):
+            self._add_diagnoses(diagnoses)
+        return self
+
+    def _add_admissions(self, admissions):
+        ticks, ticks_per_day, valid = ha._date_ticks(admissions[self.admission_date_col])
+        if self.ticks_per_day is None:
+            self.ticks_per_day = ticks_per_day
+        elif ticks_per_day != self.ticks_per_day:
+            raise ValueError("Batch date resolution does not match the stored state")
+
+        valid = valid & (admissions[self.admission_id_col].notna().to_numpy()
+                  & admissions[self.patient_id_col].notna().to_numpy())
+        known = len(self._admissions)
+        self._admissions, admission_codes = _encode(self._admissions,
+                                                    admissions[self.admission_id_col][valid])
+
+        # New IDs get codes known, known + 1, ... in first-occurrence order
+        first = ~pd.Series(admission_codes).duplicated().to_numpy()
+        new = first & (admission_codes >= known)
+        self._patients, patient_codes = _encode(
+            self._patients, admissions[self.patient_id_col][valid][new])
+        self.admission_patient = np.concatenate([self.admission_patient, patient_codes])
+        self.admission_ticks = np.concatenate([self.admission_ticks, ticks[valid][new]])
+
+    def _add_diagnoses(self, diagnoses):
+        valid = (diagnoses[self.admission_id_col].notna().to_numpy()
+                 & diagnoses[self.diagnosis_col].notna().to_numpy())
+        admission_codes = self._admissions.get_indexer(diagnoses[self.admission_id_col][valid])
+        matched = admission_codes >= 0
+        self.unmatched_diagnoses += int(np.count_nonzero(~matched))
+
+        self._codes, codes = _encode(self._codes, diagnoses[self.diagnosis_col][valid][matched])
+        self.diagnosis_admission = np.concatenate([self.diagnosis_admission, admission_codes[matched]])
+        self.diagnosis_code = np.concatenate([self.diagnosis_code, codes])
+
+    def _as_ticks(self, timestamp):
+        timestamp = pd.Timestamp(timestamp)
+        if self.ticks_per_day == 1:
+            return (timestamp.normalize() - ha.DAY_EPOCH).days
+        return timestamp.value
+
+    def scores(self, as_of=None, window_months=None, patients=None, age_col='age'):
+        """
+        Risk table for the window ending at as_of.
+
+        Parameters:
+        as_of (str or datetime): End of the window (default: now, like GETDATE())
+        window_months (int): Window length (default: the state's window;
+                             0 for all history up to as_of)
+        patients (pd.DataFrame): Optional patients table; when given, only
+                                 its patients are scored and their age is added
+
+        Returns:
+        pd.DataFrame: patient_id, [age,] admission_count, unique_diagnoses,
+        last_admission and risk_category for patients admitted in the window,
+        most admissions first
+        """
+        window_months = self.window_months if window_months is None else window_months
+        as_of = pd.Timestamp(as_of) if as_of is not None else pd.Timestamp.now()
+        in_window = self.admission_ticks <= self._as_ticks(as_of)
+        if window_months:
+            in_window &= self.admission_ticks >= self._as_ticks(as_of - pd.DateOffset(months=window_months))
+
+        n_patients = len(self._patients)
+        patient = self.admission_patient[in_window]
+        admission_count = np.bincount(patient, minlength=n_patients)
+        last_ticks = np.full(n_patients, np.iinfo(np.int64).min)
+        np.maximum.at(last_ticks, patient, self.admission_ticks[in_window])
+
+        # Distinct (patient, diagnosis) pairs from one sort of packed keys
+        rows = in_window[self.diagnosis_admission]
+        n_codes = max(len(self._codes), 1)
+        pairs = np.sort(self.admission_patient[self.diagnosis_admission[rows]] * n_codes
+                        + self.diagnosis_code[rows])
+        pairs = pairs[np.r_[True, pairs[1:] != pairs[:-1]]] if len(pairs) else pairs
+        unique_diagnoses = np.bincount(pairs // n_codes, minlength=n_patients)
+
+        scored = np.flatnonzero(admission_count > 0)
+        result = pd.DataFrame({
+            self.patient_id_col: self._patients[scored],
+            'admission_count': admission_count[scored],
+            'unique_diagnoses': unique_diagnoses[scored],
+            'last_admission': self._as_dates(last_ticks[scored])
+        })
+        if patients is not None:
+            result = patients[[self.patient_id_col, age_col]].merge(result, on=self.patient_id_col)
+
+        result['risk_category'] = risk_categories(result['admission_count'], result['unique_diagnoses'])
+        return result.sort_values(['admission_count', 'unique_diagnoses', self.patient_id_col],
+                                  ascending=[False, False, True], ignore_index=True)
+
+    def _as_dates(self, ticks):
+        if self.ticks_per_day == 1:
+            return ha._as_datetimes(pd.Series(ticks))
+        return pd.to_datetime(ticks, unit='ns')
+
+    def prune(self, before):
+        """
+        Drop admissions dated before a timestamp, and their diagnoses.
+
+        Call it with the start of the oldest window still needed, e.g.
+        as_of minus the window, to keep the state bounded.
+
+        Returns:
+        RiskState: self, for chaining
+        """
+        keep = self.admission_ticks >= self._as_ticks(before)
+        new_codes = np.cumsum(keep) - 1
+        rows = keep[self.diagnosis_admission]
+
+        self._admissions = self._admissions[keep]
+        self.admission_patient = self.admission_patient[keep]
+        self.admission_ticks = self.admission_ticks[keep]
+        self.diagnosis_admission = new_codes[self.diagnosis_admission[rows]]
+        self.diagnosis_code = self.diagnosis_code[rows]
+        return self
+
+def risk_categories(admission_count, unique_diagnoses):
+    """
+    Apply the High/Medium/Low rules of the SQL query.
+
+    Parameters:
+    admission_count (array-like): Admissions per patient
+    unique_diagnoses (array-like): Distinct diagnosis codes per patient
+
+    Returns:
+    np.ndarray: 'High Risk', 'Medium Risk' or 'Low Risk' per patient
+    """
+    admission_count = np.asarray(admission_count)
+    unique_diagnoses = np.asarray(unique_diagnoses)
+    return np.select(
+        [(admission_count >= HIGH_RISK_ADMISSIONS) & (unique_diagnoses >= HIGH_RISK_DIAGNOSES),
+         (admission_count >= MEDIUM_RISK_ADMISSIONS) | (unique_diagnoses >= MEDIUM_RISK_DIAGNOSES)],
+        RISK_CATEGORIES[:2], RISK_CATEGORIES[2]).astype(object)
+
+@instrument
+def score_patient_risk(admissions, diagnoses, patients=None, as_of=None,
+                       window_months=DEFAULT_WINDOW_MONTHS):
+    """
+    Identify high-risk patients from admissions and diagnoses.
+
+    Same result as the High-Risk Patient Identification query in
+    healthcare_analytics_queries.sql, with GETDATE() replaced by as_of.
+
+    Parameters:
+    admissions (pd.DataFrame): Admissions with admission_id, patient_id and admission_date
+    diagnoses (pd.DataFrame): Diagnoses with admission_id and diagnosis_code
+    patients (pd.DataFrame): Optional patients table with patient_id and age
+    as_of (str or datetime): End of the window (default: now)
+    window_months (int): Window length in months
+
+    Returns:
+    pd.DataFrame: One row per patient admitted in the window
+    """
+    state = RiskState(window_months).update(admissions, diagnoses)
+    return state.scores(as_of, patients=patients)
+
+def _encode(index, values):
+    """
+    Integer codes of non-missing values in an index of known values,
+    appending values not seen before in first-occurrence order.
+
+    The batch is factorized first, so only its distinct values are looked
+    up in the index; a few thousand diagnosis codes instead of every row.
+
+    Returns:
+    tuple: The extended index and the codes
+    """
+    local_codes, uniques = pd.factorize(values)
+    codes = index.get_indexer(uniques)
+    missing = codes < 0
+    if missing.any():
+        codes[missing] = np.arange(len(index), len(index) + np.count_nonzero(missing))
+        added = pd.Index(uniques[missing])
+        index = index.append(added) if len(index) else added
+    return index, codes.astype('int64')[local_codes]
+
+if __name__ == "__main__":
+    if len(sys.argv) < 3:
+        print("Patient Risk Scoring")
+        print("Usage: python risk_scoring.py <admissions.csv> <diagnoses.csv> [as_of]")
+        print("    state = RiskState().update(admissions, diagnoses)")
+        print("    state.update(diagnoses=new_batch).scores('2025-01-01')")
+        sys.exit(1)
+
+    admissions = ha.load_and_clean_data(sys.argv[1], ['admission_date'])
+    diagnoses = ha.load_and_clean_data(sys.argv[2])
+    scores = score_patient_risk(admissions, diagnoses,
+                                as_of=sys.argv[3] if len(sys.argv) > 3 else None)
+    print("🩺 Patients by risk category:")
+    print(scores['risk_category'].value_counts().reindex(RISK_CATEGORIES, fill_value=0).to_string())
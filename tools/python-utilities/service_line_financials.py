@@ -0,0 +1,285 @@
+"""
+Service Line Financials
+Streaming version of the Financial Performance by Service Line query: a
+compact admission_id -> service line index is built from the admissions in
+the window, and billing is read in chunks and probed against it, so billing
+is never loaded whole
+"""
+
+import sys
+import numpy as np
+import pandas as pd
+
+from instrumentation import instrument, instrument_class
+
+# Install pyarrow to stream Parquet files: pip install pyarrow
+try:
+    import pyarrow.parquet as pq
+    PYARROW_AVAILABLE = True
+except ImportError:
+    PYARROW_AVAILABLE = False
+
+# HAVING COUNT(a.admission_id) >= 10 in the SQL query
+MIN_CASE_VOLUME = 10
+DEFAULT_WINDOW_MONTHS = 12
+DEFAULT_CHUNKSIZE = 500_000
+
+def iter_table(source, columns, chunksize=DEFAULT_CHUNKSIZE):
+    """
+    Read only the given columns of a table, one chunk at a time.
+
+    Parameters:
+    source (str, pd.DataFrame or iterable): .parquet or .csv path, a frame,
+                                            or an iterable of frames
+    columns (list): Columns to keep
+    chunksize (int): Rows per chunk for files and frames
+
+    Yields:
+    pd.DataFrame: Chunks with just those columns
+    """
+    if isinstance(source, pd.DataFrame):
+        for start in range(0, len(source), chunksize):
+            yield source[columns].iloc[start:start + chunksize]
+    elif isinstance(source, str) and source.endswith('.parquet'):
+        if not PYARROW_AVAILABLE:
+            raise ImportError("pyarrow is not installed: pip install pyarrow")
+        for batch in pq.ParquetFile(source).iter_batches(batch_size=chunksize, columns=columns):
+            yield batch.to_pandas()
+    elif isinstance(source, str) and source.endswith('.csv'):
+        yield from pd.read_csv(source, usecols=columns, chunksize=chunksize)
+    elif isinstance(source, str):
+        raise ValueError("Unsupported file format")
+    else:
+        for chunk in source:
+            yield chunk[columns]
+
+class ServiceLineIndex:
+    """
+    Sorted admission IDs with the service line code of each.
+
+    Only admissions inside the window are kept, as int64 IDs next to int16
+    service line codes, about 10 bytes per admission. A billing chunk is
+    matched with one np.searchsorted over the sorted IDs instead of a merge.
+    """
+
+    def __init__(self, admission_ids, line_codes, service_lines):
+        self.admission_ids = admission_ids
+        self.line_codes = line_codes
+        self.service_lines = service_lines
+
+    def __len__(self):
+        return len(self.admission_ids)
+
+    @property
+    def nbytes(self):
+        return self.admission_ids.nbytes + self.line_codes.nbytes
+
+    def lookup(self, admission_ids):
+        """
+        Service line codes of admission IDs.
+
+        Returns:
+        np.ndarray: Code per ID, -1 where the admission is not in the index
+        """
+        admission_ids = np.asarray(admission_ids)
+        if not len(self.admission_ids):
+            return np.full(len(admission_ids), -1, dtype='int16')
+        positions = np.searchsorted(self.admission_ids, admission_ids)
+        positions = np.minimum(positions, len(self.admission_ids) - 1)
+        found = self.admission_ids[positions] == admission_ids
+        return np.where(found, self.line_codes[positions], -1).astype('int16')
+
+@instrument
+def build_service_line_index(admissions, as_of=None, window_months=DEFAULT_WINDOW_MONTHS,
+                             admission_id_col='admission_id', service_line_col='service_line_id',
+                             admission_date_col='admission_date', chunksize=DEFAULT_CHUNKSIZE):
+    """
+    Index the admissions of the window by admission ID.
+
+    Parameters:
+    admissions (str, pd.DataFrame or iterable): Admissions file, frame or chunks
+    as_of (str or datetime): End of the window (default: now, like GETDATE())
+    window_months (int): Window length (0 for all admissions up to as_of)
+
+    Returns:
+    ServiceLineIndex: The index
+    """
+    as_of = pd.Timestamp(as_of) if as_of is not None else pd.Timestamp.now()
+    start = as_of - pd.DateOffset(months=window_months) if window_months else None
+
+    # Service lines are coded per chunk against the lines seen so far, so
+    # only 10 bytes per kept admission are held until the sort
+    service_lines = pd.Index([])
+    id_parts, code_parts = [], []
+    for chunk in iter_table(admissions, [admission_id_col, service_line_col, admission_date_col],
+                            chunksize):
+        dates = pd.to_datetime(chunk[admission_date_col])
+        keep = (dates <= as_of) & chunk[admission_id_col].notna() & chunk[service_line_col].notna()
+        if start is not None:
+            keep &= dates >= start
+        lines = chunk[service_line_col][keep]
+        new_lines = pd.Index(lines.unique()).difference(service_lines)
+        if len(new_lines):
+            service_lines = service_lines.append(new_lines) if len(service_lines) else new_lines
+        id_parts.append(chunk[admission_id_col][keep].to_numpy(dtype='int64'))
+        code_parts.append(service_lines.get_indexer(lines).astype('int16'))
+
+    admission_ids = np.concatenate(id_parts) if id_parts else np.zeros(0, dtype='int64')
+    codes = np.concatenate(code_parts) if code_parts else np.zeros(0, dtype='int16')
+
+    # admission_id is the key of the admissions table; keep the first row of any repeat
+    order = np.argsort(admission_ids, kind='stable')
+    admission_ids, codes = admission_ids[order], codes[order]
+    first = np.r_[True, admission_ids[1:] != admission_ids[:-1]] if len(order) else np.zeros(0, dtype=bool)
+    return ServiceLineIndex(admission_ids[first], codes[first],
+                            pd.Index(service_lines, name=service_line_col))
+
+@instrument_class
+class FinancialAccumulator:
+    """
+    Running per-service-line billing totals.
+
+    Holds five small arrays per service line (joined rows, and sum and
+    non-null count of charges and of costs), so memory does not grow with
+    the billing rows. Accumulators over the same index, e.g. one per
+    billing file, can be merged.
+    """
+
+    def __init__(self, index, admission_id_col='admission_id',
+                 charges_col='total_charges', costs_col='total_costs'):
+        self.index = index
+        self.admission_id_col = admission_id_col
+        self.charges_col = charges_col
+        self.costs_col = costs_col
+        n_lines = len(index.service_lines)
+        self.cases = np.zeros(n_lines, dtype='int64')
+        self.sums = {col: np.zeros(n_lines) for col in (charges_col, costs_col)}
+        self.counts = {col: np.zeros(n_lines, dtype='int64') for col in (charges_col, costs_col)}
+        self.billing_rows = 0
+        self.unmatched_rows = 0
+
+    def update(self, billing):
+        """
+        Join a billing chunk to the index and add it to the totals.
+
+        Returns:
+        FinancialAccumulator: self, for chaining
+        """
+        ids = billing[self.admission_id_col]
+        known = ids.notna().to_numpy()
+        codes = np.full(len(billing), -1, dtype='int16')
+        codes[known] = self.index.lookup(ids[known].to_numpy(dtype='int64'))
+        matched = codes >= 0
+        codes = codes[matched]
+
+        n_lines = len(self.cases)
+        self.billing_rows += len(billing)
+        self.unmatched_rows += int(np.count_nonzero(~matched))
+        self.cases += np.bincount(codes, minlength=n_lines)
+        for col in self.sums:
+            values = billing[col].to_numpy(dtype='float64', na_value=np.nan)[matched]
+            present = ~np.isnan(values)
+            self.sums[col] += np.bincount(codes[present], weights=values[present], minlength=n_lines)
+            self.counts[col] += np.bincount(codes[present], minlength=n_lines)
+        return self
+
+    def merge(self, other):
+        """
+        Fold another accumulator over the same index into this one.
+
+        Returns:
+        FinancialAccumulator: self, for chaining
+        """
+        if other.index is not self.index:
+            raise ValueError("Only accumulators over the same index can be merged")
+        self.cases += other.cases
+        for col in self.sums:
+            self.sums[col] += other.sums[col]
+            self.counts[col] += other.counts[col]
+        self.billing_rows += other.billing_rows
+        self.unmatched_rows += other.unmatched_rows
+        return self
+
+    def result(self, service_lines=None, min_cases=MIN_CASE_VOLUME,
+               service_line_name_col='service_line_name'):
+        """
+        Financial performance table in the shape of the SQL query.
+
+        Parameters:
+        service_lines (pd.DataFrame): Optional service_lines table; when
+                                      given, only its service lines are
+                                      reported, by name
+        min_cases (int): Minimum case volume (the HAVING clause)
+
+        Returns:
+        pd.DataFrame: Volume, revenue, costs and margin per service line,
+        highest margin percentage first
+        """
+        charges, costs = self.sums[self.charges_col], self.sums[self.costs_col]
+        charge_counts, cost_counts = self.counts[self.charges_col], self.counts[self.costs_col]
+        with np.errstate(divide='ignore', invalid='ignore'):
+            result = pd.DataFrame({
+                self.index.service_lines.name: self.index.service_lines,
+                'case_volume': self.cases,
+                'total_revenue': np.where(charge_counts > 0, charges, np.nan),
+                'avg_revenue_per_case': charges / charge_counts,
+                'total_costs': np.where(cost_counts > 0, costs, np.nan),
+                'avg_cost_per_case': costs / cost_counts
+            })
+            result['net_margin'] = result['total_revenue'] - result['total_costs']
+            result['margin_percentage'] = (result['net_margin'] * 100.0
+                                           / result['total_revenue'].where(result['total_revenue'] != 0))
+
+        if service_lines is not None:
+            key = self.index.service_lines.name
+            names = service_lines[[key, service_line_name_col]]
+            result = names.merge(result, on=key).drop(columns=key)
+
+        result = result[result['case_volume'] >= min_cases]
+        return result.sort_values('margin_percentage', ascending=False, na_position='last',
+                                  ignore_index=True)
+
+@instrument
+def service_line_financials(admissions, billing, service_lines=None, as_of=None,
+                            window_months=DEFAULT_WINDOW_MONTHS, min_cases=MIN_CASE_VOLUME,
+                            chunksize=DEFAULT_CHUNKSIZE):
+    """
+    Revenue, cost and margin per service line, in bounded memory.
+
+    Same result as the Financial Performance by Service Line query in
+    healthcare_analytics_queries.sql, with GETDATE() replaced by as_of.
+    Memory is the index of the admissions in the window plus one chunk of
+    each table; billing can be any size.
+
+    Parameters:
+    admissions (str, pd.DataFrame or iterable): Admissions file, frame or chunks
+    billing (str, pd.DataFrame or iterable): Billing file, frame or chunks
+    service_lines (pd.DataFrame): Optional service_lines table for the names
+    as_of (str or datetime): End of the window (default: now)
+    window_months (int): Window length in months
+    min_cases (int): Minimum case volume per service line
+    chunksize (int): Rows per chunk
+
+    Returns:
+    pd.DataFrame: One row per service line with enough cases
+    """
+    index = build_service_line_index(admissions, as_of, window_months, chunksize=chunksize)
+    accumulator = FinancialAccumulator(index)
+    for chunk in iter_table(billing, ['admission_id', 'total_charges', 'total_costs'], chunksize):
+        accumulator.update(chunk)
+    return accumulator.result(service_lines, min_cases)
+
+if __name__ == "__main__":
+    if len(sys.argv) < 3:
+        print("Service Line Financials")
+        print("Usage: python service_line_financials.py <admissions file> <billing file> "
+              "[service_lines file] [as_of]")
+        sys.exit(1)
+
+    service_lines = None
+    if len(sys.argv) > 3:
+        service_lines = next(iter_table(sys.argv[3], ['service_line_id', 'service_line_name']))
+    report = service_line_financials(sys.argv[1], sys.argv[2], service_lines,
+                                     as_of=sys.argv[4] if len(sys.argv) > 4 else None)
+    print("💰 Financial performance by service line:")
+    print(report.to_string(index=False))
@@ -0,0 +1,328 @@
+"""
+Synthetic EHR Data Generator
+Deterministic, chunked test data for healthcare_analytics.py and the tables
+used by tools/sql-scripts/healthcare_analytics_queries.sql
+"""
+
+import os
+import sys
+import numpy as np
+import pandas as pd
+
+# Install pyarrow for Parquet output: pip install pyarrow
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    PYARROW_AVAILABLE = True
+except ImportError:
+    PYARROW_AVAILABLE = False
+
+# Patients generated per block. Each block has its own random stream seeded
+# by (seed, block number), so the same seed always gives the same files
+PATIENTS_PER_BLOCK = 50_000
+
+DEFAULT_END_DATE = '2025-01-01'
+
+# department_id -> (name, mean length of stay in days, daily charge rate)
+DEPARTMENTS = {
+    1: ('Cardiology', 4.5, 5200.0),
+    2: ('Orthopedics', 3.8, 6100.0),
+    3: ('Emergency', 1.2, 3900.0),
+    4: ('Neurology', 5.0, 4800.0),
+    5: ('Oncology', 6.5, 5600.0)
+}
+DEPARTMENT_WEIGHTS = [0.22, 0.16, 0.34, 0.12, 0.16]
+
+SERVICE_LINES = {
+    1: 'Cardiovascular',
+    2: 'Orthopedics & Spine',
+    3: 'Emergency Medicine',
+    4: 'Neurosciences',
+    5: 'Oncology',
+    6: 'General Medicine',
+    7: 'Surgery',
+    8: 'Maternity'
+}
+
+# ICD-10 codes: chronic conditions follow a patient across admissions,
+# acute codes are drawn per admission
+CHRONIC_CODES = np.array(['E11.9', 'I10', 'I50.9', 'J44.9', 'N18.3', 'E78.5', 'F32.9', 'I25.10'])
+ACUTE_CODES = np.array(['I21.4', 'S72.001A', 'R07.9', 'I63.9', 'C34.90', 'J18.9',
+                        'N39.0', 'K35.80', 'A41.9', 'R55', 'M54.5', 'S06.0X0A'])
+
+TABLES = ['patients', 'admissions', 'diagnoses', 'departments',
+          'service_lines', 'billing', 'patient_satisfaction']
+
+def reference_tables():
+    """
+    Departments and service lines, which do not grow with the data size.
+
+    Returns:
+    dict: Table name -> DataFrame
+    """
+    # The SQL script groups by both department and department_name
+    names = [spec[0] for spec in DEPARTMENTS.values()]
+    return {
+        'departments': pd.DataFrame({
+            'department_id': list(DEPARTMENTS),
+            'department': names,
+            'department_name': names
+        }),
+        'service_lines': pd.DataFrame({
+            'service_line_id': list(SERVICE_LINES),
+            'service_line_name': list(SERVICE_LINES.values())
+        })
+    }
+
+def iter_ehr_chunks(n_admissions, seed=42, end_date=DEFAULT_END_DATE, years=3):
+    """
+    Generate the patient-level tables block by block.
+
+    Every patient gets an age, gender, chronic conditions and a timeline of
+    admissions: a stay drawn from the department's log-normal LOS, then
+    either a short gap (readmission, more likely for seniors and frequent
+    flyers) or a long one. Admissions after end_date are dropped and stays
+    still open at end_date have no discharge, as in a real extract.
+
+    Parameters:
+    n_admissions (int): Exact number of admissions to generate
+    seed (int): Random seed
+    end_date (str): Extract date; admissions fall in the preceding years
+    years (int): Length of the admission window
+
+    Yields:
+    dict: Table name -> DataFrame for patients, admissions, diagnoses,
+          billing and patient_satisfaction
+    """
+    window_end = np.datetime64(pd.Timestamp(end_date).floor('h').to_datetime64(), 'h')
+    window_start = window_end - np.timedelta64(int(years * 365 * 24), 'h')
+    window_hours = int((window_end - window_start) / np.timedelta64(1, 'h'))
+
+    next_admission_id = 1
+    block = 0
+    while next_admission_id <= n_admissions:
+        tables = _generate_block(np.random.default_rng([seed, block]), block,
+                                 next_admission_id, window_start, window_hours)
+        block += 1
+
+        admissions = tables['admissions']
+        remaining = n_admissions - next_admission_id + 1
+        if len(admissions) > remaining:
+            tables = _truncate_block(tables, next_admission_id + remaining - 1)
+        next_admission_id += len(tables['admissions'])
+
+        if len(tables['admissions']):
+            yield tables
+
+def _generate_block(rng, block, first_admission_id, window_start, window_hours):
+    """One block of patients with their admissions, diagnoses, bills and surveys"""
+    n_patients = PATIENTS_PER_BLOCK
+    patient_ids = block * PATIENTS_PER_BLOCK + np.arange(1, n_patients + 1)
+    ages = np.clip(np.rint(rng.normal(52, 22, n_patients)), 0, 100).astype('int64')
+    genders = np.where(rng.random(n_patients) < 0.52, 'F', 'M')
+    frequent = rng.random(n_patients) < 0.01
+    senior = ages >= 65
+
+    # Admissions per patient, before the window end cuts timelines short
+    visits = 1 + rng.poisson(0.4 + ages / 120) + np.where(frequent, rng.poisson(8, n_patients), 0)
+    patient_of = np.repeat(np.arange(n_patients), visits)
+    starts = np.concatenate([[0], np.cumsum(visits)[:-1]])
+    n_rows = len(patient_of)
+
+    departments = rng.choice(np.array(list(DEPARTMENTS)), n_rows, p=DEPARTMENT_WEIGHTS)
+    mean_los = np.array([spec[1] for spec in DEPARTMENTS.values()])[departments - 1]
+    sigma = 0.8
+    los_days = rng.lognormal(np.log(mean_los) - sigma ** 2 / 2, sigma)
+    los_hours = np.maximum(np.rint(los_days * 24), 2).astype('int64')
+
+    readmit_probability = (0.22 + 0.1 * senior + 0.35 * frequent)[patient_of]
+    readmitted = rng.random(n_rows) < readmit_probability
+    gap_days = np.where(readmitted,
+                        np.minimum(1 + rng.exponential(9, n_rows), 30),
+                        31 + rng.exponential(220, n_rows))
+    gap_hours = np.rint(gap_days * 24).astype('int64')
+
+    # Admission k of a patient starts after the stays and gaps before it
+    step = los_hours + gap_hours
+    elapsed = np.cumsum(step) - step
+    elapsed -= elapsed[starts][patient_of]
+    admit_hours = rng.integers(0, window_hours, n_patients)[patient_of] + elapsed
+
+    kept = admit_hours < window_hours
+    patient_of, departments = patient_of[kept], departments[kept]
+    admit_hours, los_hours, los_days = admit_hours[kept], los_hours[kept], los_days[kept]
+    n_rows = len(patient_of)
+
+    admission_ids = first_admission_id + np.arange(n_rows)
+    discharge_hours = admit_hours + los_hours
+    discharged = discharge_hours < window_hours
+    admit_dates = window_start + admit_hours.astype('timedelta64[h]')
+    discharge_dates = np.where(discharged,
+                               window_start + discharge_hours.astype('timedelta64[h]'),
+                               np.datetime64('NaT', 'h'))
+
+    # Most stays map to their department's service line, the rest elsewhere
+    service_lines = np.where(rng.random(n_rows) < 0.8, departments,
+                             rng.integers(1, len(SERVICE_LINES) + 1, n_rows))
+
+    admissions = pd.DataFrame({
+        'admission_id': admission_ids,
+        'patient_id': patient_ids[patient_of],
+        'admission_date': admit_dates.astype('datetime64[s]'),
+        'discharge_date': discharge_dates.astype('datetime64[s]'),
+        'department_id': departments,
+        'service_line_id': service_lines
+    })
+
+    patients = pd.DataFrame({'patient_id': patient_ids, 'age': ages, 'gender': genders})
+
+    diagnoses = _generate_diagnoses(rng, ages, patient_of, departments, admission_ids)
+
+    daily_rate = np.array([spec[2] for spec in DEPARTMENTS.values()])[departments - 1]
+    charges = np.round(daily_rate * (1 + los_days) * rng.lognormal(0, 0.35, n_rows), 2)
+    billing = pd.DataFrame({
+        'admission_id': admission_ids,
+        'total_charges': charges,
+        'total_costs': np.round(charges * rng.uniform(0.55, 0.95, n_rows), 2)
+    })[discharged].reset_index(drop=True)
+
+    # Longer stays score a little lower
+    surveyed = discharged & (rng.random(n_rows) < 0.35)
+    scores = np.clip(np.rint(4.2 - 0.05 * los_days + rng.normal(0, 0.9, n_rows)), 1, 5)
+    satisfaction = pd.DataFrame({
+        'admission_id': admission_ids[surveyed],
+        'satisfaction_score': scores[surveyed].astype('int64')
+    })
+
+    return {'patients': patients, 'admissions': admissions, 'diagnoses': diagnoses,
+            'billing': billing, 'patient_satisfaction': satisfaction}
+
+def _generate_diagnoses(rng, ages, patient_of, departments, admission_ids):
+    """1+ diagnosis codes per admission, mixing a patient's chronic conditions with acute codes"""
+    n_patients = len(ages)
+    chronic_count = np.minimum(rng.poisson(ages / 30), 4)
+    chronic = np.stack([rng.integers(0, len(CHRONIC_CODES), n_patients) for _ in range(4)], axis=1)
+
+    per_admission = 1 + rng.poisson(1.2, len(patient_of))
+    row = np.repeat(np.arange(len(patient_of)), per_admission)
+    patient = patient_of[row]
+    n_codes = len(row)
+
+    # Acute codes lean towards the admitting department
+    acute = np.where(rng.random(n_codes) < 0.5,
+                     departments[row] - 1,
+                     rng.integers(0, len(ACUTE_CODES), n_codes))
+    use_chronic = (chronic_count[patient] > 0) & (rng.random(n_codes) < 0.5)
+    slot = (rng.random(n_codes) * np.maximum(chronic_count[patient], 1)).astype('int64')
+    codes = np.where(use_chronic, CHRONIC_CODES[chronic[patient, slot]], ACUTE_CODES[acute])
+
+    diagnoses = pd.DataFrame({'admission_id': admission_ids[row], 'diagnosis_code': codes})
+    return diagnoses.drop_duplicates().reset_index(drop=True)
+
+def _truncate_block(tables, last_admission_id):
+    """Drop everything after last_admission_id, so the total is exact"""
+    admissions = tables['admissions']
+    admissions = admissions[admissions['admission_id'] <= last_admission_id]
+    last_patient = admissions['patient_id'].max()
+
+    truncated = {'admissions': admissions,
+                 'patients': tables['patients'][tables['patients']['patient_id'] <= last_patient]}
+    for table in ('diagnoses', 'billing', 'patient_satisfaction'):
+        frame = tables[table]
+        truncated[table] = frame[frame['admission_id'] <= last_admission_id]
+    return truncated
+
+class _ChunkWriter:
+    """Appends DataFrame chunks to one CSV or Parquet file"""
+
+    def __init__(self, path, file_format):
+        self.path = path
+        self.file_format = file_format
+        self._parquet = None
+        self._started = False
+
+    def write(self, frame):
+        if self.file_format == 'parquet':
+            table = pa.Table.from_pandas(frame, preserve_index=False)
+            if self._parquet is None:
+                self._parquet = pq.ParquetWriter(self.path, table.schema)
+            self._parquet.write_table(table.cast(self._parquet.schema))
+        else:
+            frame.to_csv(self.path, mode='a' if self._started else 'w',
+                         header=not self._started, index=False)
+        self._started = True
+
+    def close(self):
+        if self._parquet is not None:
+            self._parquet.close()
+
+def generate_ehr_dataset(output_dir, n_admissions, seed=42, file_format='parquet',
+                         end_date=DEFAULT_END_DATE, years=3):
+    """
+    Write a synthetic extract of every table in the SQL schema.
+
+    Tables are written one block at a time, so memory stays flat from 10k
+    to 100M admissions. The files are named <table>.parquet or <table>.csv
+    and can be read by LocalSQLRunner.from_directory.
+
+    Parameters:
+    output_dir (str): Directory to write to (created if missing)
+    n_admissions (int): Number of admissions
+    seed (int): Random seed; the same seed gives identical files
+    file_format (str): 'parquet' or 'csv'
+    end_date (str): Extract date
+    years (int): Years of admissions before end_date
+
+    Returns:
+    dict: Table name -> file path
+    """
+    if file_format not in ('parquet', 'csv'):
+        raise ValueError("file_format must be 'parquet' or 'csv'")
+    if file_format == 'parquet' and not PYARROW_AVAILABLE:
+        raise ImportError("pyarrow is not installed: pip install pyarrow")
+
+    os.makedirs(output_dir, exist_ok=True)
+    paths = {table: os.path.join(output_dir, f'{table}.{file_format}') for table in TABLES}
+    writers = {table: _ChunkWriter(paths[table], file_format) for table in TABLES}
+
+    try:
+        for table, frame in reference_tables().items():
+            writers[table].write(frame)
+        for tables in iter_ehr_chunks(n_admissions, seed, end_date, years):
+            for table, frame in tables.items():
+                writers[table].write(frame)
+    finally:
+        for writer in writers.values():
+            writer.close()
+
+    return paths
+
+def synthetic_admissions(n_admissions, seed=42, end_date=DEFAULT_END_DATE, years=3):
+    """
+    In-memory admissions frame with patient age and gender, in the shape
+    healthcare_analytics.py expects.
+
+    Parameters:
+    n_admissions (int): Number of admissions
+    seed (int): Random seed
+
+    Returns:
+    pd.DataFrame: One row per admission
+    """
+    frames = []
+    for tables in iter_ehr_chunks(n_admissions, seed, end_date, years):
+        frames.append(tables['admissions'].merge(tables['patients'], on='patient_id', how='left'))
+    return pd.concat(frames, ignore_index=True)
+
+if __name__ == "__main__":
+    if len(sys.argv) < 3:
+        print("Usage: python synthetic_ehr.py <output_dir> <n_admissions> [parquet|csv] [seed]")
+        sys.exit(1)
+
+    paths = generate_ehr_dataset(
+        sys.argv[1], int(sys.argv[2]),
+        seed=int(sys.argv[4]) if len(sys.argv) > 4 else 42,
+        file_format=sys.argv[3] if len(sys.argv) > 3 else 'parquet')
+    print(f"🏥 Wrote {int(sys.argv[2]):,} synthetic admissions:")
+    for table, path in paths.items():
+        print(f"- {table}: {path}")
@@ -0,0 +1,5 @@
+import os
+import sys
+
+# The utilities are flat modules imported by name, like the scripts do
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
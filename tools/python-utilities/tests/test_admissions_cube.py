@@ -0,0 +1,54 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import healthcare_analytics as ha
+from admissions_cube import AdmissionsCube, build_admissions_cube
+from synthetic_ehr import synthetic_admissions
+
+BY = [['month'], ['department_id', 'gender'], ['age_group'], None]
+
+
+@pytest.fixture(scope='module')
+def admissions():
+    df = synthetic_admissions(5000, seed=3).sort_values('admission_date', kind='stable')
+    df.loc[df.index[::71], 'discharge_date'] = pd.NaT
+    df.loc[df.index[::83], 'age'] = np.nan
+    return df.reset_index(drop=True)
+
+
+def test_incremental_cube_matches_one_shot_build(admissions, tmp_path):
+    pytest.importorskip('pyarrow')
+    one_shot = build_admissions_cube(admissions)
+
+    AdmissionsCube().save(tmp_path)
+    for _, batch in admissions.groupby(admissions['admission_date'].dt.to_period('M'), sort=True):
+        cube = AdmissionsCube.load(tmp_path).update(batch)
+        cube.save(tmp_path)
+    incremental = AdmissionsCube.load(tmp_path)
+
+    for by in BY:
+        pd.testing.assert_frame_equal(incremental.rollup(by), one_shot.rollup(by), check_dtype=False)
+
+
+def test_cube_rollups_match_the_raw_admissions(admissions):
+    cube = build_admissions_cube(admissions)
+    df = admissions.assign(los=ha.calculate_length_of_stay(admissions),
+                           month=admissions['admission_date'].dt.to_period('M').dt.start_time)
+
+    by_month = cube.rollup(['month']).set_index('month')
+    expected = df.groupby('month').agg(admissions=('admission_id', 'size'), avg_los=('los', 'mean'))
+    pd.testing.assert_series_equal(by_month['admissions'], expected['admissions'],
+                                   check_dtype=False, check_names=False, check_index_type=False)
+    pd.testing.assert_series_equal(by_month['avg_los'], expected['avg_los'].round(2),
+                                   check_names=False, check_index_type=False)
+
+    total = cube.rollup().iloc[0]
+    assert total['readmission_rate'] == ha.calculate_readmission_rate(admissions)
+    # HyperLogLog at precision 12 has about 1.6% standard error
+    assert abs(total['unique_patients'] / admissions['patient_id'].nunique() - 1) < 0.05
+
+    cardiology = cube.rollup(['gender'], where={'department_id': 1}).set_index('gender')
+    expected = df[df['department_id'] == 1].groupby('gender').size()
+    pd.testing.assert_series_equal(cardiology['admissions'], expected,
+                                   check_dtype=False, check_names=False)
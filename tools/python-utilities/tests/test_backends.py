@@ -0,0 +1,168 @@
+import io
+
+import numpy as np
+import pandas as pd
+import pytest
+
+pl = pytest.importorskip('polars')
+pa = pytest.importorskip('pyarrow')
+
+import healthcare_analytics as ha
+from backends import _kind, _to_pandas
+from synthetic_ehr import synthetic_admissions
+
+DATE_COLUMNS = ['admission_date', 'discharge_date']
+
+
+def _line_data(fig):
+    """Plotted (x, y) points of every line, to compare two charts"""
+    return [(line.get_xdata(), line.get_ydata()) for line in fig.axes[0].get_lines()]
+
+
+# Functions taking an admissions table: name -> callable(table, **dispatch options)
+FRAME_CASES = {
+    'compact_frame': lambda df, **options: ha.compact_frame(df, **options),
+    'memory_savings_report': lambda df, **options: ha.memory_savings_report(
+        df, ha.compact_frame(df), **options),
+    'calculate_readmission_rate': lambda df, **options: ha.calculate_readmission_rate(
+        df, **options),
+    'calculate_readmission_rates': lambda df, **options: ha.calculate_readmission_rates(
+        df, group_by=['department_id'], **options),
+    'calculate_discharge_readmissions': lambda df, **options: ha.calculate_discharge_readmissions(
+        df, **options),
+    'create_age_groups': lambda df, **options: ha.create_age_groups(df['age'], **options),
+    'plot_patient_flow': lambda df, **options: _line_data(ha.plot_patient_flow(
+        df, group_col='department_id', output=io.BytesIO(), **options)),
+    'generate_summary_stats': lambda df, **options: ha.generate_summary_stats(df, **options),
+    'calculate_length_of_stay': lambda df, **options: ha.calculate_length_of_stay(df, **options),
+    'calculate_daily_census': lambda df, **options: ha.calculate_daily_census(
+        df, as_of='2025-01-01', **options),
+    'calculate_bed_occupancy': lambda df, **options: ha.calculate_bed_occupancy(
+        ha.calculate_daily_census(df, as_of='2025-01-01'), 300, **options)
+}
+
+# Functions taking a file: name -> callable(paths, **dispatch options)
+FILE_CASES = {
+    'load_and_clean_data (csv)': lambda paths, **options: ha.load_and_clean_data(
+        paths['csv'], DATE_COLUMNS, **options),
+    'load_and_clean_data (parquet)': lambda paths, **options: ha.load_and_clean_data(
+        paths['parquet'], DATE_COLUMNS, **options),
+    # compact and deduplicator have no Polars version (NotImplemented), so
+    # these fall back to pandas on either engine
+    'load_and_clean_data (compact)': lambda paths, **options: ha.load_and_clean_data(
+        paths['csv'], DATE_COLUMNS, compact=True, **options),
+    'load_and_clean_data (dedup_key)': lambda paths, **options: ha.load_and_clean_data(
+        paths['csv'], DATE_COLUMNS, dedup_key='admission_id', **options)
+}
+
+# Native Polars and Arrow inputs go through pandas-converted copies, whose
+# memory use differs from the original pandas frame
+NATIVE_SKIPS = {'memory_savings_report'}
+
+NATIVE_INPUTS = {
+    'polars': pl.from_pandas,
+    'lazy polars': lambda df: pl.from_pandas(df).lazy(),
+    'arrow': lambda df: pa.Table.from_pandas(df, preserve_index=False)
+}
+
+
+def _same_unit(frame):
+    """Datetime columns in ns: Parquet keeps the file's unit, Polars reads as us"""
+    return frame.apply(lambda col: col.dt.as_unit('ns')
+                       if pd.api.types.is_datetime64_any_dtype(col) else col)
+
+
+def _same(left, right):
+    """Assert two results agree, whatever table types they come back as"""
+    left, right = _to_pandas(left), _to_pandas(right)
+    if isinstance(left, pd.DataFrame):
+        left, right = _same_unit(left), _same_unit(right)
+        pd.testing.assert_frame_equal(left, right, check_dtype=False,
+                                      check_categorical=False, check_index_type=False)
+    elif isinstance(left, pd.Series):
+        pd.testing.assert_series_equal(left, right, check_dtype=False,
+                                       check_categorical=False, check_index_type=False)
+    elif isinstance(left, list):
+        assert len(left) == len(right)
+        for (lx, ly), (rx, ry) in zip(left, right):
+            np.testing.assert_array_equal(lx, rx)
+            np.testing.assert_array_equal(ly, ry)
+    else:
+        assert left == right
+
+
+def _as_converted(expected):
+    """A pandas result as it comes back for a Polars or Arrow input (labels as a column)"""
+    if isinstance(expected, pd.DataFrame) and not isinstance(expected.index, pd.RangeIndex):
+        return expected.reset_index()
+    return expected
+
+
+@pytest.fixture(scope='module')
+def admissions():
+    # Missing patient IDs, ages and admission dates and duplicated rows, so
+    # the null handling of both engines is compared too
+    df = synthetic_admissions(2000, seed=42)
+    df.loc[::97, 'age'] = np.nan
+    df.loc[::101, 'admission_date'] = pd.NaT
+    df.loc[::89, 'patient_id'] = np.nan
+    return df
+
+
+@pytest.fixture(scope='module')
+def paths(admissions, tmp_path_factory):
+    data_dir = tmp_path_factory.mktemp('admissions')
+    extract = pd.concat([admissions, admissions.iloc[:100]])
+    paths = {'csv': str(data_dir / 'admissions.csv'),
+             'parquet': str(data_dir / 'admissions.parquet')}
+    extract.to_csv(paths['csv'], index=False)
+    extract.to_parquet(paths['parquet'], index=False)
+    return paths
+
+
+@pytest.mark.parametrize('name', list(FRAME_CASES))
+def test_engines_agree_on_pandas_input(admissions, name):
+    case = FRAME_CASES[name]
+    _same(case(admissions, backend='pandas'), case(admissions, backend='polars'))
+
+
+@pytest.mark.parametrize('name', list(FILE_CASES))
+def test_engines_agree_on_files(paths, name):
+    case = FILE_CASES[name]
+    _same(case(paths, backend='pandas'), case(paths, backend='polars'))
+
+
+def test_parquet_loads_like_csv(paths):
+    _same(ha.load_and_clean_data(paths['csv'], DATE_COLUMNS, backend='pandas'),
+          ha.load_and_clean_data(paths['parquet'], DATE_COLUMNS, backend='pandas'))
+
+
+@pytest.mark.parametrize('input_kind', list(NATIVE_INPUTS))
+@pytest.mark.parametrize('name', sorted(set(FRAME_CASES) - NATIVE_SKIPS))
+def test_auto_dispatch_on_native_input(admissions, name, input_kind):
+    if input_kind == 'lazy polars' and name == 'create_age_groups':
+        pytest.skip("a LazyFrame has no columns to pass on their own")
+    case = FRAME_CASES[name]
+    native = NATIVE_INPUTS[input_kind](admissions)
+
+    expected = case(admissions, backend='pandas')
+    result = case(native, backend='auto')
+
+    if _kind(expected) is not None:
+        assert _kind(result) == _kind(native)
+    if input_kind == 'arrow' and isinstance(expected, pd.Series):
+        # Arrow arrays carry no column name
+        expected = expected.rename(None)
+    _same(_as_converted(expected), result)
+
+
+@pytest.mark.parametrize('return_type', ['pandas', 'polars', 'arrow'])
+@pytest.mark.parametrize('name', ['calculate_length_of_stay', 'calculate_readmission_rates',
+                                  'generate_summary_stats'])
+def test_return_type_conversion(admissions, name, return_type):
+    case = FRAME_CASES[name]
+    expected = case(admissions, backend='pandas')
+    result = case(admissions, backend='polars', return_type=return_type)
+
+    assert _kind(result) == return_type
+    _same(expected if return_type == 'pandas' else _as_converted(expected), result)
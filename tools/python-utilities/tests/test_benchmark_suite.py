@@ -0,0 +1,32 @@
+import json
+
+import benchmark_suite as bs
+
+
+def _run(run_id, wall_seconds, peak_rss_mb):
+    return {'run_id': run_id, 'results': [{'function': 'create_age_groups', 'rows': 1000,
+                                           'wall_seconds': wall_seconds,
+                                           'peak_rss_mb': peak_rss_mb, 'peak_alloc_mb': 4.0}]}
+
+
+def test_runs_with_the_same_id_are_kept_apart(tmp_path):
+    history_path = str(tmp_path / 'history.json')
+    for wall_seconds in (1.0, 2.0, 3.0):
+        bs._save_run(_run('20250101-120000-000000', wall_seconds, 10.0), history_path)
+
+    history = bs.load_history(history_path)
+    assert [run['run_id'] for run in history] == [
+        '20250101-120000-000000', '20250101-120000-000000-2', '20250101-120000-000000-3']
+    assert bs._find_run(history, '20250101-120000-000000-2')['results'][0]['wall_seconds'] == 2.0
+
+
+def test_growth_from_zero_is_a_regression(tmp_path):
+    history_path = tmp_path / 'history.json'
+    history_path.write_text(json.dumps([_run('before', 1.0, 0.0), _run('after', 1.0, 50.0)]))
+
+    comparison = bs.compare_runs('before', 'after', history_path=str(history_path))
+    rss = comparison[comparison['metric'] == 'peak_rss_mb'].iloc[0]
+    assert rss['change_pct'] == float('inf')
+    assert rss['regression']
+    wall = comparison[comparison['metric'] == 'wall_seconds'].iloc[0]
+    assert wall['change_pct'] == 0 and not wall['regression']
@@ -0,0 +1,28 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import healthcare_analytics as ha
+from binning import AGE_SCHEMES, MultiBinner
+
+
+def _ages():
+    rng = np.random.default_rng(2)
+    edges = np.concatenate([scheme.edges[np.isfinite(scheme.edges)] for scheme in AGE_SCHEMES.values()])
+    ages = np.concatenate([rng.uniform(-5, 110, 5000), edges, edges - 0.5, [np.nan] * 10])
+    return pd.Series(ages, name='age')
+
+
+@pytest.mark.parametrize('name', list(AGE_SCHEMES))
+def test_create_age_groups_matches_pd_cut(name):
+    scheme = AGE_SCHEMES[name]
+    ages = _ages()
+    expected = pd.cut(ages, bins=scheme.edges, right=False, labels=list(scheme.labels))
+    pd.testing.assert_series_equal(ha.create_age_groups(ages, scheme=name), expected)
+
+
+def test_multi_binner_matches_each_scheme():
+    ages = _ages()
+    binner = MultiBinner(AGE_SCHEMES.values())
+    for name, codes in binner.codes(ages).items():
+        np.testing.assert_array_equal(codes, AGE_SCHEMES[name].codes(ages))
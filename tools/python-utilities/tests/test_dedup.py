@@ -0,0 +1,29 @@
+import numpy as np
+import pandas as pd
+
+from dedup import Deduplicator, key_hashes
+
+
+def test_bigint_keys_stay_distinct():
+    ids = [1_230_000_000_000_000_001, 1_230_000_000_000_000_002, 1_230_000_000_000_000_003]
+    df = pd.DataFrame({'admission_id': ids, 'patient_id': [1, 1, 1]})
+    assert len(Deduplicator('admission_id').filter(df)) == 3
+    assert len(Deduplicator().filter(df)) == len(df.drop_duplicates()) == 3
+
+
+def test_key_hashes_ignore_chunk_dtype():
+    ints = pd.DataFrame({'patient_id': [5, 7], 'visit': [1.5, 2.0]})
+    floats = pd.DataFrame({'patient_id': [5.0, 7.0], 'visit': [1.5, 2.0]})
+    assert (key_hashes(ints) == key_hashes(floats)).all()
+    assert key_hashes(pd.DataFrame({'k': [1.5]}))[0] != key_hashes(pd.DataFrame({'k': [1]}))[0]
+
+
+def test_dedup_across_chunks_matches_drop_duplicates():
+    rng = np.random.default_rng(2)
+    df = pd.DataFrame({'admission_id': rng.integers(0, 500, 2000),
+                       'notes': rng.choice(['a', 'b', None], 2000)})
+    dedup = Deduplicator('admission_id')
+    kept = pd.concat([dedup.filter(df.iloc[start:start + 300], 'admissions.csv')
+                      for start in range(0, len(df), 300)])
+    pd.testing.assert_frame_equal(kept, df.drop_duplicates('admission_id'))
+    assert dedup.report()['duplicates_dropped'].tolist() == [len(df) - len(kept)]
@@ -0,0 +1,252 @@
+import io
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import healthcare_analytics as ha
+from dedup import value_hashes
+
+
+def _admissions(n_rows=2000, n_patients=300, seed=0):
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        'patient_id': rng.integers(1, n_patients, n_rows),
+        'admission_date': pd.Timestamp('2024-01-01')
+                          + pd.to_timedelta(rng.integers(0, 365, n_rows), unit='D')
+    })
+
+
+
+def _shift_readmissions(df, days_threshold):
+    """Readmission flag per row from the original groupby/shift implementation"""
+    df_sorted = df.sort_values(['patient_id', 'admission_date'])
+    next_admission = df_sorted.groupby('patient_id')['admission_date'].shift(-1)
+    days_to_next = (next_admission - df_sorted['admission_date']).dt.days
+    return (days_to_next <= days_threshold).reindex(df.index)
+
+def test_value_hashes_ignore_chunk_dtype():
+    ints = pd.Series([5, 7, 2 ** 62], dtype='int64')
+    floats = pd.Series([5.0, 7.0, np.nan])
+    nullable = pd.Series([5, 7, None], dtype='Int64')
+    assert (value_hashes(ints)[:2] == value_hashes(floats)[:2]).all()
+    assert (value_hashes(nullable) == value_hashes(floats)).all()
+    assert value_hashes(pd.Series([5.5]))[0] != value_hashes(pd.Series([5]))[0]
+
+
+def test_external_readmission_rate_with_mixed_chunk_dtypes(tmp_path):
+    df = _admissions()
+    df['patient_id'] = df['patient_id'].astype('Int64')
+    df.loc[1500, 'patient_id'] = pd.NA
+    path = tmp_path / 'admissions.csv'
+    df.to_csv(path, index=False)
+
+    chunks = list(pd.read_csv(path, parse_dates=['admission_date'], chunksize=500))
+    assert chunks[0]['patient_id'].dtype == 'int64'
+    assert chunks[3]['patient_id'].dtype == 'float64'
+
+    expected = ha.calculate_readmission_rate(pd.read_csv(path, parse_dates=['admission_date']))
+    assert ha.calculate_readmission_rate(iter(chunks), sort_memory_bytes=1) == expected
+
+
+def test_compact_frame_keeps_times_of_day():
+    df = _admissions()
+    df['discharge_date'] = df['admission_date'] + pd.to_timedelta(
+        np.random.default_rng(3).integers(0, 10 * 24, len(df)), unit='h')
+    compact = ha.compact_frame(df)
+
+    assert compact.attrs['day_columns'] == ['admission_date']
+    assert pd.api.types.is_datetime64_any_dtype(compact['discharge_date'])
+    pd.testing.assert_series_equal(ha.calculate_length_of_stay(compact),
+                                   ha.calculate_length_of_stay(df))
+    assert ha.calculate_discharge_readmissions(compact) == ha.calculate_discharge_readmissions(df)
+    pd.testing.assert_frame_equal(ha.calculate_daily_census(compact, as_of='2025-01-01'),
+                                  ha.calculate_daily_census(df, as_of='2025-01-01'))
+
+
+@pytest.mark.filterwarnings('ignore::pandas.errors.DtypeWarning')
+def test_cache_skips_frames_arrow_cannot_store(tmp_path):
+    path = tmp_path / 'admissions.csv'
+    n_rows = 300_000
+    pd.DataFrame({'patient_id': range(n_rows),
+                  'mrn': ['A7'] + [str(i) for i in range(1, n_rows)]}).to_csv(path, index=False)
+    cache_dir = tmp_path / 'cache'
+
+    uncached = ha.load_and_clean_data(str(path))
+    assert pd.api.types.is_object_dtype(uncached['mrn'])
+    assert {type(value) for value in uncached['mrn']} == {str, int}
+
+    cached = ha.load_and_clean_data(str(path), cache_dir=str(cache_dir))
+    pd.testing.assert_frame_equal(cached, uncached)
+    assert not cache_dir.exists() or not list(cache_dir.iterdir())
+
+
+def _stays(n_rows, seed, times_of_day):
+    rng = np.random.default_rng(seed)
+    unit = 'h' if times_of_day else 'D'
+    scale = 24 if times_of_day else 1
+    admission = pd.Timestamp('2024-01-01') + pd.to_timedelta(
+        rng.integers(0, 120 * scale, n_rows), unit=unit)
+    df = pd.DataFrame({
+        'patient_id': rng.integers(1, n_rows // 4 + 2, n_rows).astype('float64'),
+        'admission_date': admission,
+        'discharge_date': admission + pd.to_timedelta(rng.integers(0, 10 * scale, n_rows), unit=unit)
+    })
+    df.loc[rng.random(n_rows) < 0.05, 'patient_id'] = np.nan
+    df.loc[rng.random(n_rows) < 0.05, 'admission_date'] = pd.NaT
+    df.loc[rng.random(n_rows) < 0.05, 'discharge_date'] = pd.NaT
+    return df
+
+
+def _pairwise_discharge_readmissions(df, days_threshold=30):
+    """Every stay against every admission of the same patient, like the SQL self-join"""
+    pairs = []
+    for stay in df.itertuples():
+        if pd.isna(stay.patient_id) or pd.isna(stay.discharge_date):
+            continue
+        for other in df.itertuples():
+            if other.patient_id != stay.patient_id or pd.isna(other.admission_date):
+                continue
+            # DATEDIFF(day, ...) counts calendar-day boundaries
+            days = (other.admission_date.normalize() - stay.discharge_date.normalize()).days
+            if other.admission_date > stay.discharge_date and days <= days_threshold:
+                pairs.append((stay.Index, stay.patient_id, days))
+
+    pairs = pd.DataFrame(pairs, columns=['stay', 'patient_id', 'days'])
+    return {
+        'readmitted_patients': pairs['patient_id'].nunique(),
+        'total_readmissions': len(pairs),
+        'avg_days_to_readmission': round(pairs['days'].mean(), 2) if len(pairs) else None,
+        'readmission_rate': round(pairs['stay'].nunique() / len(df) * 100, 2)
+    }
+
+
+@pytest.mark.parametrize('seed', range(5))
+def test_discharge_readmissions_match_pairwise_self_join(seed):
+    timed = _stays(150, seed, times_of_day=True)
+    assert ha.calculate_discharge_readmissions(timed) == _pairwise_discharge_readmissions(timed)
+
+    dated = _stays(150, seed, times_of_day=False)
+    compact = ha.compact_frame(dated)
+    assert compact.attrs['day_columns'] == ['admission_date', 'discharge_date']
+    assert ha.calculate_discharge_readmissions(compact) == _pairwise_discharge_readmissions(dated)
+
+
+def test_readmission_rates_match_per_threshold_and_per_slice():
+    # Same-day admissions of a patient may come in either order, which
+    # moves the readmission between their slices; keep one of each
+    df = _admissions().drop_duplicates(['patient_id', 'admission_date']).reset_index(drop=True)
+    df['department'] = np.random.default_rng(5).choice(['ED', 'ICU', 'Surgery'], len(df))
+    df.loc[::37, 'department'] = None
+    thresholds = (7, 30, 90)
+
+    overall = ha.calculate_readmission_rates(df, thresholds)
+    for threshold, rate in zip(overall['days_threshold'], overall['readmission_rate']):
+        assert rate == ha.calculate_readmission_rate(df, days_threshold=threshold)
+
+    sliced = ha.calculate_readmission_rates(df, thresholds, group_by=['department'])
+    for threshold in thresholds:
+        flags = _shift_readmissions(df, threshold)
+        expected = pd.DataFrame({'admissions': df.groupby('department').size(),
+                                 'readmissions': flags.groupby(df['department']).sum()})
+        result = sliced[sliced['days_threshold'] == threshold].set_index('department')
+        pd.testing.assert_frame_equal(result[['admissions', 'readmissions']], expected,
+                                      check_dtype=False, check_names=False)
+
+
+def test_readmission_state_over_saved_batches_matches_full_rate(tmp_path):
+    df = _admissions(n_rows=3000).sort_values('admission_date', kind='stable')
+    df.loc[df.index[::53], 'patient_id'] = np.nan
+    expected = ha.calculate_readmission_rate(df)
+
+    path = tmp_path / 'state.npz'
+    ha.ReadmissionState().save(path)
+    for month, batch in df.groupby(df['admission_date'].dt.month, sort=True):
+        state = ha.ReadmissionState.load(path).update(batch)
+        state.save(path)
+
+    state = ha.ReadmissionState.load(path)
+    assert state.admissions == len(df)
+    assert state.readmission_rate == expected
+
+    with pytest.raises(ValueError):
+        state.update(df.head(50))
+
+
+def _naive_census(df, as_of):
+    """Stays in house at each midnight, counted day by day"""
+    admit = df['admission_date'].dt.normalize()
+    discharge = df['discharge_date'].dt.normalize().fillna(pd.Timestamp(as_of))
+    stays = df[admit.notna() & (discharge > admit)]
+    dates = pd.date_range(admit[stays.index].min(), discharge[stays.index].max(),
+                          freq='D', inclusive='left', name='date')
+    return pd.DataFrame({
+        department: [int(((admit[group.index] <= day) & (day < discharge[group.index])).sum())
+                     for day in dates]
+        for department, group in stays.groupby('department', sort=True)
+    }, index=dates)
+
+
+def test_daily_census_matches_day_by_day_count():
+    df = _stays(400, seed=7, times_of_day=True)
+    df['department'] = np.random.default_rng(7).choice(['ICU', 'Medicine', 'Surgery'], len(df))
+    df.loc[::41, 'department'] = None
+    expected = _naive_census(df, '2024-06-01')
+
+    census = ha.calculate_daily_census(df, department_col='department', as_of='2024-06-01')
+    pd.testing.assert_frame_equal(census, expected, check_dtype=False, check_freq=False)
+
+    occupancy = ha.calculate_bed_occupancy(census, {'ICU': 10, 'Medicine': 40, 'Surgery': 20})
+    pd.testing.assert_series_equal(occupancy['ICU'], (expected['ICU'] / 10 * 100).round(2),
+                                   check_dtype=False, check_freq=False)
+
+
+def test_plot_patient_flow_decimation_keeps_every_bucket_extreme():
+    df = _admissions(n_rows=20_000)
+    df['admission_date'] += pd.to_timedelta(np.arange(len(df)) % 3000, unit='D')
+    daily = df.groupby(df['admission_date'].dt.normalize()).size()
+    daily = daily.reindex(pd.date_range(daily.index.min(), daily.index.max()), fill_value=0)
+
+    fig = ha.plot_patient_flow(df, output=io.BytesIO(), max_points=200)
+    x, y = fig.axes[0].get_lines()[0].get_data()
+    x = pd.DatetimeIndex(x)
+
+    assert len(y) <= 200
+    pd.testing.assert_series_equal(pd.Series(y, index=x), daily.loc[x], check_dtype=False,
+                                   check_names=False, check_freq=False)
+    bucket_size = -(-len(daily) // 100)
+    for start in range(0, len(daily), bucket_size):
+        bucket = daily.iloc[start:start + bucket_size]
+        kept = y[(x >= bucket.index[0]) & (x <= bucket.index[-1])]
+        assert kept.min() == bucket.min() and kept.max() == bucket.max()
+
+
+def test_compact_load_streams_to_the_same_frame(tmp_path):
+    n_rows = 250_000
+    df = _admissions(n_rows=n_rows, n_patients=50_000)
+    df['discharge_date'] = df['admission_date'] + pd.Timedelta(days=2)
+    # Times of day only in the last chunk, and a text column blank in the first
+    df.loc[df.index[-10:], 'discharge_date'] += pd.Timedelta(hours=5)
+    df['department'] = np.random.default_rng(4).choice(['ED', 'ICU', 'Surgery'], n_rows)
+    df.loc[:100_000, 'department'] = None
+    path = tmp_path / 'admissions.csv'
+    pd.concat([df, df.iloc[:50]]).to_csv(path, index=False, date_format='%Y-%m-%d %H:%M:%S')
+    date_columns = ['admission_date', 'discharge_date']
+
+    expected = ha.compact_frame(ha.load_and_clean_data(str(path), date_columns), date_columns)
+    result = ha.load_and_clean_data(str(path), date_columns, compact=True)
+
+    assert result.attrs['day_columns'] == ['admission_date']
+    assert isinstance(result['department'].dtype, pd.CategoricalDtype)
+    pd.testing.assert_frame_equal(result, expected, check_dtype=False, check_categorical=False)
+
+    cache_dir = str(tmp_path / 'cache')
+    ha.load_and_clean_data(str(path), date_columns, cache_dir=cache_dir, compact=True)
+    cached = ha.load_and_clean_data(str(path), date_columns, cache_dir=cache_dir, compact=True)
+    pd.testing.assert_frame_equal(cached, result)
+    assert cached.attrs['day_columns'] == ['admission_date']
+
+
+def test_chunked_functions_accept_an_empty_stream():
+    assert ha.calculate_length_of_stay(iter([])).empty
+    assert ha.generate_summary_stats(iter([])).empty
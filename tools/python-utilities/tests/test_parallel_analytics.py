@@ -0,0 +1,31 @@
+import numpy as np
+import pandas as pd
+
+import healthcare_analytics as ha
+from parallel_analytics import PartitionedAnalytics
+from synthetic_ehr import synthetic_admissions
+
+
+def _admissions():
+    df = synthetic_admissions(20_000, seed=9)
+    df['los'] = ha.calculate_length_of_stay(df).astype('float64')
+    df.loc[::31, 'age'] = np.nan
+    df.loc[::43, 'patient_id'] = np.nan
+    return df
+
+
+def test_partitioned_metrics_match_single_process():
+    df = _admissions()
+    with PartitionedAnalytics(n_workers=2, n_partitions=3) as engine:
+        assert engine.calculate_readmission_rate(df) == ha.calculate_readmission_rate(df)
+        exact = engine.generate_summary_stats(df, ['age', 'los'])
+        sketched = engine.generate_summary_stats(df, ['age', 'los'], exact_quartiles=False)
+
+    expected = ha.generate_summary_stats(df, ['age', 'los'])
+    pd.testing.assert_frame_equal(exact, expected)
+
+    quartiles = ['25%', '50%', '75%']
+    pd.testing.assert_frame_equal(sketched.drop(index=quartiles), expected.drop(index=quartiles))
+    # Sketch quartiles are estimates within a fraction of the value range
+    spread = expected.loc['max'] - expected.loc['min']
+    assert ((sketched.loc[quartiles] - expected.loc[quartiles]).abs() <= 0.05 * spread).all().all()
@@ -0,0 +1,50 @@
+import numpy as np
+import pandas as pd
+
+from patient_index import PatientIndex
+from synthetic_ehr import synthetic_admissions
+
+
+def _extracts():
+    df = synthetic_admissions(3000, seed=11)
+    df.loc[::59, 'discharge_date'] = pd.NaT
+    df.loc[::67, 'admission_date'] = pd.NaT
+    shuffled = df.sample(frac=1, random_state=0)
+    first, second, third = shuffled.iloc[:1000], shuffled.iloc[1000:2000], shuffled.iloc[2000:]
+    # Stays discharged since the first extract are re-sent with the second
+    resent = first[first['discharge_date'].isna()].copy()
+    resent['discharge_date'] = resent['admission_date'] + pd.Timedelta(days=3)
+    return df, [first, pd.concat([second, resent]), third]
+
+
+def _stored(index):
+    return pd.DataFrame({col: np.asarray(values) for col, values in index.columns.items()})
+
+
+def test_index_after_updates_equals_a_full_sort(tmp_path):
+    df, extracts = _extracts()
+    index = PatientIndex.build(str(tmp_path), extracts[0])
+    for extract in extracts[1:]:
+        index = index.update(extract)
+
+    expected = (pd.concat(extracts).drop_duplicates('admission_id', keep='last')
+                .sort_values(['patient_id', 'admission_date'], kind='stable', na_position='last',
+                             ignore_index=True))
+    expected = expected.astype({'admission_date': 'datetime64[ns]', 'discharge_date': 'datetime64[ns]'})
+    pd.testing.assert_frame_equal(_stored(index), expected, check_dtype=False)
+    assert len(index) == len(df)
+    assert index.n_patients == df['patient_id'].nunique()
+
+    patient = int(df['patient_id'].value_counts().index[0])
+    history = index.history(patient)
+    pd.testing.assert_frame_equal(history.drop(columns='length_of_stay'),
+                                  expected[expected['patient_id'] == patient].reset_index(drop=True),
+                                  check_dtype=False)
+    np.testing.assert_array_equal(
+        history['length_of_stay'],
+        (history['discharge_date'] - history['admission_date']).dt.days.to_numpy(dtype='float64'))
+
+    patients = [patient, -1, int(df['patient_id'].iloc[0])]
+    pd.testing.assert_frame_equal(
+        index.histories(patients),
+        pd.concat([index.history(p) for p in patients], ignore_index=True), check_dtype=False)
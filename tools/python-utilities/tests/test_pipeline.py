@@ -0,0 +1,26 @@
+import numpy as np
+import pandas as pd
+
+import pipeline
+
+
+def test_iter_batches_matches_collect_on_mixed_dtype_chunks(tmp_path):
+    rng = np.random.default_rng(1)
+    n_rows = 2000
+    df = pd.DataFrame({
+        'patient_id': pd.array(rng.integers(1, 300, n_rows), dtype='Int64'),
+        'admission_date': pd.Timestamp('2024-01-01')
+                          + pd.to_timedelta(rng.integers(0, 365, n_rows), unit='D')
+    })
+    df.loc[1500, 'patient_id'] = pd.NA
+    path = tmp_path / 'admissions.csv'
+    df.to_csv(path, index=False)
+
+    lazy = (pipeline.scan(str(path), ['admission_date'], chunksize=500)
+            .with_readmission_flag(7).with_readmission_flag(30))
+    collected = lazy.collect()
+    streamed = pd.concat(lazy.iter_batches(), ignore_index=True)
+
+    pd.testing.assert_frame_equal(streamed[['readmitted_7d', 'readmitted_30d']],
+                                  collected[['readmitted_7d', 'readmitted_30d']])
+    assert collected['readmitted_30d'].any()
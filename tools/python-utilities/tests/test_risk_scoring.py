@@ -0,0 +1,52 @@
+import os
+
+import pandas as pd
+import pytest
+
+import synthetic_ehr as se
+from local_sql_runner import DEFAULT_SCRIPT, LocalSQLRunner, split_script
+from risk_scoring import RiskState, score_patient_risk
+
+
+@pytest.fixture(scope='module')
+def ehr_dir(tmp_path_factory):
+    data_dir = tmp_path_factory.mktemp('ehr')
+    se.generate_ehr_dataset(str(data_dir), 5000, file_format='csv')
+    return str(data_dir)
+
+
+def _table(ehr_dir, name, date_columns=()):
+    return pd.read_csv(os.path.join(ehr_dir, f'{name}.csv'), parse_dates=list(date_columns))
+
+
+def test_risk_scores_match_the_sql_query(ehr_dir):
+    pytest.importorskip('duckdb')
+    runner = LocalSQLRunner.from_directory(ehr_dir, as_of=se.DEFAULT_END_DATE)
+    with open(DEFAULT_SCRIPT, 'r', encoding='utf-8') as f:
+        expected = runner.query(split_script(f.read())['High-Risk Patient Identification'])
+
+    scores = score_patient_risk(_table(ehr_dir, 'admissions', ['admission_date']),
+                                _table(ehr_dir, 'diagnoses'), _table(ehr_dir, 'patients'),
+                                as_of=se.DEFAULT_END_DATE)
+
+    assert set(scores['risk_category']) == {'High Risk', 'Medium Risk', 'Low Risk'}
+    pd.testing.assert_frame_equal(scores.sort_values('patient_id', ignore_index=True),
+                                  expected.sort_values('patient_id', ignore_index=True)[scores.columns],
+                                  check_dtype=False)
+
+
+def test_risk_state_batches_match_one_shot_scoring(ehr_dir):
+    admissions = _table(ehr_dir, 'admissions', ['admission_date'])
+    diagnoses = _table(ehr_dir, 'diagnoses')
+    expected = score_patient_risk(admissions, diagnoses, as_of=se.DEFAULT_END_DATE)
+
+    state = RiskState()
+    months = admissions['admission_date'].dt.to_period('M')
+    for month in sorted(months.unique()):
+        batch = admissions[months == month]
+        # Overlapping admission extracts are absorbed once
+        state.update(pd.concat([batch, batch.head(5)]),
+                     diagnoses[diagnoses['admission_id'].isin(batch['admission_id'])])
+    state.prune(pd.Timestamp(se.DEFAULT_END_DATE) - pd.DateOffset(months=12))
+
+    pd.testing.assert_frame_equal(state.scores(se.DEFAULT_END_DATE), expected)
@@ -0,0 +1,51 @@
+import os
+
+import pandas as pd
+import pytest
+
+import synthetic_ehr as se
+from local_sql_runner import DEFAULT_SCRIPT, LocalSQLRunner, split_script
+from service_line_financials import (FinancialAccumulator, build_service_line_index,
+                                     iter_table, service_line_financials)
+
+
+@pytest.fixture(scope='module')
+def ehr_dir(tmp_path_factory):
+    pytest.importorskip('pyarrow')
+    data_dir = tmp_path_factory.mktemp('ehr')
+    se.generate_ehr_dataset(str(data_dir), 5000)
+    return str(data_dir)
+
+
+def _path(ehr_dir, name):
+    return os.path.join(ehr_dir, f'{name}.parquet')
+
+
+def test_financials_match_the_sql_query(ehr_dir):
+    pytest.importorskip('duckdb')
+    runner = LocalSQLRunner.from_directory(ehr_dir, as_of=se.DEFAULT_END_DATE)
+    with open(DEFAULT_SCRIPT, 'r', encoding='utf-8') as f:
+        expected = runner.query(split_script(f.read())['Financial Performance by Service Line'])
+
+    report = service_line_financials(_path(ehr_dir, 'admissions'), _path(ehr_dir, 'billing'),
+                                     pd.read_parquet(_path(ehr_dir, 'service_lines')),
+                                     as_of=se.DEFAULT_END_DATE, chunksize=700)
+
+    assert len(report) > 1
+    pd.testing.assert_frame_equal(report, expected, check_dtype=False, rtol=1e-9)
+
+
+def test_merged_accumulators_match_a_single_pass(ehr_dir):
+    index = build_service_line_index(_path(ehr_dir, 'admissions'), as_of=se.DEFAULT_END_DATE)
+    chunks = list(iter_table(_path(ehr_dir, 'billing'),
+                             ['admission_id', 'total_charges', 'total_costs'], chunksize=1000))
+
+    single = FinancialAccumulator(index)
+    for chunk in chunks:
+        single.update(chunk)
+    merged = FinancialAccumulator(index)
+    for chunk in chunks:
+        merged.merge(FinancialAccumulator(index).update(chunk))
+
+    pd.testing.assert_frame_equal(merged.result(), single.result())
+    assert merged.billing_rows == sum(len(chunk) for chunk in chunks)
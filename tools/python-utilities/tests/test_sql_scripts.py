@@ -0,0 +1,59 @@
+import pandas as pd
+import pytest
+
+import synthetic_ehr as se
+from local_sql_runner import DEFAULT_SCRIPT, LocalSQLRunner, split_script
+
+
+@pytest.fixture(scope='module')
+def ehr_dir(tmp_path_factory):
+    data_dir = tmp_path_factory.mktemp('ehr')
+    se.generate_ehr_dataset(str(data_dir), 3000, file_format='csv')
+    return str(data_dir)
+
+
+def test_every_script_query_binds_to_generated_tables(ehr_dir):
+    pytest.importorskip('duckdb')
+    runner = LocalSQLRunner.from_directory(ehr_dir, as_of=se.DEFAULT_END_DATE)
+    with open(DEFAULT_SCRIPT, 'r', encoding='utf-8') as f:
+        queries = split_script(f.read())
+
+    for name, sql in queries.items():
+        # LIMIT 0 binds every table and column without running the query
+        runner.query(f"SELECT * FROM ({sql}) AS bound LIMIT 0")
+
+
+def _normalized(frame):
+    """Numbers as float64 and the rest as text, rows sorted (ORDER BY ties differ)"""
+    frame = frame.apply(lambda col: col.astype('float64') if pd.api.types.is_numeric_dtype(col)
+                        else col.astype(str))
+    return frame.sort_values(list(frame.columns)).reset_index(drop=True)
+
+
+def test_script_runs_and_agrees_on_both_engines(ehr_dir):
+    pytest.importorskip('duckdb')
+    results = {}
+    for dialect in ('duckdb', 'sqlite'):
+        runner = LocalSQLRunner.from_directory(ehr_dir, dialect=dialect, as_of=se.DEFAULT_END_DATE)
+        results[dialect], timings = runner.run_script()
+        assert (timings['status'] == 'ok').all(), timings[timings['status'] != 'ok'].to_string()
+
+    assert results['duckdb'].keys() == results['sqlite'].keys()
+    for name, expected in results['duckdb'].items():
+        pd.testing.assert_frame_equal(_normalized(results['sqlite'][name]), _normalized(expected),
+                                      rtol=1e-6, obj=name)
+
+
+@pytest.mark.parametrize('dialect', ['duckdb', 'sqlite'])
+def test_benchmarked_rewrites_match_their_reference(ehr_dir, dialect):
+    pytest.importorskip('duckdb')
+    from benchmark_sql_rewrites import QUERY_PAIRS, _same_result
+
+    runner = LocalSQLRunner.from_directory(ehr_dir, dialect=dialect, as_of=se.DEFAULT_END_DATE)
+    with open(DEFAULT_SCRIPT, 'r', encoding='utf-8') as f:
+        queries = split_script(f.read())
+
+    for original, rewrite, reference in QUERY_PAIRS:
+        expected = runner.query(reference or queries[original])
+        result = runner.query(queries.get(rewrite, rewrite))
+        assert _same_result(result, expected), f"{original}:\n{result}\nvs\n{expected}"
@@ -123,6 +123,49 @@ WHERE a.discharge_date IS NOT NULL
 GROUP BY d.department_id, d.department_name
 ORDER BY readmission_rate, avg_los;
 
+-- Department Efficiency Metrics (Window Functions)
+-- Counts each stay once: the first admission after its discharge comes from a
+-- running MIN over the patient's admissions, so patients with several
+-- readmissions no longer duplicate stays the way the LEFT JOIN to ra does
+WITH events AS (
+    SELECT patient_id, admission_date as event_time, 0 as is_discharge, admission_id
+    FROM admissions
+    WHERE patient_id IS NOT NULL AND admission_date IS NOT NULL
+    UNION ALL
+    SELECT patient_id, discharge_date, 1, admission_id
+    FROM admissions
+    WHERE patient_id IS NOT NULL AND discharge_date IS NOT NULL
+),
+next_admissions AS (
+    SELECT 
+        admission_id,
+        is_discharge,
+        MIN(CASE WHEN is_discharge = 0 THEN event_time END) OVER (
+            PARTITION BY patient_id ORDER BY event_time, is_discharge
+            ROWS BETWEEN 1 FOLLOWING AND UNBOUNDED FOLLOWING) as next_admission
+    FROM events
+),
+stay_readmissions AS (
+    SELECT admission_id, next_admission
+    FROM next_admissions
+    WHERE is_discharge = 1
+)
+SELECT 
+    d.department_name,
+    COUNT(a.admission_id) as total_cases,
+    AVG(DATEDIFF(day, a.admission_date, a.discharge_date)) as avg_los,
+    SUM(CASE WHEN DATEDIFF(day, a.discharge_date, n.next_admission) <= 30 
+             THEN 1 ELSE 0 END) * 100.0 / COUNT(a.admission_id) as readmission_rate,
+    AVG(ps.satisfaction_score) as avg_satisfaction
+FROM departments d
+JOIN admissions a ON d.department_id = a.department_id
+LEFT JOIN stay_readmissions n ON a.admission_id = n.admission_id
+LEFT JOIN patient_satisfaction ps ON a.admission_id = ps.admission_id
+WHERE a.discharge_date IS NOT NULL
+    AND a.admission_date >= DATEADD(year, -1, GETDATE())
+GROUP BY d.department_id, d.department_name
+ORDER BY readmission_rate, avg_los;
+
 -- Financial Performance by Service Line
 -- Analyzes revenue and cost metrics
 SELECT 